@@ -1,8 +1,9 @@
 from firecrawl import FirecrawlApp
 from dotenv import load_dotenv
+import asyncio
 import os
-from time import sleep
-from firecrawl import FirecrawlApp
+
+from fastapi_scraper.src.services.job_waiter import wait_for, batch_scrape_job
 
 load_dotenv()
 
@@ -10,21 +11,19 @@ app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
 # Scrape a website:
 # Or, you can use the asynchronous method:
-batch_scrape_job = app.async_batch_scrape_urls(
+batch_scrape_job_response = app.async_batch_scrape_urls(
     ['https://docs.firecrawl.dev'], 
     formats=['markdown', 'html']
 )
-print(batch_scrape_job)
+print(batch_scrape_job_response)
 
-# (async) You can then use the job ID to check the status of the batch scrape:
-while True:
-    batch_scrape_status = app.check_batch_scrape_status(batch_scrape_job.id)
-    print(batch_scrape_status)
-    if batch_scrape_status.status == 'completed':
-        break
-    sleep(10)
+# (async) Wait for the batch scrape to finish, polling with backoff:
+batch_scrape_status = asyncio.run(wait_for(
+    batch_scrape_job(app, batch_scrape_job_response.id),
+    on_status=lambda status: print(status.status)
+))
 
 # Access the markdown directly
 if batch_scrape_status.data and len(batch_scrape_status.data) > 0:
     markdown_content = batch_scrape_status.data[0].markdown
-    print(markdown_content)
\ No newline at end of file
+    print(markdown_content)
@@ -1,19 +1,54 @@
 from firecrawl import FirecrawlApp, ScrapeOptions
 from dotenv import load_dotenv
+import asyncio
 import os
+import requests
+
+from fastapi_scraper.src.services.crawl_archive import CrawlArchiveWriter, iter_pages
+from fastapi_scraper.src.services.job_waiter import Job, wait_for
 
 load_dotenv()
 
 app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
-# Crawl a website:
-crawl_result = app.crawl_url(
-  'https://docs.crewai.com/', 
+# Start crawling a website:
+crawl_url = 'https://docs.crewai.com/'
+crawl_response = app.async_crawl_url(
+  crawl_url, 
   limit=10, 
   scrape_options=ScrapeOptions(formats=['markdown', 'html']),
 )
 
-with open('crawl_result.json', 'w') as f:
-    f.write(crawl_result.model_dump_json())
+# Write each page to the archive as soon as it shows up in the crawl status,
+# instead of dumping the whole crawl as one giant JSON string at the end.
+# Each poll asks only for the pages after the ones already archived (the
+# status endpoint's `skip`), and follows its `next` cursor one response at a
+# time, so no poll downloads or holds the pages written before it.
+session = requests.Session()
+session.headers["Authorization"] = f"Bearer {app.api_key}"
+
+with CrawlArchiveWriter('crawl_result.jsonl', {"url": crawl_url, "id": crawl_response.id}) as archive:
+    def fetch_new_pages(crawl_id):
+        url = f"{app.api_url}/v1/crawl/{crawl_id}?skip={archive.pages_written}"
+        new_pages = 0
+        while True:
+            response = session.get(url, timeout=60)
+            response.raise_for_status()
+            status = response.json()
+            written = archive.write_pages(status.pop("data", None) or [])
+            new_pages += written
+            url = status.get("next")
+            if not url or not written:
+                return {**status, "new_pages": new_pages}
+
+    crawl_status = asyncio.run(wait_for(
+        Job(crawl_response.id, fetch_new_pages, name="crawl"),
+        on_status=lambda status: status["new_pages"] > 0
+    ))
+    archive.close({"status": crawl_status["status"], "credits_used": crawl_status.get("creditsUsed")})
+
+print("Pages archived:", archive.pages_written, "- credits used:", crawl_status.get("creditsUsed"))
 
-# print(crawl_result)
\ No newline at end of file
+# Read the archive back lazily, one page at a time
+for page in iter_pages('crawl_result.jsonl'):
+    print(page['metadata'].get('sourceURL'), len(page.get('markdown') or ''))
@@ -1,28 +1,29 @@
 from firecrawl import FirecrawlApp, ScrapeOptions
+import asyncio
 import os
 from dotenv import load_dotenv
-import time
+
+from fastapi_scraper.src.services.job_waiter import wait_for, crawl_job
 
 load_dotenv()
 
 app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
 # Crawl a website:
-crawl_status = app.async_crawl_url(
+crawl_response = app.async_crawl_url(
   'https://docs.crewai.com/', 
   limit=5, 
   scrape_options=ScrapeOptions(formats=['markdown', 'html'], onlyMainContent=True)
 )
 
-print(crawl_status.id)
+print(crawl_response.id)
 
-while True:
-    if crawl_status.id and app.check_crawl_status(crawl_status.id).status == 'completed':
-        print(app.check_crawl_status(crawl_status.id))
-        break
-    else:
-        print(app.check_crawl_status(crawl_status.id).status)
-    time.sleep(5)
+# One status call per poll, backing off while the crawl runs
+crawl_status = asyncio.run(wait_for(
+    crawl_job(app, crawl_response.id),
+    initial_delay=5,
+    on_status=lambda status: print(status.status)
+))
 
 # Get the crawl results
 results = crawl_status.model_dump_json()
@@ -1,20 +1,27 @@
 from firecrawl import FirecrawlApp
 from dotenv import load_dotenv
+import asyncio
 import os
 
+from fastapi_scraper.src.services.job_waiter import wait_for, llms_text_job
+
 load_dotenv()
 
 app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
 
-# Scrape a website:
-scrape_result = app.generate_llms_text(
-    url='https://docs.crewai.com/en', 
+# Start generating llms.txt for a website:
+llms_job = app.async_generate_llms_text(
+    url='https://docs.crewai.com/en',
     show_full_text=True,
 )
 
-while True:
-    if scrape_result.status == 'completed':
-        print(scrape_result)
-        break
-    else:
-        print(scrape_result.status)
\ No newline at end of file
+print(llms_job.id)
+
+# Poll the job status with exponential backoff instead of spinning
+llms_status = asyncio.run(wait_for(
+    llms_text_job(app, llms_job.id),
+    max_delay=15,
+    on_status=lambda status: print(status.status)
+))
+
+print(llms_status.data.llmstxt)
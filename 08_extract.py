@@ -5,6 +5,8 @@ import os
 
 from openai import OpenAI
 
+from firecrawl_flow.src.firecrawl_flow.utils.llm_cache import LLMCache
+
 load_dotenv()
 
 app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
@@ -26,14 +28,29 @@ results = app.extract(
 )
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+llm_cache = LLMCache()
+
+SUMMARY_MODEL = "gpt-4.1"
+SYSTEM_PROMPT = "You are a helpful assistant."
+SUMMARY_PROMPT = "I need you to extract the information and give this into an ordered summary of that information as markdown.  It should find coding examples and all information.  Here is the information: {results}"
+
+def summarize() -> str:
+    completion = client.chat.completions.create(
+      model=SUMMARY_MODEL,
+      messages=[
+        {"role": "developer", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": SUMMARY_PROMPT.format(results=results)}
+      ]
+    )
+    return completion.choices[0].message.content
 
-completion = client.chat.completions.create(
-  model="gpt-4.1",
-  messages=[
-    {"role": "developer", "content": "You are a helpful assistant."},
-    {"role": "user", "content": f"I need you to extract the information and give this into an ordered summary of that information as markdown.  It should find coding examples and all information.  Here is the information: {results}"}
-  ]
+# Unchanged extract results reuse the earlier summary instead of calling OpenAI again
+summary = llm_cache.get_or_call(
+    model=SUMMARY_MODEL,
+    template=SYSTEM_PROMPT + "\n" + SUMMARY_PROMPT,
+    inputs={"results": str(results)},
+    call=summarize
 )
 
 with open('summary.md', 'w') as f:
-    f.write(completion.choices[0].message.content)
\ No newline at end of file
+    f.write(summary)
\ No newline at end of file
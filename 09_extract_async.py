@@ -1,7 +1,10 @@
 from firecrawl import FirecrawlApp
+import asyncio
 import os
 from dotenv import load_dotenv
-import time
+
+from fastapi_scraper.src.services.job_waiter import wait_for, extract_job
+
 load_dotenv()
 
 app = FirecrawlApp(
@@ -9,21 +12,17 @@ app = FirecrawlApp(
 )
 
 # Start an extraction job first
-extract_job = app.async_extract([
+extract_response = app.async_extract([
     'https://docs.firecrawl.dev/*', 
     'https://firecrawl.dev/'
 ], prompt="Extract the company mission and features from these pages.")
 
-# Get the status of the extraction job
-job_status = app.get_extract_status(extract_job.id)
+# Wait for the extraction job, checking its status once per poll
+job_status = asyncio.run(wait_for(
+    extract_job(app, extract_response.id),
+    initial_delay=5,
+    on_status=lambda status: print(status.status)
+))
 
-while True:
-    job_status = app.get_extract_status(extract_job.id)
-    if app.get_extract_status(extract_job.id) and app.get_extract_status(extract_job.id).status == 'completed':
-        print("Extraction completed")
-        print(app.get_extract_status(extract_job.id))
-        break
-    print(job_status.status)
-    time.sleep(5)
-    
-print(job_status.data)
\ No newline at end of file
+print("Extraction completed")
+print(job_status.data)
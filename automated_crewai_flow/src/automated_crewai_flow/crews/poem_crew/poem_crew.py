@@ -3,6 +3,8 @@ from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
 
+from firecrawl_flow.tools.custom_tool import FirecrawlScrapeTool, FirecrawlSearchTool
+
 # If you want to run a snippet of code before or after the crew starts,
 # you can use the @before_kickoff and @after_kickoff decorators
 # https://docs.crewai.com/concepts/crews#example-crew-class-with-decorators
@@ -21,12 +23,14 @@ class PoemCrew:
     agents_config = "config/agents.yaml"
     tasks_config = "config/tasks.yaml"
 
-    # If you would lik to add tools to your crew, you can learn more about it here:
-    # https://docs.crewai.com/concepts/agents#agent-tools
+    # Tools: https://docs.crewai.com/concepts/agents#agent-tools
+    # Search and scrape let the writer look up what CrewAI does; concurrent
+    # poems of one run share the tool cache, so each page is fetched once
     @agent
     def poem_writer(self) -> Agent:
         return Agent(
             config=self.agents_config["poem_writer"],  # type: ignore[index]
+            tools=[FirecrawlSearchTool(), FirecrawlScrapeTool()],
         )
 
     # To learn more about structured task outputs,
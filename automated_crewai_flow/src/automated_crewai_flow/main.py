@@ -1,9 +1,16 @@
 #!/usr/bin/env python
+import asyncio
+import sys
+import time
+from functools import lru_cache
 from random import randint
+from typing import List, Optional
 
 from pydantic import BaseModel
 
+from crewai import Crew
 from crewai.flow import Flow, listen, start
+from firecrawl_flow.utils.instrumentation import run_trace, traced_kickoff_async, traced_step
 
 from automated_crewai_flow.crews.poem_crew.poem_crew import PoemCrew
 
@@ -11,37 +18,129 @@ from automated_crewai_flow.crews.poem_crew.poem_crew import PoemCrew
 class PoemState(BaseModel):
     sentence_count: int = 1
     poem: str = ""
+    poem_count: int = 1
+    concurrency: int = 4
+    sentence_counts: List[int] = []
+    poems: List[str] = []
+    output_file: str = "poem.txt"
+    elapsed: float = 0.0
+
+
+@lru_cache(maxsize=1)
+def poem_crew() -> Crew:
+    """Build the poem crew once; agents.yaml and tasks.yaml are parsed a single time per process."""
+    return PoemCrew().crew()
+
+
+async def generate_poems(sentence_counts: List[int], concurrency: int = 4) -> List[str]:
+    """
+    Generate one poem per sentence count, at most ``concurrency`` at a time.
+
+    Every run kicks off a copy of the shared crew definition, so concurrent
+    runs never share agent or task state.
+
+    Args:
+        sentence_counts: Sentence count of each poem
+        concurrency: Maximum number of crews running at once
+
+    Returns:
+        Poems in the order of ``sentence_counts``
+    """
+    crew = poem_crew()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def generate(number: int, sentence_count: int) -> str:
+        async with semaphore:
+            result = await traced_kickoff_async(crew.copy(), inputs={"sentence_count": sentence_count}, name="poem_crew")
+        print(f"Poem {number} generated ({sentence_count} sentences)")
+        return result.raw
+
+    return list(await asyncio.gather(
+        *(generate(i, count) for i, count in enumerate(sentence_counts, 1))
+    ))
+
+
+def write_poems(filename: str, poems: List[str], sentence_counts: List[int]) -> None:
+    """Write all poems with a single write; a single poem is written as-is."""
+    if len(poems) == 1:
+        content = poems[0]
+    else:
+        content = "\n\n".join(
+            f"## Poem {i} ({count} sentences)\n\n{poem.strip()}"
+            for i, (poem, count) in enumerate(zip(poems, sentence_counts), 1)
+        ) + "\n"
+    with open(filename, "w") as f:
+        f.write(content)
 
 
 class PoemFlow(Flow[PoemState]):
 
     @start()
+    @traced_step
     def generate_sentence_count(self):
         print("Generating sentence count")
-        self.state.sentence_count = randint(1, 5)
+        if not self.state.sentence_counts:
+            self.state.sentence_counts = [randint(1, 5) for _ in range(max(1, self.state.poem_count))]
+        self.state.poem_count = len(self.state.sentence_counts)
+        self.state.sentence_count = self.state.sentence_counts[0]
 
     @listen(generate_sentence_count)
-    def generate_poem(self):
-        print("Generating poem")
-        result = (
-            PoemCrew()
-            .crew()
-            .kickoff(inputs={"sentence_count": self.state.sentence_count})
-        )
+    @traced_step
+    async def generate_poem(self):
+        print(f"Generating {self.state.poem_count} poem(s), {self.state.concurrency} at a time")
+        started = time.perf_counter()
+        self.state.poems = await generate_poems(self.state.sentence_counts, self.state.concurrency)
+        self.state.elapsed = time.perf_counter() - started
 
-        print("Poem generated", result.raw)
-        self.state.poem = result.raw
+        print(f"{len(self.state.poems)} poem(s) generated in {self.state.elapsed:.1f}s")
+        self.state.poem = self.state.poems[0]
 
     @listen(generate_poem)
+    @traced_step
     def save_poem(self):
-        print("Saving poem")
-        with open("poem.txt", "w") as f:
-            f.write(self.state.poem)
+        print(f"Saving poems to {self.state.output_file}")
+        write_poems(self.state.output_file, self.state.poems, self.state.sentence_counts)
 
 
-def kickoff():
+def kickoff(poem_count: int = 1, concurrency: int = 4, output_file: str = "poem.txt"):
     poem_flow = PoemFlow()
-    poem_flow.kickoff()
+    with run_trace("poem_flow"):
+        poem_flow.kickoff(inputs={
+            "poem_count": poem_count,
+            "concurrency": concurrency,
+            "output_file": output_file
+        })
+    return poem_flow
+
+
+def benchmark(poem_count: int = 8, concurrency: int = 4, sentence_counts: Optional[List[int]] = None):
+    """
+    Generate the same set of poems serially and concurrently and print the timings.
+
+    Both runs use the same sentence counts and write to separate files.
+    """
+    sentence_counts = sentence_counts or [randint(1, 5) for _ in range(poem_count)]
+    timings = []
+    for mode, limit in (("serial", 1), ("parallel", concurrency)):
+        poem_flow = PoemFlow()
+        with run_trace(f"poem_flow_{mode}"):
+            poem_flow.kickoff(inputs={
+                "sentence_counts": sentence_counts,
+                "concurrency": limit,
+                "output_file": f"poems_{mode}.txt"
+            })
+        timings.append((mode, limit, poem_flow.state.elapsed))
+
+    serial_elapsed = timings[0][2]
+    print()
+    print(f"{'mode':<10}{'concurrency':>12}{'poems':>8}{'total (s)':>12}{'per poem (s)':>14}{'speedup':>10}")
+    for mode, limit, elapsed in timings:
+        speedup = serial_elapsed / elapsed if elapsed else 0.0
+        print(
+            f"{mode:<10}{limit:>12}{len(sentence_counts):>8}{elapsed:>12.1f}"
+            f"{elapsed / len(sentence_counts):>14.1f}{speedup:>9.1f}x"
+        )
+    return timings
 
 
 def plot():
@@ -50,4 +149,18 @@ def plot():
 
 
 if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "--benchmark":
+        benchmark(
+            poem_count=int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+            concurrency=int(sys.argv[3]) if len(sys.argv) > 3 else 4
+        )
+        sys.exit(0)
+    if len(sys.argv) >= 2:
+        kickoff(
+            poem_count=int(sys.argv[1]),
+            concurrency=int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+            output_file="poems.txt"
+        )
+        sys.exit(0)
+
     kickoff()
@@ -0,0 +1,302 @@
+"""
+Resumable bulk runner for FireCrawl requests.
+
+Reads a JSONL file where every line is one request, runs the requests with
+bounded concurrency and writes one NDJSON result per line. Progress is
+checkpointed to a bitmap ledger (one bit per input line), so a killed run
+picks up where it left off without repeating completed lines. Failed lines
+are written to the output with their error and recorded in a second bitmap
+(``<ledger>.failed``), and a plain rerun skips them. ``--retry-failed`` runs
+them again; every retry appends a new record, success or failure, so a line
+retried N times has up to N + 1 records and the last one for it counts.
+
+Request lines look like:
+
+    {"type": "scrape", "url": "https://firecrawl.dev", "formats": ["markdown"]}
+    {"type": "crawl", "url": "https://docs.crewai.com/", "limit": 10}
+    {"type": "search", "query": "context engineering", "limit": 5}
+    {"type": "map", "url": "https://docs.crewai.com/en"}
+
+Any extra keys besides "type", "id", "url" and "query" are passed to the
+FireCrawl call. Lines with an "id" echo it in their result.
+
+Usage:
+
+    python bulk_runner.py jobs.jsonl --output results.ndjson --concurrency 8
+    python bulk_runner.py jobs.jsonl --output results.ndjson --retry-failed
+"""
+
+import argparse
+import asyncio
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+from firecrawl import FirecrawlApp, ScrapeOptions
+
+from fastapi_scraper.src.services.job_waiter import wait_for, crawl_job
+
+load_dotenv()
+
+
+class Ledger:
+    """
+    Memory-mapped bitmap recording which input lines are done.
+
+    One bit per line keeps the ledger at 125 KB per million lines, and the
+    operating system pages it in and out as needed.
+    """
+
+    GROW_BYTES = 64 * 1024
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a+b")
+        if os.path.getsize(path) == 0:
+            self._file.truncate(self.GROW_BYTES)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _ensure(self, line: int) -> None:
+        needed = line // 8 + 1
+        if needed <= len(self._map):
+            return
+        size = (needed // self.GROW_BYTES + 1) * self.GROW_BYTES
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def is_done(self, line: int) -> bool:
+        byte = line // 8
+        if byte >= len(self._map):
+            return False
+        return bool(self._map[byte] & (1 << (line % 8)))
+
+    def mark_done(self, line: int) -> None:
+        self._ensure(line)
+        byte = line // 8
+        self._map[byte] = self._map[byte] | (1 << (line % 8))
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+class ResultWriter:
+    """
+    Buffered NDJSON writer that checkpoints the ledgers.
+
+    Lines are only marked done (or failed) in the ledgers after their results
+    have been flushed to disk, so a crash can at worst repeat a line, never
+    lose one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ledger: Ledger,
+        failures: Ledger,
+        checkpoint_every: int = 100,
+        checkpoint_seconds: float = 5.0,
+    ):
+        self._file = open(path, "a", encoding="utf-8")
+        self.ledger = ledger
+        self.failures = failures
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_seconds = checkpoint_seconds
+        self._pending: list = []
+        self._last_checkpoint = time.monotonic()
+        self.written = 0
+
+    def write(self, line: int, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, default=str, ensure_ascii=False))
+        self._file.write("\n")
+        self._pending.append((line, bool(record.get("success"))))
+        self.written += 1
+        if (
+            len(self._pending) >= self.checkpoint_every
+            or time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds
+        ):
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        for line, success in self._pending:
+            (self.ledger if success else self.failures).mark_done(line)
+        self.ledger.flush()
+        self.failures.flush()
+        self._pending.clear()
+        self._last_checkpoint = time.monotonic()
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._file.close()
+
+
+def _dump(response: Any) -> Any:
+    if hasattr(response, "model_dump"):
+        return response.model_dump(exclude_none=True)
+    return response
+
+
+def run_request(app: FirecrawlApp, request: Dict[str, Any]) -> Any:
+    """Run a scrape, search or map request (blocking)."""
+    params = {k: v for k, v in request.items() if k not in ("type", "id", "url", "query")}
+    request_type = request.get("type", "scrape")
+
+    if request_type == "scrape":
+        return app.scrape_url(request["url"], **params)
+    if request_type == "search":
+        if "scrape_options" in params:
+            params["scrape_options"] = ScrapeOptions(**params["scrape_options"])
+        return app.search(request["query"], **params)
+    if request_type == "map":
+        return app.map_url(request["url"], **params)
+    raise ValueError(f"Unknown request type: {request_type}")
+
+
+async def run_crawl(app: FirecrawlApp, request: Dict[str, Any], timeout: float) -> Any:
+    """Start a crawl and wait for it without holding a worker thread."""
+    params = {k: v for k, v in request.items() if k not in ("type", "id", "url")}
+    if "scrape_options" in params:
+        params["scrape_options"] = ScrapeOptions(**params["scrape_options"])
+
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(None, lambda: app.async_crawl_url(request["url"], **params))
+    if not response.id:
+        raise RuntimeError(f"Crawl was not accepted: {getattr(response, 'error', None)}")
+    return await wait_for(crawl_job(app, response.id), timeout=timeout)
+
+
+async def process_line(
+    app: FirecrawlApp,
+    line_number: int,
+    raw_line: str,
+    writer: ResultWriter,
+    timeout: float,
+) -> bool:
+    """
+    Run one input line and write its result record.
+
+    ``timeout`` bounds how long the line may take, including time spent
+    waiting for a free executor thread. A blocking SDK call cannot be
+    stopped once it has started: on timeout the line is recorded as failed
+    and its worker moves on, but the thread keeps waiting for the HTTP
+    response and holds one of the ``concurrency`` executor threads until it
+    arrives. The SDK's own client timeout does not help (firecrawl-py passes
+    milliseconds where requests expects seconds); a ``timeout`` key in the
+    request line is passed to FireCrawl and makes the upstream give up, and
+    with it the call, after that many milliseconds.
+    """
+    record: Dict[str, Any] = {"line": line_number}
+    try:
+        request = json.loads(raw_line)
+        record["id"] = request.get("id")
+        record["type"] = request.get("type", "scrape")
+
+        if record["type"] == "crawl":
+            response = await run_crawl(app, request, timeout)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await asyncio.wait_for(
+                loop.run_in_executor(None, run_request, app, request),
+                timeout=timeout
+            )
+
+        record["success"] = True
+        record["data"] = _dump(response)
+    except Exception as e:
+        record["success"] = False
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    writer.write(line_number, record)
+    return record["success"]
+
+
+async def run(
+    input_path: str,
+    output_path: str,
+    ledger_path: str,
+    concurrency: int,
+    timeout: float,
+    retry_failed: bool = False,
+) -> None:
+    app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
+
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+
+    ledger = Ledger(ledger_path)
+    failures = Ledger(f"{ledger_path}.failed")
+    writer = ResultWriter(output_path, ledger, failures)
+    semaphore = asyncio.Semaphore(concurrency)
+    in_flight: set = set()
+    stats = {"skipped": 0, "skipped_failed": 0, "succeeded": 0, "failed": 0}
+    started = time.monotonic()
+
+    def _done(task: asyncio.Task) -> None:
+        in_flight.discard(task)
+        semaphore.release()
+        if not task.cancelled() and task.exception() is None:
+            stats["succeeded" if task.result() else "failed"] += 1
+
+    try:
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line_number, raw_line in enumerate(f):
+                if not raw_line.strip() or ledger.is_done(line_number):
+                    stats["skipped"] += 1
+                    continue
+                if failures.is_done(line_number) and not retry_failed:
+                    # Its failure is already in the output
+                    stats["skipped_failed"] += 1
+                    continue
+
+                # Blocks once `concurrency` lines are in flight, so memory
+                # stays flat however long the input is
+                await semaphore.acquire()
+                task = asyncio.create_task(process_line(app, line_number, raw_line, writer, timeout))
+                in_flight.add(task)
+                task.add_done_callback(_done)
+
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    finally:
+        writer.close()
+        ledger.close()
+        failures.close()
+        elapsed = time.monotonic() - started
+        print(
+            f"Done in {elapsed:.1f}s - succeeded: {stats['succeeded']}, "
+            f"failed: {stats['failed']}, skipped (already done or blank): {stats['skipped']}, "
+            f"skipped (failed before, see --retry-failed): {stats['skipped_failed']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run FireCrawl requests from a JSONL file, resumably.")
+    parser.add_argument("input", help="JSONL file with one request per line")
+    parser.add_argument("-o", "--output", default="results.ndjson", help="NDJSON results file (appended to)")
+    parser.add_argument("--ledger", default=None, help="Progress ledger path (default: <output>.ledger)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-request timeout in seconds (a timed-out call's thread runs on until it returns)")
+    parser.add_argument("--retry-failed", action="store_true", help="Rerun lines that failed in earlier runs")
+    args = parser.parse_args()
+
+    ledger_path = args.ledger or f"{args.output}.ledger"
+    try:
+        asyncio.run(run(args.input, args.output, ledger_path, args.concurrency, args.timeout, args.retry_failed))
+    except KeyboardInterrupt:
+        print(f"Interrupted - progress saved to {ledger_path}, rerun the same command to resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Gunicorn configuration for running the API with several worker processes.
+
+    gunicorn -c gunicorn.conf.py src.main:app
+
+Every setting can be overridden with the environment variables below or on
+the command line.
+"""
+
+import multiprocessing
+import os
+
+# Workers share jobs, caches and rate limits through SQLite. This must be set
+# before the app is preloaded, since the settings are read at import time.
+os.environ.setdefault("SCRAPER_STATE_BACKEND", "sqlite")
+
+_job_timeout = int(os.getenv("SCRAPER_JOB_TIMEOUT", "300"))
+
+bind = os.getenv(
+    "GUNICORN_BIND",
+    f"{os.getenv('SCRAPER_HOST', '0.0.0.0')}:{os.getenv('SCRAPER_PORT', '8000')}"
+)
+
+# Requests are I/O bound and async, so one event loop per core is enough;
+# CPU-heavy work (boilerplate stripping, near-duplicate detection) runs in
+# each worker's thread pool.
+workers = int(os.getenv("SCRAPER_WORKERS", str(max(2, multiprocessing.cpu_count()))))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master; workers fork with the code already loaded
+preload_app = True
+
+# A worker being restarted stops accepting connections and gets until
+# graceful_timeout to finish in-flight requests. Crawls wait up to the job
+# timeout, so give them that long before the worker is killed.
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", str(_job_timeout + 30)))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth, staggered so they do
+# not all restart together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", None)
+errorlog = "-"
+loglevel = os.getenv("SCRAPER_LOG_LEVEL", "info").lower()
+
+
+def on_starting(server):
+    server.log.info(
+        f"Starting {workers} workers, state backend: {os.environ['SCRAPER_STATE_BACKEND']}"
+    )
+
+
+def worker_int(worker):
+    worker.log.info(f"Worker {worker.pid} interrupted, draining in-flight requests")
@@ -1,12 +1,18 @@
 from pydantic_settings import BaseSettings
-from pydantic import Field
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class UpstreamEndpoint(BaseModel):
+    """An extra FireCrawl endpoint: another API key, a self-hosted instance, or both."""
+    base_url: Optional[str] = Field(default=None, description="FireCrawl API URL; defaults to the hosted API")
+    api_key: Optional[str] = Field(default=None, description="API key for this endpoint")
+
+
 class Settings(BaseSettings):
     """Application settings."""
     
@@ -25,10 +31,12 @@ class Settings(BaseSettings):
     # FireCrawl settings
     firecrawl_api_key: str = Field(..., description="FireCrawl API key")
     firecrawl_base_url: Optional[str] = Field(default=None, description="FireCrawl base URL")
+    firecrawl_endpoints: list[UpstreamEndpoint] = Field(default=[], description="Further FireCrawl endpoints to spread calls over, as a JSON list")
     
     # Rate limiting
     rate_limit_requests: int = Field(default=100, description="Rate limit requests per minute")
     rate_limit_window: int = Field(default=60, description="Rate limit window in seconds")
+    rate_limit_enabled: bool = Field(default=False, description="Enforce the per-client rate limit on requests that start scraping work")
     
     # CORS settings
     cors_origins: list[str] = Field(default=["*"], description="CORS origins")
@@ -42,6 +50,62 @@ class Settings(BaseSettings):
     # Job settings
     job_timeout: int = Field(default=300, description="Job timeout in seconds")
     max_concurrent_jobs: int = Field(default=10, description="Maximum concurrent jobs")
+    job_retention: int = Field(default=86400, description="Seconds an untouched job record is kept")
+    shutdown_drain_timeout: int = Field(default=30, description="Seconds to let background jobs finish on shutdown")
+    
+    # Upstream resilience settings
+    circuit_breaker_failure_threshold: int = Field(default=5, description="Consecutive upstream failures that open the circuit")
+    circuit_breaker_recovery_timeout: float = Field(default=30.0, description="Seconds the circuit stays open before probing upstream")
+    circuit_breaker_half_open_calls: int = Field(default=1, description="Probe calls allowed while the circuit is half-open")
+    hedge_requests: bool = Field(default=False, description="Send a second attempt for scrapes slower than the latency percentile")
+    hedge_percentile: float = Field(default=95.0, description="Latency percentile after which a scrape is hedged")
+    hedge_min_samples: int = Field(default=20, description="Scrapes observed before hedging starts")
+    hedge_budget: float = Field(default=0.1, description="Maximum share of scrapes that may be hedged")
+    upstream_concurrency_initial: int = Field(default=10, description="FireCrawl calls allowed in flight at start")
+    upstream_concurrency_min: int = Field(default=1, description="Lower bound for the adaptive upstream concurrency limit")
+    upstream_concurrency_max: int = Field(default=50, description="Upper bound for the adaptive upstream concurrency limit")
+    upstream_concurrency_increase: float = Field(default=1.0, description="Limit growth per round of healthy upstream calls")
+    upstream_concurrency_decrease: float = Field(default=0.5, description="Factor applied to the limit on 429, 5xx or latency spikes")
+    upstream_latency_tolerance: float = Field(default=3.0, description="Multiple of median latency that counts as a latency spike")
+    upstream_call_deadline: float = Field(default=120.0, description="Seconds an upstream call may take, retries included")
+    retry_max_attempts: int = Field(default=3, description="Attempts per upstream call, including the first")
+    retry_base_delay: float = Field(default=0.5, description="Backoff before the first retry in seconds, doubled per retry")
+    retry_max_delay: float = Field(default=8.0, description="Maximum backoff between retries in seconds")
+    idempotency_key_ttl: int = Field(default=86400, description="Seconds an Idempotency-Key is remembered")
+    
+    # Batch scheduling settings
+    batch_domain_scheduling: bool = Field(default=False, description="Interleave batch URLs by domain and cap each domain's share of an upstream batch")
+    batch_domain_concurrency: int = Field(default=5, description="URLs per registrable domain in one upstream batch")
+    batch_domain_slow_latency: float = Field(default=30.0, description="Seconds per wave above which a domain's cap is halved")
+    batch_domain_parallel_jobs: int = Field(default=4, description="Upstream batch jobs a scheduled batch may run at once")
+    
+    # Shared state settings
+    state_backend: Literal["memory", "sqlite"] = Field(default="memory", description="Where jobs, caches and rate limits live")
+    state_path: str = Field(default="./storage/state.sqlite3", description="SQLite file for the sqlite state backend")
+    
+    # URL canonicalization settings
+    url_strip_trailing_slash: bool = Field(default=True, description="Treat URLs differing only by a trailing slash as equal")
+    url_strip_tracking_params: bool = Field(default=True, description="Drop utm_*, gclid, fbclid and similar query parameters")
+    url_sort_query_params: bool = Field(default=True, description="Sort query parameters by key")
+    url_extra_tracking_params: list[str] = Field(default=[], description="Additional query parameters to drop")
+    
+    # Extract settings
+    extract_cache_ttl: int = Field(default=3600, description="Extract result cache TTL in seconds")
+    extract_cache_max_entries: int = Field(default=1024, description="Maximum cached extract results")
+    schema_cache_max_entries: int = Field(default=256, description="Maximum compiled extract schemas kept in memory")
+    
+    # llms.txt settings
+    llms_text_cache_ttl: int = Field(default=86400, description="Generated llms.txt cache TTL in seconds")
+    llms_text_poll_initial: float = Field(default=1.0, description="Initial llms.txt status poll interval in seconds")
+    llms_text_poll_max: float = Field(default=15.0, description="Maximum llms.txt status poll interval in seconds")
+    
+    # Boilerplate stripping settings
+    boilerplate_min_fraction: float = Field(default=0.5, description="Share of pages a line must repeat on to count as boilerplate")
+    boilerplate_min_pages: int = Field(default=3, description="Minimum pages needed before boilerplate is stripped")
+    
+    # Near-duplicate detection settings
+    near_duplicate_max_distance: int = Field(default=3, description="Maximum SimHash bit difference between near-duplicate pages")
+    near_duplicate_index_size: int = Field(default=100000, description="Pages remembered for near-duplicate detection across jobs")
     
     # Storage settings (for future use)
     storage_path: str = Field(default="./storage", description="Storage path for files")
@@ -1,14 +1,23 @@
 from functools import lru_cache
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+from typing import Annotated, Optional
+from fastapi import Depends, Header, HTTPException, Request, status
 import logging
 
 from .services.firecrawl_service import FireCrawlService, create_firecrawl_service
+from .services.state_store import StateBackend, create_state_backend
 from .config import settings
-from .exceptions import ConfigurationException
+from .exceptions import ConfigurationException, RateLimitExceededException
 
 logger = logging.getLogger(__name__)
 
+@lru_cache()
+def get_state_backend() -> StateBackend:
+    """
+    Shared state backend (jobs, caches, rate limits).
+    Cached per process; the sqlite backend is shared by all worker processes.
+    """
+    return create_state_backend()
+
 # Cache the service instance to reuse across requests
 @lru_cache()
 def get_firecrawl_service() -> FireCrawlService:
@@ -17,7 +26,7 @@ def get_firecrawl_service() -> FireCrawlService:
     Uses LRU cache to ensure single instance across requests.
     """
     try:
-        return create_firecrawl_service()
+        return create_firecrawl_service(state=get_state_backend())
     except ConfigurationException as e:
         logger.error(f"Failed to create FireCrawl service: {e}")
         raise HTTPException(
@@ -28,6 +37,16 @@ def get_firecrawl_service() -> FireCrawlService:
 # Type alias for dependency injection
 FireCrawlServiceDep = Annotated[FireCrawlService, Depends(get_firecrawl_service)]
 
+# Optional client-supplied key that makes retried job submissions start only one job
+IdempotencyKeyDep = Annotated[
+    Optional[str],
+    Header(
+        alias="Idempotency-Key",
+        max_length=255,
+        description="Retrying the request with the same key returns the job it started"
+    )
+]
+
 
 async def validate_api_health(
     firecrawl_service: FireCrawlServiceDep
@@ -58,4 +77,26 @@ def get_settings() -> type[settings]:
 
 
 # Type alias for settings dependency
-SettingsDep = Annotated[type[settings], Depends(get_settings)] 
\ No newline at end of file
+SettingsDep = Annotated[type[settings], Depends(get_settings)]
+
+
+async def enforce_rate_limit(request: Request) -> None:
+    """
+    Dependency enforcing ``rate_limit_requests`` per ``rate_limit_window`` for each client.
+    Counters live in the state backend, so the limit holds across workers.
+    
+    Only requests that start work count: GET status polls and result streams
+    are read-only, and throttling them would only make clients poll longer.
+    """
+    if not settings.rate_limit_enabled or request.method in ("GET", "HEAD"):
+        return
+    
+    client = request.client.host if request.client else "unknown"
+    retry_after = get_state_backend().rate_limiter.hit(
+        f"client:{client}",
+        limit=settings.rate_limit_requests,
+        window=settings.rate_limit_window
+    )
+    if retry_after:
+        logger.warning(f"Rate limit exceeded for client {client}")
+        raise RateLimitExceededException(retry_after=retry_after)
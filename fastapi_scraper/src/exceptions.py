@@ -124,12 +124,16 @@ class ConfigurationException(ScraperException):
 class ServiceUnavailableException(ScraperException):
     """Exception for service unavailable errors."""
     
-    def __init__(self, service_name: str = "External service"):
+    def __init__(self, service_name: str = "External service", retry_after: Optional[int] = None):
+        headers = {"X-Error-Code": "SERVICE_UNAVAILABLE"}
+        if retry_after:
+            headers["Retry-After"] = str(retry_after)
+            
         super().__init__(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"{service_name} is currently unavailable",
             error_code="SERVICE_UNAVAILABLE",
-            headers={"X-Error-Code": "SERVICE_UNAVAILABLE"}
+            headers=headers
         )
 
 
@@ -146,4 +150,28 @@ class ValidationException(ScraperException):
             detail=detail,
             error_code=error_code,
             headers={"X-Error-Code": error_code}
-        ) 
\ No newline at end of file
+        ) 
+
+
+class UpstreamTimeoutException(ScraperException):
+    """Exception for upstream calls that ran past their deadline."""
+    
+    def __init__(self, service_name: str, timeout: float):
+        super().__init__(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"{service_name} did not respond within {timeout:g} seconds",
+            error_code="UPSTREAM_TIMEOUT",
+            headers={"X-Error-Code": "UPSTREAM_TIMEOUT"}
+        )
+
+
+class IdempotencyKeyException(ScraperException):
+    """Exception for an Idempotency-Key that cannot be used for this request."""
+    
+    def __init__(self, detail: str, status_code: int = status.HTTP_409_CONFLICT):
+        super().__init__(
+            status_code=status_code,
+            detail=detail,
+            error_code="IDEMPOTENCY_KEY_CONFLICT",
+            headers={"X-Error-Code": "IDEMPOTENCY_KEY_CONFLICT"}
+        )
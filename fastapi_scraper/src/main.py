@@ -4,7 +4,7 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Any
 
-from fastapi import FastAPI, Request, HTTPException, status
+from fastapi import Depends, FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
@@ -15,6 +15,7 @@ from .config import settings
 from .exceptions import ScraperException
 from .models import ErrorResponse, ApiResponse
 from .routers import scraping, health
+from .dependencies import enforce_rate_limit
 
 # Configure logging
 logging.basicConfig(
@@ -46,8 +47,14 @@ async def lifespan(app: FastAPI):
     
     yield
     
-    # Shutdown
+    # Shutdown: let in-flight jobs finish before the worker exits
     logger.info(f"Shutting down {settings.app_name}")
+    try:
+        from .dependencies import get_firecrawl_service, get_state_backend
+        await get_firecrawl_service().drain(settings.shutdown_drain_timeout)
+        get_state_backend().close()
+    except Exception as e:
+        logger.error(f"Failed to drain in-flight jobs: {e}")
 
 
 # Create FastAPI app
@@ -139,7 +146,7 @@ async def scraper_exception_handler(request: Request, exc: ScraperException):
             error=exc.detail,
             error_code=getattr(exc, 'error_code', None),
             timestamp=datetime.utcnow()
-        ).model_dump(),
+        ).model_dump(mode="json"),
         headers=getattr(exc, 'headers', None)
     )
 
@@ -167,7 +174,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             detail=exc.errors(),
             error_code="VALIDATION_ERROR",
             timestamp=datetime.utcnow()
-        ).model_dump()
+        ).model_dump(mode="json")
     )
 
 
@@ -187,7 +194,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             error=exc.detail,
             error_code=f"HTTP_{exc.status_code}",
             timestamp=datetime.utcnow()
-        ).model_dump()
+        ).model_dump(mode="json")
     )
 
 
@@ -211,13 +218,17 @@ async def global_exception_handler(request: Request, exc: Exception):
             error=detail,
             error_code="INTERNAL_ERROR",
             timestamp=datetime.utcnow()
-        ).model_dump()
+        ).model_dump(mode="json")
     )
 
 
 # Include routers
 app.include_router(health.router, prefix=settings.api_prefix)
-app.include_router(scraping.router, prefix=settings.api_prefix)
+app.include_router(
+    scraping.router,
+    prefix=settings.api_prefix,
+    dependencies=[Depends(enforce_rate_limit)]
+)
 
 
 # Root endpoint
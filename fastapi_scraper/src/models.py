@@ -29,6 +29,9 @@ class BatchScrapeRequest(BaseModel):
     formats: List[ScrapeFormat] = Field(default=[ScrapeFormat.MARKDOWN], description="Output formats")
     only_main_content: bool = Field(default=True, description="Extract only main content")
     timeout: int = Field(default=30000, description="Timeout in milliseconds", ge=1000, le=300000)
+    strip_boilerplate: bool = Field(default=False, description="Remove markdown lines repeated across the batch's pages")
+    detect_near_duplicates: bool = Field(default=False, description="Group near-identical pages and mark duplicates of a representative")
+    suppress_near_duplicates: bool = Field(default=False, description="Drop near-duplicate pages from the results (implies detection)")
 
 class CrawlRequest(BaseModel):
     """Request model for crawling a website."""
@@ -39,6 +42,9 @@ class CrawlRequest(BaseModel):
     max_depth: Optional[int] = Field(default=2, description="Maximum crawl depth", ge=1, le=10)
     exclude_paths: Optional[List[str]] = Field(default=None, description="Paths to exclude from crawling")
     include_paths: Optional[List[str]] = Field(default=None, description="Paths to include in crawling")
+    strip_boilerplate: bool = Field(default=False, description="Remove headers, navigation and other markdown repeated across pages")
+    detect_near_duplicates: bool = Field(default=False, description="Group near-identical pages and mark duplicates of a representative")
+    suppress_near_duplicates: bool = Field(default=False, description="Drop near-duplicate pages from the results (implies detection)")
 
 class SearchRequest(BaseModel):
     """Request model for web search."""
@@ -47,6 +53,34 @@ class SearchRequest(BaseModel):
     tbs: Optional[str] = Field(default=None, description="Time-based search filter")
     formats: List[ScrapeFormat] = Field(default=[ScrapeFormat.MARKDOWN], description="Output formats")
 
+class LocalSearchRequest(BaseModel):
+    """Request model for searching previously scraped pages."""
+    query: str = Field(..., description="Search query", min_length=1, max_length=500)
+    limit: int = Field(default=10, description="Number of results to return", ge=1, le=100)
+    include_markdown: bool = Field(default=False, description="Include the full page markdown in results")
+
+class ExtractRequest(BaseModel):
+    """Request model for structured data extraction."""
+    urls: List[str] = Field(..., description="URLs to extract from (wildcards such as https://example.com/* allowed)", min_items=1, max_items=100)
+    prompt: Optional[str] = Field(default=None, description="Extraction prompt", max_length=10000)
+    json_schema: Optional[Dict[str, Any]] = Field(default=None, alias="schema", description="JSON schema of the expected output")
+    enable_web_search: bool = Field(default=False, description="Allow the extractor to follow results from web search")
+    
+    class Config:
+        populate_by_name = True
+    
+    @validator('json_schema', always=True)
+    def validate_prompt_or_schema(cls, v, values):
+        if v is None and not values.get('prompt'):
+            raise ValueError("Either 'prompt' or 'schema' must be provided")
+        return v
+
+class LlmsTextRequest(BaseModel):
+    """Request model for llms.txt generation."""
+    url: HttpUrl = Field(..., description="Site to generate llms.txt for")
+    max_urls: int = Field(default=10, description="Maximum number of pages to include", ge=1, le=100)
+    show_full_text: bool = Field(default=False, description="Also generate llms-full.txt")
+
 class ScrapeMetadata(BaseModel):
     """Metadata from scraping operation."""
     title: Optional[str] = None
@@ -55,6 +89,15 @@ class ScrapeMetadata(BaseModel):
     url: Optional[str] = None
     status_code: Optional[int] = None
     
+class BoilerplateStats(BaseModel):
+    """Size reduction from boilerplate stripping for one page."""
+    bytes_before: int
+    bytes_after: int
+    bytes_removed: int
+    tokens_before: int
+    tokens_after: int
+    tokens_removed: int
+
 class ScrapeResult(BaseModel):
     """Result from scraping operation."""
     url: str
@@ -65,15 +108,20 @@ class ScrapeResult(BaseModel):
     metadata: ScrapeMetadata
     success: bool = True
     error: Optional[str] = None
+    boilerplate: Optional[BoilerplateStats] = None
+    duplicate_of: Optional[str] = None
+    cluster_size: Optional[int] = None
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class BatchScrapeJob(BaseModel):
     """Batch scraping job information."""
     id: str
     status: Literal["pending", "running", "completed", "failed"]
-    total_urls: int
+    total_urls: int = Field(..., description="URLs in the request, duplicates included")
+    unique_urls: int = Field(..., description="Distinct pages after URL canonicalization, each scraped once")
     completed_urls: int = 0
     failed_urls: int = 0
+    duplicate_pages: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
     
@@ -89,6 +137,7 @@ class CrawlJob(BaseModel):
     total_pages: Optional[int] = None
     completed_pages: int = 0
     failed_pages: int = 0
+    duplicate_pages: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
 
@@ -97,6 +146,39 @@ class CrawlStatus(BaseModel):
     job: CrawlJob
     data: Optional[List[ScrapeResult]] = None
 
+class ExtractJob(BaseModel):
+    """Extraction job information."""
+    id: str
+    status: Literal["pending", "processing", "completed", "failed", "cancelled"]
+    total_urls: int
+    schema_hash: Optional[str] = None
+    cached: bool = False
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
+class ExtractStatus(BaseModel):
+    """Status of extraction operation."""
+    job: ExtractJob
+    data: Optional[Any] = None
+    validation_errors: Optional[List[str]] = None
+    error: Optional[str] = None
+
+class LlmsTextJob(BaseModel):
+    """llms.txt generation job information."""
+    id: str
+    status: Literal["pending", "processing", "completed", "failed"]
+    url: str
+    cached: bool = False
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
+class LlmsTextStatus(BaseModel):
+    """Status of llms.txt generation."""
+    job: LlmsTextJob
+    llmstxt: Optional[str] = None
+    llmsfulltxt: Optional[str] = None
+    error: Optional[str] = None
+
 class SearchResult(BaseModel):
     """Single search result."""
     title: str
@@ -104,6 +186,8 @@ class SearchResult(BaseModel):
     description: Optional[str] = None
     markdown: Optional[str] = None
     links: Optional[List[str]] = None
+    snippet: Optional[str] = None
+    score: Optional[float] = None
     
 class SearchResponse(BaseModel):
     """Response from search operation."""
@@ -63,6 +63,31 @@ async def health_check(
         )
 
 
+@router.get(
+    "/upstream",
+    response_model=ApiResponse,
+    summary="Upstream status",
+    description="Circuit breaker, latency and hedging state of the FireCrawl client",
+    response_description="Upstream client state"
+)
+async def upstream_status(
+    firecrawl_service: FireCrawlServiceDep
+) -> ApiResponse:
+    """
+    Report the state of the FireCrawl client without calling FireCrawl.
+    
+    Returns:
+    - Circuit breaker state, consecutive failures and rejected calls
+    - p95 latency per upstream operation
+    - Number of hedged calls
+    """
+    return ApiResponse(
+        success=True,
+        message="Upstream status",
+        data=firecrawl_service.upstream_stats()
+    )
+
+
 @router.get(
     "/ready",
     response_model=ApiResponse,
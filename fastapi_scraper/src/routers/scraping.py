@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, status, BackgroundTasks, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import List
 import logging
 
@@ -7,10 +7,12 @@ from ..models import (
     ScrapeRequest, ScrapeResult, ApiResponse,
     BatchScrapeRequest, BatchScrapeStatus,
     CrawlRequest, CrawlStatus,
-    SearchRequest, SearchResponse,
+    SearchRequest, SearchResponse, LocalSearchRequest,
+    ExtractRequest,
+    LlmsTextRequest,
     ErrorResponse
 )
-from ..dependencies import FireCrawlServiceDep
+from ..dependencies import FireCrawlServiceDep, IdempotencyKeyDep
 from ..exceptions import ScraperException
 
 logger = logging.getLogger(__name__)
@@ -79,7 +81,8 @@ async def scrape_url(
 )
 async def start_batch_scrape(
     request: BatchScrapeRequest,
-    firecrawl_service: FireCrawlServiceDep
+    firecrawl_service: FireCrawlServiceDep,
+    idempotency_key: IdempotencyKeyDep = None
 ) -> ApiResponse:
     """
     Start a batch scraping job for multiple URLs.
@@ -100,7 +103,7 @@ async def start_batch_scrape(
                 detail="Maximum 100 URLs allowed per batch"
             )
         
-        batch_status = await firecrawl_service.batch_scrape_urls(request)
+        batch_status = await firecrawl_service.batch_scrape_urls(request, idempotency_key=idempotency_key)
         
         return ApiResponse(
             success=True,
@@ -171,7 +174,8 @@ async def get_batch_scrape_status(
 )
 async def crawl_website(
     request: CrawlRequest,
-    firecrawl_service: FireCrawlServiceDep
+    firecrawl_service: FireCrawlServiceDep,
+    idempotency_key: IdempotencyKeyDep = None
 ) -> ApiResponse:
     """
     Crawl a website starting from the given URL.
@@ -193,7 +197,7 @@ async def crawl_website(
                 detail="Maximum 1000 pages allowed per crawl"
             )
         
-        crawl_status = await firecrawl_service.crawl_website(request)
+        crawl_status = await firecrawl_service.crawl_website(request, idempotency_key=idempotency_key)
         
         return ApiResponse(
             success=True,
@@ -258,6 +262,245 @@ async def search_web(
         )
 
 
+@router.post(
+    "/local-search",
+    response_model=ApiResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Search scraped pages",
+    description="Full-text search over pages already scraped or crawled by this service, without calling FireCrawl",
+    response_description="Ranked results with highlighted snippets"
+)
+async def local_search(
+    request: LocalSearchRequest,
+    firecrawl_service: FireCrawlServiceDep
+) -> ApiResponse:
+    """
+    Search previously scraped and crawled pages with BM25 ranking.
+    
+    - **query**: The search query (1-500 characters)
+    - **limit**: Number of results to return (default: 10, max: 100)
+    - **include_markdown**: Include full page markdown in the results
+    """
+    try:
+        search_response = await firecrawl_service.local_search(request)
+        
+        return ApiResponse(
+            success=True,
+            message=f"Local search completed - {len(search_response.results)} results found",
+            data=search_response
+        )
+        
+    except ScraperException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error in local search: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred"
+        )
+
+
+@router.post(
+    "/extract",
+    response_model=ApiResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Start extraction job",
+    description="Start an asynchronous structured data extraction job for one or more URLs",
+    response_description="Job information, or the cached result if this extraction was already run"
+)
+async def start_extract(
+    request: ExtractRequest,
+    firecrawl_service: FireCrawlServiceDep,
+    idempotency_key: IdempotencyKeyDep = None
+) -> ApiResponse:
+    """
+    Start an extraction job.
+    
+    - **urls**: URLs to extract from (max 100, wildcards allowed)
+    - **prompt**: Natural language description of what to extract
+    - **schema**: JSON schema the extracted data should follow
+    - **enable_web_search**: Whether the extractor may use web search
+    
+    Identical requests (same URLs, prompt and schema) are answered from cache
+    with an already completed job.
+    """
+    try:
+        logger.info(f"Received extract request for {len(request.urls)} URLs")
+        
+        extract_status = await firecrawl_service.start_extract(request, idempotency_key=idempotency_key)
+        
+        message = "Extraction job started successfully"
+        if extract_status.job.cached:
+            message = "Extraction answered from cache"
+        
+        return ApiResponse(
+            success=True,
+            message=message,
+            data=extract_status
+        )
+        
+    except ScraperException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error starting extract: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred"
+        )
+
+
+@router.get(
+    "/extract/{job_id}/status",
+    response_model=ApiResponse,
+    summary="Get extraction job status",
+    description="Get the current status and results of an extraction job",
+    response_description="Job status and extracted data if completed"
+)
+async def get_extract_status(
+    job_id: str,
+    firecrawl_service: FireCrawlServiceDep
+) -> ApiResponse:
+    """
+    Get the status of an extraction job.
+    
+    - **job_id**: The ID of the extraction job
+    
+    Returns job status, and the extracted data validated against the request
+    schema once completed.
+    """
+    try:
+        logger.info(f"Getting extract status for job: {job_id}")
+        
+        extract_status = await firecrawl_service.get_extract_status(job_id)
+        
+        message = f"Job status: {extract_status.job.status}"
+        if extract_status.validation_errors:
+            message += f" - {len(extract_status.validation_errors)} schema validation errors"
+        
+        return ApiResponse(
+            success=True,
+            message=message,
+            data=extract_status
+        )
+        
+    except ScraperException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error getting extract status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred"
+        )
+
+
+@router.post(
+    "/llms-text",
+    response_model=ApiResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Start llms.txt generation",
+    description="Start generating llms.txt (and optionally llms-full.txt) for a site as a background job",
+    response_description="Job information, or the cached result for recently generated sites"
+)
+async def start_llms_text(
+    request: LlmsTextRequest,
+    firecrawl_service: FireCrawlServiceDep
+) -> ApiResponse:
+    """
+    Start an llms.txt generation job.
+    
+    - **url**: The site to generate llms.txt for
+    - **max_urls**: Maximum number of pages to include (default: 10, max: 100)
+    - **show_full_text**: Also generate llms-full.txt
+    
+    Progress is tracked in the background; use the status or stream endpoints
+    to follow it.
+    """
+    try:
+        logger.info(f"Received llms.txt request for URL: {request.url}")
+        
+        llms_status = await firecrawl_service.start_llms_text(request)
+        
+        message = "llms.txt generation started successfully"
+        if llms_status.job.cached:
+            message = "llms.txt answered from cache"
+        
+        return ApiResponse(
+            success=True,
+            message=message,
+            data=llms_status
+        )
+        
+    except ScraperException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error starting llms.txt generation: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred"
+        )
+
+
+@router.get(
+    "/llms-text/{job_id}/status",
+    response_model=ApiResponse,
+    summary="Get llms.txt job status",
+    description="Get the current status and generated text of an llms.txt job",
+    response_description="Job status and generated text so far"
+)
+async def get_llms_text_status(
+    job_id: str,
+    firecrawl_service: FireCrawlServiceDep
+) -> ApiResponse:
+    """
+    Get the status of an llms.txt generation job.
+    
+    - **job_id**: The ID of the llms.txt job
+    """
+    try:
+        llms_status = await firecrawl_service.get_llms_text_status(job_id)
+        
+        return ApiResponse(
+            success=True,
+            message=f"Job status: {llms_status.job.status}",
+            data=llms_status
+        )
+        
+    except ScraperException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error getting llms.txt status: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred"
+        )
+
+
+@router.get(
+    "/llms-text/{job_id}/stream",
+    summary="Stream llms.txt output",
+    description="Stream the generated llms.txt as plain text while it is being generated",
+    response_description="Generated text, streamed as it becomes available"
+)
+async def stream_llms_text(
+    job_id: str,
+    firecrawl_service: FireCrawlServiceDep,
+    full_text: bool = False
+) -> StreamingResponse:
+    """
+    Stream generated llms.txt content.
+    
+    - **job_id**: The ID of the llms.txt job
+    - **full_text**: Stream llms-full.txt instead of llms.txt
+    """
+    # Resolve the job before streaming so unknown IDs still produce a 404
+    await firecrawl_service.get_llms_text_status(job_id)
+    
+    return StreamingResponse(
+        firecrawl_service.stream_llms_text(job_id, full_text=full_text),
+        media_type="text/plain; charset=utf-8"
+    )
+
+
 @router.get(
     "/formats",
     response_model=ApiResponse,
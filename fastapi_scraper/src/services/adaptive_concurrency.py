@@ -0,0 +1,172 @@
+"""
+Adaptive concurrency for upstream calls (additive increase, multiplicative decrease).
+
+Batch and crawl traffic fired at FireCrawl without a bound runs into its rate
+limits, and every call beyond what it can take comes back as a 429. The
+limiter caps calls in flight and finds the cap from the upstream's own
+signals, the way TCP finds a congestion window: each healthy call grows the
+limit by about one per round of calls, and a 429, a 5xx or a latency spike
+cuts it by a factor. A ``Retry-After`` from the upstream pauses new calls
+until it expires.
+"""
+
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Optional
+
+from .circuit_breaker import status_code_of
+
+
+def retry_after_of(exc: BaseException) -> Optional[float]:
+    """Seconds from an upstream error's ``Retry-After`` header, if it has one."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_congestion(exc: BaseException) -> bool:
+    """Whether an error means the upstream is overloaded: 429, 5xx, or no response at all."""
+    code = status_code_of(exc)
+    return code is None or code == 429 or code >= 500
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on concurrent upstream calls.
+
+    Only calls started after the last decrease can trigger another one, so a
+    burst of 429s from calls that were already in flight counts as a single
+    congestion event.
+
+    Args:
+        initial_limit: Calls allowed in flight at start
+        min_limit: Lower bound for the limit
+        max_limit: Upper bound for the limit
+        increase: Growth of the limit per round of healthy calls
+        decrease: Factor applied to the limit on congestion
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        increase: float = 1.0,
+        decrease: float = 0.5
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.paused_until = 0.0
+        self.decreases = 0
+        self.throttled = 0
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def _available(self) -> bool:
+        return self.in_flight < int(self.limit) and time.monotonic() >= self.paused_until
+
+    def has_capacity(self) -> bool:
+        """Whether a call would get a slot without waiting."""
+        return not self._waiters and self._available()
+
+    def _wake(self) -> None:
+        """Wake as many waiters, oldest first, as there are free slots."""
+        free = int(self.limit) - self.in_flight
+        while self._waiters and free > 0:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def acquire(self) -> float:
+        """
+        Wait for a free slot.
+
+        Returns:
+            Monotonic start time, to pass back to ``release``
+        """
+        while self._waiters or not self._available():
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            pause = self.paused_until - time.monotonic()
+            try:
+                await asyncio.wait_for(waiter, timeout=pause if pause > 0 else None)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                # A slot handed to a cancelled waiter goes to the next one
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if self._available():
+                break
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self._wake()
+        return time.monotonic()
+
+    def release(self, started: float, congested: bool = False, retry_after: Optional[float] = None) -> None:
+        """
+        Free a slot and adjust the limit from the call's outcome.
+
+        Args:
+            started: Value returned by the matching ``acquire``
+            congested: The call was throttled, failed upstream or was much
+                slower than usual
+            retry_after: Seconds the upstream asked us to hold off
+        """
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        if retry_after:
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        if congested:
+            if started >= self._last_decrease:
+                self.limit = max(float(self.min_limit), self.limit * self.decrease)
+                self.decreases += 1
+                self._last_decrease = time.monotonic()
+        elif saturated:
+            # Only grow a limit that is actually being used
+            self.limit = min(float(self.max_limit), self.limit + self.increase / self.limit)
+        if retry_after:
+            # Waiters re-check and sleep out the pause
+            for waiter in self._waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+            self._waiters.clear()
+        else:
+            self._wake()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "waiting": len(self._waiters),
+            "paused_for": round(max(0.0, self.paused_until - time.monotonic()), 1),
+            "decreases": self.decreases,
+            "throttled": self.throttled,
+        }
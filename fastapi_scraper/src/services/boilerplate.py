@@ -0,0 +1,163 @@
+"""
+Site-level boilerplate stripping for crawled markdown.
+
+Pages from one site repeat the same header, logo images, navigation and
+footer. The detector learns which lines and blocks of consecutive lines
+recur across a large share of a crawl's pages and removes them, keeping
+only page-specific content.
+"""
+
+from collections import Counter
+from typing import List, NamedTuple, Optional, Sequence, Set, Tuple
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English markdown)."""
+    return (len(text) + 3) // 4
+
+
+class StripStats(NamedTuple):
+    bytes_before: int
+    bytes_after: int
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def bytes_removed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+    @property
+    def tokens_removed(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class BoilerplateDetector:
+    """
+    Learn repeated lines and line shingles across pages, then strip them.
+
+    A line is treated as boilerplate when it falls inside a block of
+    ``block_size`` consecutive lines that appears on enough pages, or when the
+    line on its own appears on enough pages and is at least
+    ``min_line_chars`` long. Short lines such as code fences or "---" are
+    therefore only removed as part of a repeated block.
+
+    Args:
+        min_fraction: Share of pages a line or block must appear on
+        min_pages: Absolute minimum number of pages, so small crawls are
+            left alone
+        block_size: Number of consecutive lines per shingle
+        min_line_chars: Minimum length of a repeated standalone line
+    """
+
+    def __init__(
+        self,
+        min_fraction: float = 0.5,
+        min_pages: int = 3,
+        block_size: int = 3,
+        min_line_chars: int = 20,
+    ):
+        self.min_fraction = min_fraction
+        self.min_pages = min_pages
+        self.block_size = block_size
+        self.min_line_chars = min_line_chars
+        self._line_counts: Counter = Counter()
+        self._block_counts: Counter = Counter()
+        self.pages_seen = 0
+        self._boilerplate_lines: Optional[Set[int]] = None
+        self._boilerplate_blocks: Optional[Set[int]] = None
+
+    def _blocks(self, hashes: Sequence[int]) -> List[int]:
+        """Hashes of every run of ``block_size`` consecutive lines."""
+        columns = [hashes[offset:] for offset in range(self.block_size)]
+        return list(map(hash, zip(*columns)))
+
+    def learn(self, markdown: str) -> None:
+        """Count the lines and blocks of one page (each at most once per page)."""
+        hashes = [hash(line) for line in map(str.strip, markdown.splitlines()) if line]
+        self._line_counts.update(set(hashes))
+        self._block_counts.update(set(self._blocks(hashes)))
+        self.pages_seen += 1
+        self._boilerplate_lines = None
+        self._boilerplate_blocks = None
+
+    def learn_all(self, pages: Sequence[str]) -> "BoilerplateDetector":
+        for markdown in pages:
+            self.learn(markdown)
+        return self
+
+    def _threshold(self) -> int:
+        return max(self.min_pages, int(self.min_fraction * self.pages_seen + 0.5))
+
+    def _prepare(self) -> None:
+        if self._boilerplate_lines is not None:
+            return
+        threshold = self._threshold()
+        self._boilerplate_lines = {h for h, count in self._line_counts.items() if count >= threshold}
+        self._boilerplate_blocks = {h for h, count in self._block_counts.items() if count >= threshold}
+
+    def strip(self, markdown: str) -> Tuple[str, StripStats]:
+        """Remove learned boilerplate from a page and report the savings."""
+        self._prepare()
+        if self.pages_seen < self.min_pages or not markdown:
+            size, tokens = len(markdown.encode("utf-8")), estimate_tokens(markdown)
+            return markdown, StripStats(size, size, tokens, tokens)
+
+        raw_lines = markdown.splitlines()
+        # Positions of the non-blank lines within raw_lines
+        positions = []
+        lines = []
+        for index, line in enumerate(map(str.strip, raw_lines)):
+            if line:
+                positions.append(index)
+                lines.append(line)
+        hashes = list(map(hash, lines))
+
+        remove: Set[int] = set()
+        boilerplate_lines = self._boilerplate_lines
+        min_chars = self.min_line_chars
+        for i, h in enumerate(hashes):
+            if h in boilerplate_lines and len(lines[i]) >= min_chars:
+                remove.add(positions[i])
+
+        boilerplate_blocks = self._boilerplate_blocks
+        if boilerplate_blocks:
+            size = self.block_size
+            for i, block in enumerate(self._blocks(hashes)):
+                if block in boilerplate_blocks:
+                    remove.update(positions[i:i + size])
+
+        if remove:
+            # Drop removed lines and collapse the blank runs they leave behind
+            kept = []
+            previous_blank = True
+            for index, line in enumerate(raw_lines):
+                if index in remove:
+                    continue
+                blank = not line or line.isspace()
+                if not (blank and previous_blank):
+                    kept.append(line)
+                previous_blank = blank
+            if kept and previous_blank:
+                kept.pop()
+            stripped_markdown = "\n".join(kept)
+        else:
+            stripped_markdown = markdown
+
+        stats = StripStats(
+            bytes_before=len(markdown.encode("utf-8")),
+            bytes_after=len(stripped_markdown.encode("utf-8")),
+            tokens_before=estimate_tokens(markdown),
+            tokens_after=estimate_tokens(stripped_markdown),
+        )
+        return stripped_markdown, stats
+
+
+def strip_boilerplate(pages: Sequence[Optional[str]], **kwargs) -> List[Tuple[Optional[str], Optional[StripStats]]]:
+    """
+    Learn boilerplate from a set of pages and strip it from each of them.
+
+    Pages without markdown are passed through with no stats.
+    """
+    detector = BoilerplateDetector(**kwargs)
+    detector.learn_all([markdown for markdown in pages if markdown])
+    return [detector.strip(markdown) if markdown else (markdown, None) for markdown in pages]
@@ -0,0 +1,188 @@
+"""
+Failure isolation for upstream calls: a circuit breaker and hedged requests.
+
+When FireCrawl degrades, every call otherwise waits out its full timeout and
+holds an executor thread, until the whole service stalls. The breaker counts
+consecutive upstream failures; past a threshold it opens and calls fail
+immediately. After ``recovery_timeout`` it lets a few probe calls through
+(half-open) and closes again once a probe succeeds.
+
+Hedging trims tail latency for idempotent calls: if the first attempt has
+not answered by the observed p95 latency, a second attempt starts and the
+first response wins.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open, retry in {retry_after:.0f}s")
+
+
+def status_code_of(exc: BaseException) -> Optional[int]:
+    """HTTP status of an upstream error, if it carries one."""
+    response = getattr(exc, "response", None)
+    code = getattr(response, "status_code", None) or getattr(exc, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Whether an error says the upstream is unhealthy.
+
+    Timeouts, connection errors and 5xx responses count. Client errors (4xx)
+    and rate limiting (429) mean the upstream answered, so they do not.
+    """
+    code = status_code_of(exc)
+    if code is not None:
+        return code >= 500
+    return True
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds the circuit stays open before probing
+        half_open_max_calls: Probe calls allowed at once while half-open
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Reserve a call, or raise CircuitOpenError if none is allowed."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(remaining)
+                self.state = HALF_OPEN
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(1.0)
+                self._probes += 1
+
+    def retry_after(self) -> float:
+        """Seconds until a call would be allowed, 0 if one is allowed now."""
+        with self._lock:
+            if self.state == OPEN:
+                return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+            if self.state == HALF_OPEN and self._probes >= self.half_open_max_calls:
+                return 1.0
+            return 0.0
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+
+    def record_cancelled(self) -> None:
+        """Give back a probe slot when a call is abandoned without an outcome."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_after = 0.0
+            if self.state == OPEN:
+                retry_after = max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+                "retry_after": round(retry_after, 1),
+            }
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookup."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+async def hedged(start: Callable[[], Awaitable[T]], delay: Optional[float]) -> T:
+    """
+    Run ``start()``; if it has not finished after ``delay`` seconds, run it
+    again and return whichever attempt succeeds first.
+
+    The losing attempt is cancelled. An attempt already running in an
+    executor thread cannot be interrupted; its result is discarded.
+
+    Args:
+        start: Starts one attempt
+        delay: Seconds before hedging, or None to never hedge
+    """
+    attempts = {asyncio.ensure_future(start())}
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        if not done:
+            attempts.add(asyncio.ensure_future(start()))
+
+        error: BaseException = asyncio.CancelledError()
+        while attempts:
+            done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.cancelled():
+                    continue
+                if attempt.exception() is None:
+                    return attempt.result()
+                error = attempt.exception()
+        raise error
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
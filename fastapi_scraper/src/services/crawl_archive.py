@@ -0,0 +1,272 @@
+"""
+Streaming crawl archives.
+
+A crawl archive is a JSON Lines file with one page per line, framed by a
+header line and an optional summary line:
+
+    {"_archive": "firecrawl-crawl", "version": 1, ...crawl metadata}
+    {"url": ..., "markdown": ..., "html": ..., "metadata": {...}}
+    ...
+    {"_archive_summary": {"pages": 10, "status": "completed", ...}}
+
+Pages are written as they arrive and read back one at a time, so neither
+side ever holds a whole crawl in memory. The single-document
+``crawl_result.json`` layout written by ``model_dump_json()`` can be
+imported with an incremental parser.
+
+Only the standard library is used, so the example scripts can share it.
+"""
+
+import json
+import os
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Tuple
+
+ARCHIVE_FORMAT = "firecrawl-crawl"
+ARCHIVE_VERSION = 1
+
+_HEADER_KEY = "_archive"
+_SUMMARY_KEY = "_archive_summary"
+
+
+def _to_dict(page: Any) -> Dict[str, Any]:
+    if isinstance(page, dict):
+        return page
+    if hasattr(page, "model_dump"):
+        return page.model_dump(mode="json")
+    raise TypeError(f"Cannot archive page of type {type(page).__name__}")
+
+
+class CrawlArchiveWriter:
+    """
+    Incremental writer for crawl archives.
+
+    Usage:
+        with CrawlArchiveWriter("crawl_result.jsonl", {"url": url}) as archive:
+            for page in pages:
+                archive.write_page(page)
+    """
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None, flush_every: int = 50):
+        self.path = path
+        self.flush_every = flush_every
+        self.pages_written = 0
+        self._file: IO[str] = open(path, "w", encoding="utf-8")
+        header = {_HEADER_KEY: ARCHIVE_FORMAT, "version": ARCHIVE_VERSION, **(metadata or {})}
+        self._write_line(header)
+
+    def _write_line(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+
+    def write_page(self, page: Any) -> None:
+        """Append a single page (dict or pydantic model)."""
+        self._write_line(_to_dict(page))
+        self.pages_written += 1
+        if self.pages_written % self.flush_every == 0:
+            self._file.flush()
+
+    def write_pages(self, pages: Iterable[Any]) -> int:
+        """Append pages from an iterable and return how many were written."""
+        count = 0
+        for page in pages:
+            self.write_page(page)
+            count += 1
+        return count
+
+    def close(self, summary: Optional[Dict[str, Any]] = None) -> None:
+        """Write the summary line and close the file."""
+        if self._file.closed:
+            return
+        self._write_line({_SUMMARY_KEY: {"pages": self.pages_written, **(summary or {})}})
+        self._file.close()
+
+    def __enter__(self) -> "CrawlArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def iter_pages(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yield the pages of a crawl archive, one at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if _HEADER_KEY in record or _SUMMARY_KEY in record:
+                continue
+            yield record
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Return the header metadata of a crawl archive."""
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    if header.get(_HEADER_KEY) != ARCHIVE_FORMAT:
+        raise ValueError(f"{path} is not a crawl archive")
+    return header
+
+
+def read_summary(path: str, tail_bytes: int = 65536) -> Optional[Dict[str, Any]]:
+    """
+    Return the summary line of a crawl archive without reading its pages.
+
+    Returns None for archives that were not closed cleanly.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - tail_bytes))
+        tail = f.read().decode("utf-8", errors="replace")
+
+    last_line = tail.rstrip("\n").rsplit("\n", 1)[-1]
+    try:
+        record = json.loads(last_line)
+    except ValueError:
+        return None
+    return record.get(_SUMMARY_KEY) if isinstance(record, dict) else None
+
+
+class _IncrementalJSONReader:
+    """
+    Pull JSON values one at a time out of a large document.
+
+    Holds only the unconsumed part of the input in memory; the buffer grows
+    only as far as the largest single value being decoded.
+    """
+
+    def __init__(self, f: IO[str], chunk_size: int = 1 << 20):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, min_size: int) -> bool:
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        chunk = self._f.read(max(self._chunk_size, min_size))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character, or '' at end of input."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill(0):
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        wanted = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Most likely the value is cut off at the end of the buffer
+                if not self._fill(wanted):
+                    raise
+                wanted *= 2
+                continue
+            if end == len(self._buf) and not self._eof and self._buf[self._pos] not in "{[\"":
+                # A bare number may continue in the next chunk
+                if self._fill(0):
+                    continue
+            self._pos = end
+            return value
+
+
+def iter_json_document(path: str, array_key: str = "data") -> Iterator[Tuple[str, Any]]:
+    """
+    Incrementally walk a single-document crawl result.
+
+    Yields ``("field", (key, value))`` for top-level fields and
+    ``("item", value)`` for every element of the ``array_key`` array, in
+    document order.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _IncrementalJSONReader(f)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            key = reader.value()
+            reader.expect(":")
+
+            if key == array_key and reader.peek() == "[":
+                reader.expect("[")
+                if reader.peek() == "]":
+                    reader.expect("]")
+                else:
+                    while True:
+                        yield "item", reader.value()
+                        if reader.peek() == ",":
+                            reader.expect(",")
+                            continue
+                        reader.expect("]")
+                        break
+            else:
+                yield "field", (key, reader.value())
+
+            if reader.peek() == ",":
+                reader.expect(",")
+                continue
+            reader.expect("}")
+            return
+
+
+def iter_crawl_json_pages(path: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yield pages from a ``crawl_result.json``-style document."""
+    for kind, value in iter_json_document(path):
+        if kind == "item":
+            yield value
+
+
+def import_crawl_json(json_path: str, archive_path: str) -> int:
+    """
+    Convert a ``crawl_result.json``-style document into a crawl archive.
+
+    Top-level fields that appear before the page array go into the header,
+    the rest into the summary. Returns the number of pages imported.
+    """
+    metadata: Dict[str, Any] = {}
+    summary: Dict[str, Any] = {}
+    writer: Optional[CrawlArchiveWriter] = None
+
+    try:
+        for kind, value in iter_json_document(json_path):
+            if kind == "field":
+                key, field_value = value
+                (summary if writer else metadata)[key] = field_value
+                continue
+            if writer is None:
+                writer = CrawlArchiveWriter(archive_path, metadata)
+            writer.write_page(value)
+
+        if writer is None:
+            writer = CrawlArchiveWriter(archive_path, metadata)
+        pages = writer.pages_written
+        writer.close(summary)
+        return pages
+    finally:
+        if writer is not None:
+            writer.close()
@@ -0,0 +1,173 @@
+"""
+Domain-aware scheduling of batch scrape submissions.
+
+Large URL lists are usually dominated by a few sites. Submitted in list order,
+a batch hits each of those sites with a burst of requests, which gets the
+scrapes blocked and holds up the whole batch. The scheduler groups URLs by
+registrable domain and interleaves the domains round-robin. When a domain
+has more URLs than its cap, the batch is split into waves, each with at most
+``cap`` URLs per domain.
+
+Caps adapt to how each site responds. A wave with a blocked response (403,
+429, 503) halves the domain's cap. A clean wave raises it by one, up to the
+configured maximum. A domain whose waves take longer than ``slow_latency``
+gets half its cap; only waves that held the domain alone are timed, since a
+shared wave's time says nothing about which of its sites was slow. Stats are kept across batches, so the next batch for a
+site that pushed back starts out gentle.
+"""
+
+import ipaddress
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlsplit
+
+# Second-level labels under country TLDs that are public suffixes (co.uk, com.au, ...)
+_SECOND_LEVEL_SUFFIXES = frozenset({"ac", "co", "com", "edu", "gov", "gv", "mil", "ne", "net", "or", "org"})
+
+# Target-site responses that mean "slow down"
+BLOCKED_STATUSES = frozenset({403, 429, 503})
+
+
+def registrable_domain(url: str) -> str:
+    """
+    Registrable domain of a URL: ``docs.example.co.uk`` -> ``example.co.uk``.
+
+    An approximation of the public suffix list that covers generic TLDs and
+    the common ``co.uk``-style suffixes. IP addresses are returned as-is.
+    """
+    host = (urlsplit(url).hostname or "").lower().rstrip(".")
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_SUFFIXES:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class DomainStats:
+    """Outcomes and the current per-wave cap for one domain."""
+
+    __slots__ = ("cap", "scraped", "failed", "blocked", "latency")
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.scraped = 0
+        self.failed = 0
+        self.blocked = 0
+        self.latency: Optional[float] = None
+
+
+class DomainScheduler:
+    """
+    Orders batch URLs by domain and caps each domain's share of a wave.
+
+    Args:
+        max_per_domain: URLs per domain in one wave while the domain is healthy
+        slow_latency: Seconds per wave above which a domain counts as slow
+        max_domains: Domains whose stats are remembered, least recently used first out
+    """
+
+    def __init__(self, max_per_domain: int = 5, slow_latency: float = 30.0, max_domains: int = 10000):
+        self.max_per_domain = max(1, max_per_domain)
+        self.slow_latency = slow_latency
+        self.max_domains = max_domains
+        self._stats: "OrderedDict[str, DomainStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _domain_stats(self, domain: str) -> DomainStats:
+        stats = self._stats.get(domain)
+        if stats is None:
+            stats = self._stats[domain] = DomainStats(self.max_per_domain)
+            while len(self._stats) > self.max_domains:
+                self._stats.popitem(last=False)
+        self._stats.move_to_end(domain)
+        return stats
+
+    def cap(self, domain: str) -> int:
+        """URLs of ``domain`` allowed in the next wave."""
+        with self._lock:
+            stats = self._domain_stats(domain)
+            if stats.latency is not None and stats.latency > self.slow_latency:
+                return max(1, stats.cap // 2)
+            return stats.cap
+
+    @staticmethod
+    def group(urls: List[str]) -> "OrderedDict[str, Deque[str]]":
+        """Queue URLs per registrable domain, domains in order of first appearance."""
+        queues: "OrderedDict[str, Deque[str]]" = OrderedDict()
+        for url in urls:
+            queues.setdefault(registrable_domain(url), deque()).append(url)
+        return queues
+
+    def fits_one_wave(self, queues: Dict[str, Deque[str]]) -> bool:
+        return all(len(queue) <= self.cap(domain) for domain, queue in queues.items())
+
+    def next_wave(self, queues: "OrderedDict[str, Deque[str]]") -> List[str]:
+        """
+        Take the next wave off ``queues``, interleaving domains round-robin.
+
+        Domains whose queues run empty are removed from ``queues``.
+
+        Returns:
+            URLs for one upstream batch, at most ``cap`` per domain
+        """
+        caps = {domain: self.cap(domain) for domain in queues}
+        wave: List[str] = []
+        for turn in range(max(caps.values(), default=0)):
+            for domain, queue in queues.items():
+                if queue and turn < caps[domain]:
+                    wave.append(queue.popleft())
+        for domain in [domain for domain, queue in queues.items() if not queue]:
+            del queues[domain]
+        return wave
+
+    def record_wave(self, outcomes: Dict[str, Optional[int]], elapsed: Optional[float]) -> None:
+        """
+        Feed a finished wave back into the domain caps.
+
+        Args:
+            outcomes: Target-site status code per URL in the wave, None for
+                URLs that returned no result
+            elapsed: Seconds the wave took. It only says how slow a domain is
+                when the wave held that domain alone, so it is ignored for
+                waves shared by several domains
+        """
+        by_domain: Dict[str, List[Optional[int]]] = {}
+        for url, status_code in outcomes.items():
+            by_domain.setdefault(registrable_domain(url), []).append(status_code)
+        if len(by_domain) > 1:
+            elapsed = None
+
+        with self._lock:
+            for domain, codes in by_domain.items():
+                stats = self._domain_stats(domain)
+                blocked = sum(1 for code in codes if code in BLOCKED_STATUSES)
+                failed = sum(1 for code in codes if code is None or code >= 400)
+                stats.scraped += len(codes) - failed
+                stats.failed += failed
+                stats.blocked += blocked
+                if elapsed is not None:
+                    stats.latency = elapsed if stats.latency is None else 0.7 * stats.latency + 0.3 * elapsed
+                if blocked:
+                    stats.cap = max(1, stats.cap // 2)
+                elif not failed:
+                    stats.cap = min(self.max_per_domain, stats.cap + 1)
+
+    def snapshot(self, limit: int = 20) -> Dict[str, Any]:
+        """Stats of the most recently scheduled domains."""
+        with self._lock:
+            recent = list(self._stats.items())[-limit:]
+        return {
+            domain: {
+                "cap": stats.cap,
+                "scraped": stats.scraped,
+                "failed": stats.failed,
+                "blocked": stats.blocked,
+                "wave_latency": round(stats.latency, 2) if stats.latency is not None else None,
+            }
+            for domain, stats in reversed(recent)
+        }
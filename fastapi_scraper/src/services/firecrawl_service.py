@@ -1,50 +1,419 @@
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import math
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Tuple, TypeVar
+from collections import Counter, OrderedDict
 from datetime import datetime
 import uuid
 from firecrawl import FirecrawlApp, ScrapeOptions
+from pydantic import BaseModel
 
 from ..models import (
-    ScrapeRequest, ScrapeResult, ScrapeMetadata,
+    ScrapeRequest, ScrapeResult, ScrapeMetadata, BoilerplateStats,
     BatchScrapeRequest, BatchScrapeStatus, BatchScrapeJob,
     CrawlRequest, CrawlStatus, CrawlJob,
-    SearchRequest, SearchResponse, SearchResult,
+    SearchRequest, SearchResponse, SearchResult, LocalSearchRequest,
+    ExtractRequest, ExtractStatus, ExtractJob,
+    LlmsTextRequest, LlmsTextStatus, LlmsTextJob,
     ScrapeFormat
 )
 from ..exceptions import (
-    FireCrawlException, InvalidURLException, JobNotFoundException,
-    JobTimeoutException, ServiceUnavailableException, ConfigurationException
+    ScraperException, FireCrawlException, InvalidURLException, JobNotFoundException,
+    JobTimeoutException, ServiceUnavailableException, ConfigurationException,
+    RateLimitExceededException, UpstreamTimeoutException
 )
 from ..config import settings
+from .url_canonicalizer import UrlCanonicalizer, create_url_canonicalizer
+from .cache import TTLCache
+from .state_store import StateBackend
+from .circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, LatencyTracker, hedged, status_code_of
+)
+from .adaptive_concurrency import AdaptiveLimiter, is_congestion, retry_after_of
+from .retry import RetryPolicy, may_have_acted, retry_call
+from .idempotency import IdempotencyKeys, fingerprint
+from .domain_scheduler import DomainScheduler
+from .upstream_pool import Endpoint, UpstreamPool, endpoint_name, is_endpoint_failure
+from .schema_cache import SchemaCache
+from .search_index import SearchIndex
+from .boilerplate import BoilerplateDetector
+from .near_duplicates import SimHasher, NearDuplicateIndex, cluster_signatures
+from .job_waiter import (
+    Job, JobFailedError, JobWaitTimeoutError, wait_for, batch_scrape_job, crawl_job, llms_text_job
+)
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 class FireCrawlService:
     """Service layer for FireCrawl operations."""
     
-    def __init__(self, api_key: str):
-        """Initialize FireCrawl service."""
+    # Calls of an operation observed before its latency counts as a baseline
+    LATENCY_BASELINE_SAMPLES = 20
+    
+    def __init__(
+        self,
+        api_key: str,
+        canonicalizer: Optional[UrlCanonicalizer] = None,
+        state: Optional[StateBackend] = None,
+        endpoints: Optional[List[Tuple[Optional[str], Optional[str]]]] = None
+    ):
+        """
+        Initialize FireCrawl service.
+        
+        Args:
+            api_key: API key for the default endpoint
+            canonicalizer: URL canonicalizer
+            state: Shared state backend
+            endpoints: (base URL, API key) pairs to spread calls over; defaults
+                to ``api_key`` on ``firecrawl_base_url``
+        """
         try:
-            self.app = FirecrawlApp(api_key=api_key)
-            self._job_storage: Dict[str, Any] = {}  # In-memory storage for jobs
+            # Jobs and result caches live in the state backend, so every worker sees them
+            self.state = state or StateBackend()
+            self._job_storage = self.state.jobs
+            self._in_flight: set = set()
+            self._background_tasks: set = set()
+            self.upstream_pool = UpstreamPool(
+                [
+                    self._create_endpoint(index, base_url, endpoint_key)
+                    for index, (base_url, endpoint_key) in enumerate(
+                        endpoints or [(settings.firecrawl_base_url, api_key)]
+                    )
+                ],
+                job_endpoints=self.state.cache(
+                    "job_endpoints", max_entries=100000, ttl=settings.job_retention
+                )
+            )
+            self.app = self.upstream_pool.endpoints[0].app
+            self.retry_policy = RetryPolicy(
+                max_attempts=settings.retry_max_attempts,
+                base_delay=settings.retry_base_delay,
+                max_delay=settings.retry_max_delay,
+                deadline=settings.upstream_call_deadline or None
+            )
+            self.retried_calls = 0
+            self._latencies: Dict[str, LatencyTracker] = {}
+            self.idempotency_keys = IdempotencyKeys(
+                self.state.cache("idempotency", max_entries=100000, ttl=settings.idempotency_key_ttl),
+                ttl=settings.idempotency_key_ttl,
+                pending_ttl=settings.upstream_call_deadline + 60
+            )
+            self._hedge_tokens = 0.0
+            self.hedged_calls = 0
+            self.canonicalizer = canonicalizer or UrlCanonicalizer()
+            self.schema_cache = SchemaCache(max_entries=settings.schema_cache_max_entries)
+            self.search_index = SearchIndex()
+            self.domain_scheduler = DomainScheduler(
+                max_per_domain=settings.batch_domain_concurrency,
+                slow_latency=settings.batch_domain_slow_latency
+            )
+            self.near_duplicates = NearDuplicateIndex(
+                max_distance=settings.near_duplicate_max_distance,
+                max_entries=settings.near_duplicate_index_size
+            )
+            self._extract_cache: TTLCache[Any] = self.state.cache(
+                "extract",
+                max_entries=settings.extract_cache_max_entries,
+                ttl=settings.extract_cache_ttl
+            )
+            self._llms_text_cache: TTLCache[Dict[str, Optional[str]]] = self.state.cache(
+                "llms_text",
+                max_entries=256,
+                ttl=settings.llms_text_cache_ttl
+            )
             logger.info("FireCrawl service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize FireCrawl service: {e}")
             raise ConfigurationException(f"Failed to initialize FireCrawl: {str(e)}")
     
+    @staticmethod
+    def _create_endpoint(index: int, base_url: Optional[str], api_key: Optional[str]) -> Endpoint:
+        """An upstream endpoint with its own circuit breaker and concurrency limit."""
+        return Endpoint(
+            endpoint_name(base_url, index),
+            FirecrawlApp(api_key=api_key, api_url=base_url),
+            CircuitBreaker(
+                failure_threshold=settings.circuit_breaker_failure_threshold,
+                recovery_timeout=settings.circuit_breaker_recovery_timeout,
+                half_open_max_calls=settings.circuit_breaker_half_open_calls
+            ),
+            AdaptiveLimiter(
+                initial_limit=settings.upstream_concurrency_initial,
+                min_limit=settings.upstream_concurrency_min,
+                max_limit=settings.upstream_concurrency_max,
+                increase=settings.upstream_concurrency_increase,
+                decrease=settings.upstream_concurrency_decrease
+            )
+        )
+    
     async def health_check(self) -> bool:
         """Check if FireCrawl service is healthy."""
         try:
             # Try a simple scrape to test connectivity
-            await self.scrape_single_url(ScrapeRequest(url="https://example.com"))
+            await self.scrape_single_url(ScrapeRequest(url="https://example.com"), index=False)
             return True
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return False
     
-    async def scrape_single_url(self, request: ScrapeRequest) -> ScrapeResult:
+    async def _call_upstream(
+        self,
+        operation: str,
+        call: Callable[[FirecrawlApp], T],
+        hedge: bool = False,
+        idempotent: bool = True,
+        job_id: Optional[str] = None,
+        starts_job: bool = False
+    ) -> T:
+        """
+        Run a blocking FireCrawl SDK call on an endpoint of the upstream pool,
+        retrying transient errors.
+        
+        Every upstream call goes through here. The call goes to the least
+        loaded healthy endpoint and waits for a slot under that endpoint's
+        adaptive concurrency limit; its outcome feeds the endpoint's circuit
+        breaker and limit. When every endpoint's circuit is open this fails
+        fast with ServiceUnavailableException instead of tying up an executor
+        thread until the call times out. Transient errors are retried with
+        backoff until ``upstream_call_deadline``, on another endpoint when
+        there is one; calls that start jobs are only retried when upstream
+        refused them. An upstream 429 is raised as RateLimitExceededException,
+        and a call past its deadline as UpstreamTimeoutException.
+        
+        Args:
+            operation: Name of the call, for latency tracking
+            call: The blocking SDK call, given the chosen endpoint's client
+            hedge: The call is idempotent and may be hedged
+            idempotent: Repeating the call cannot start a second job
+            job_id: Job the call is about; it goes to the endpoint that started the job
+            starts_job: The result's ``id`` is a new job, to be bound to the endpoint
+            
+        Returns:
+            The SDK call's result
+        """
+        failed: List[Endpoint] = []
+        
+        def on_retry(error: BaseException) -> None:
+            self.retried_calls += 1
+        
+        try:
+            result, endpoint = await retry_call(
+                lambda timeout: self._attempt_upstream(operation, call, hedge, timeout, job_id, failed),
+                self.retry_policy,
+                idempotent=idempotent,
+                operation=operation,
+                on_retry=on_retry
+            )
+        except CircuitOpenError as e:
+            logger.warning(f"Circuit open, rejecting {operation}")
+            raise ServiceUnavailableException("FireCrawl", retry_after=math.ceil(e.retry_after))
+        except asyncio.TimeoutError:
+            logger.warning(f"{operation} ran past its {self.retry_policy.deadline}s deadline")
+            raise UpstreamTimeoutException("FireCrawl", self.retry_policy.deadline)
+        except Exception as e:
+            if status_code_of(e) == 429:
+                retry_after = retry_after_of(e)
+                logger.warning(f"FireCrawl throttled {operation}, retry after {retry_after}s")
+                raise RateLimitExceededException(retry_after=math.ceil(retry_after) if retry_after else None)
+            raise
+        
+        if starts_job and getattr(result, "id", None):
+            self.upstream_pool.bind(result.id, endpoint)
+        return result
+    
+    async def _attempt_upstream(
+        self,
+        operation: str,
+        call: Callable[[FirecrawlApp], T],
+        hedge: bool,
+        timeout: Optional[float],
+        job_id: Optional[str],
+        failed: List[Endpoint]
+    ) -> Tuple[T, Endpoint]:
+        """
+        Make one attempt at an upstream call, giving up after ``timeout`` seconds.
+        
+        A hedge goes to a different endpoint than the first attempt, and a
+        retry avoids the endpoints in ``failed``, when others are available.
+        An endpoint that fails is added to ``failed``.
+        """
+        loop = asyncio.get_event_loop()
+        latencies = self._latencies.setdefault(operation, LatencyTracker())
+        tried: List[Endpoint] = []
+        pending: List[Endpoint] = []
+        
+        async def attempt() -> Tuple[T, Endpoint]:
+            if job_id is not None:
+                endpoint = self.upstream_pool.for_job(job_id)
+            else:
+                endpoint = self.upstream_pool.choose(avoid=failed + tried)
+            endpoint.breaker.before_call()
+            tried.append(endpoint)
+            pending.append(endpoint)
+            if len(tried) > 1:
+                self._hedge_tokens -= 1
+                self.hedged_calls += 1
+                logger.debug(f"Hedging slow {operation} call on {endpoint.name}")
+            
+            try:
+                started = await endpoint.concurrency.acquire()
+            except BaseException:
+                endpoint.breaker.record_cancelled()
+                raise
+            future = loop.run_in_executor(None, call, endpoint.app)
+            # Recorded even for a hedge loser, which keeps running in its thread
+            future.add_done_callback(lambda f: self._record_outcome(endpoint, latencies, started, f))
+            
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                endpoint.breaker.record_cancelled()
+                raise
+            except Exception as e:
+                pending.remove(endpoint)
+                if is_endpoint_failure(e):
+                    endpoint.breaker.record_failure()
+                    failed.append(endpoint)
+                else:
+                    endpoint.breaker.record_success()
+                raise
+            pending.remove(endpoint)
+            endpoint.breaker.record_success()
+            return result, endpoint
+        
+        if hedge and settings.hedge_requests:
+            runner = hedged(attempt, self._hedge_delay(latencies))
+        else:
+            runner = attempt()
+        try:
+            return await asyncio.wait_for(runner, timeout)
+        except asyncio.TimeoutError:
+            # Attempts still running at the deadline count as failures
+            for endpoint in pending:
+                endpoint.breaker.record_failure()
+            raise
+    
+    def _record_outcome(
+        self,
+        endpoint: Endpoint,
+        latencies: LatencyTracker,
+        started: float,
+        future: asyncio.Future
+    ) -> None:
+        """Feed a finished call's latency and outcome back into its endpoint's limit and score."""
+        elapsed = time.monotonic() - started
+        error = None if future.cancelled() else future.exception()
+        congested = error is not None and is_congestion(error)
+        relative_latency = 1.0
+        if len(latencies) >= self.LATENCY_BASELINE_SAMPLES:
+            relative_latency = elapsed / max(latencies.percentile(50), 1e-3)
+            congested = congested or relative_latency > settings.upstream_latency_tolerance
+        retry_after = retry_after_of(error) if error is not None else None
+        endpoint.concurrency.release(started, congested=congested, retry_after=retry_after)
+        endpoint.observe(relative_latency, failed=error is not None and is_endpoint_failure(error))
+        latencies.add(elapsed)
+    
+    def _hedge_delay(self, latencies: LatencyTracker) -> Optional[float]:
+        """Seconds to wait before hedging, or None when there is too little data or budget."""
+        # Each call earns a fraction of a hedge, capping hedges at that share of calls
+        self._hedge_tokens = min(10.0, self._hedge_tokens + settings.hedge_budget)
+        if len(latencies) < settings.hedge_min_samples or self._hedge_tokens < 1:
+            return None
+        return latencies.percentile(settings.hedge_percentile)
+    
+    def _upstream_job(self, job_factory: Callable[[Any, str], Job], job_id: str) -> Job:
+        """
+        A job whose status polls go through the upstream pool, to the
+        endpoint that started the job.
+        
+        Args:
+            job_factory: Job constructor from ``job_waiter``, such as ``crawl_job``
+            job_id: Upstream job ID
+        """
+        job = job_factory(self.app, job_id)
+        
+        async def check(job_id: str) -> Any:
+            return await self._call_upstream(
+                f"{job.name} status",
+                lambda app: job_factory(app, job_id).check_status(job_id),
+                job_id=job_id
+            )
+        
+        job.check_status = check
+        return job
+    
+    def upstream_stats(self) -> Dict[str, Any]:
+        """Endpoint health and load, latency, hedging and retry state for monitoring."""
+        return {
+            "endpoints": self.upstream_pool.snapshot(),
+            "latency_p95": {
+                operation: round(latencies.percentile(95), 3)
+                for operation, latencies in self._latencies.items() if len(latencies)
+            },
+            "hedged_calls": self.hedged_calls,
+            "retried_calls": self.retried_calls,
+            "batch_domains": self.domain_scheduler.snapshot()
+        }
+    
+    async def _submit_once(
+        self,
+        operation: str,
+        request: BaseModel,
+        idempotency_key: Optional[str],
+        start: Callable[[], Awaitable[R]],
+        job_id_of: Callable[[R], str] = lambda result: result,
+        replay: Callable[[str], R] = lambda job_id: job_id
+    ) -> R:
+        """
+        Start a job at most once per idempotency key.
+        
+        Args:
+            operation: Kind of job, so keys of different endpoints never collide
+            request: The submitted request; a key reused for a different one is rejected
+            idempotency_key: Client-supplied key, or None to always start a job
+            start: Starts the job
+            job_id_of: Job ID from ``start``'s result
+            replay: Result for a retried request, from the ID of the job it started
+            
+        Returns:
+            ``start``'s result, or ``replay``'s for a key seen before
+        """
+        if not idempotency_key:
+            return await start()
+        
+        request_hash = fingerprint(request)
+        job_id = self.idempotency_keys.claim(operation, idempotency_key, request_hash)
+        if job_id is not None:
+            logger.info(f"Idempotency-Key seen before, returning {operation} job {job_id}")
+            return replay(job_id)
+        
+        try:
+            result = await start()
+        except BaseException as e:
+            if may_have_acted(e):
+                # The job may exist after all, so the claim is kept until it lapses
+                # and a retry with the same key gets 409 instead of a second job
+                logger.warning(f"{operation} with Idempotency-Key failed with an unknown outcome: {e!r}")
+            else:
+                # Nothing was started, so the client may retry with the same key
+                self.idempotency_keys.release(operation, idempotency_key)
+            raise
+        self.idempotency_keys.complete(operation, idempotency_key, request_hash, job_id_of(result))
+        return result
+    
+    def _replayed_job(self, job_id: str) -> Dict[str, Any]:
+        """Stored record of a job returned for a repeated Idempotency-Key."""
+        stored_job = self._job_storage.get(job_id)
+        if stored_job is None:
+            raise JobNotFoundException(job_id)
+        return stored_job
+    
+    async def scrape_single_url(self, request: ScrapeRequest, index: bool = True) -> ScrapeResult:
         """Scrape a single URL."""
         try:
             logger.info(f"Scraping URL: {request.url}")
@@ -53,14 +422,15 @@ class FireCrawlService:
             formats = [f.value for f in request.formats]
             
             # Perform scraping
-            result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.scrape_url(
+            result = await self._call_upstream(
+                "scrape_url",
+                lambda app: app.scrape_url(
                     url=str(request.url),
                     formats=formats,
                     only_main_content=request.only_main_content,
                     timeout=request.timeout
-                )
+                ),
+                hedge=True
             )
             
             # Convert result to our format
@@ -82,9 +452,14 @@ class FireCrawlService:
                 success=True
             )
             
+            if index:
+                await self._index_results([scrape_result])
+            
             logger.info(f"Successfully scraped URL: {request.url}")
             return scrape_result
             
+        except ScraperException:
+            raise
         except Exception as e:
             logger.error(f"Failed to scrape URL {request.url}: {e}")
             error_result = ScrapeResult(
@@ -97,43 +472,81 @@ class FireCrawlService:
             # Re-raise as FireCrawlException for proper error handling
             raise FireCrawlException(f"Failed to scrape URL {request.url}: {str(e)}")
     
-    async def batch_scrape_urls(self, request: BatchScrapeRequest) -> BatchScrapeStatus:
-        """Start a batch scraping job."""
+    async def batch_scrape_urls(
+        self,
+        request: BatchScrapeRequest,
+        idempotency_key: Optional[str] = None
+    ) -> BatchScrapeStatus:
+        """Start a batch scraping job, once per ``idempotency_key``."""
+        return await self._submit_once(
+            "batch_scrape",
+            request,
+            idempotency_key,
+            lambda: self._batch_scrape_urls(request),
+            job_id_of=lambda batch_status: batch_status.job.id,
+            replay=lambda job_id: BatchScrapeStatus(job=self._replayed_job(job_id)["job"])
+        )
+    
+    async def _batch_scrape_urls(self, request: BatchScrapeRequest) -> BatchScrapeStatus:
         try:
             logger.info(f"Starting batch scrape for {len(request.urls)} URLs")
             
             # Convert request to FireCrawl format
             formats = [f.value for f in request.formats]
-            url_strings = [str(url) for url in request.urls]
+            original_urls = [str(url) for url in request.urls]
+            
+            # Collapse duplicates so each distinct page costs a single credit
+            url_strings, url_groups = self.canonicalizer.dedupe(original_urls)
+            if len(url_strings) < len(original_urls):
+                logger.info(
+                    f"Deduplicated batch: {len(original_urls)} URLs -> {len(url_strings)} unique"
+                )
+            
+            # Interleave sites so none gets a burst of requests; a site with more
+            # URLs than its cap is spread over several upstream batches
+            if settings.batch_domain_scheduling:
+                queues = self.domain_scheduler.group(url_strings)
+                if not self.domain_scheduler.fits_one_wave(queues):
+                    return self._start_scheduled_batch(request, queues, url_groups, len(original_urls))
+                url_strings = self.domain_scheduler.next_wave(queues)
             
             # Start batch scraping
-            batch_job = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.async_batch_scrape_urls(
+            batch_job = await self._call_upstream(
+                "async_batch_scrape_urls",
+                lambda app: app.async_batch_scrape_urls(
                     urls=url_strings,
                     formats=formats,
                     only_main_content=request.only_main_content,
                     timeout=request.timeout
-                )
+                ),
+                idempotent=False,
+                starts_job=True
             )
             
             # Create our job representation
             job = BatchScrapeJob(
                 id=batch_job.id,
                 status="pending",
-                total_urls=len(request.urls)
+                total_urls=len(original_urls),
+                unique_urls=len(url_strings)
             )
             
             # Store job for tracking
             self._job_storage[job.id] = {
                 "job": job,
                 "type": "batch_scrape",
-                "urls": url_strings
+                "urls": url_strings,
+                "url_groups": url_groups,
+                "strip_boilerplate": request.strip_boilerplate,
+                "detect_near_duplicates": request.detect_near_duplicates or request.suppress_near_duplicates,
+                "suppress_near_duplicates": request.suppress_near_duplicates
             }
             
             logger.info(f"Started batch scrape job: {job.id}")
             return BatchScrapeStatus(job=job)
             
+        except ScraperException:
+            raise
         except Exception as e:
             logger.error(f"Failed to start batch scraping: {e}")
             raise FireCrawlException(f"Failed to start batch scraping: {str(e)}")
@@ -146,56 +559,409 @@ class FireCrawlService:
             if job_id not in self._job_storage:
                 raise JobNotFoundException(job_id)
             
+            stored_job = self._job_storage[job_id]
+            results = stored_job.get("results")
+            if stored_job.get("scheduled") or results is not None:
+                # Submitted in the background, which keeps the record current, or
+                # finished and post-processed on an earlier poll
+                if results is not None and not stored_job.get("indexed"):
+                    # Processed by another worker; each worker has its own search index
+                    await self._index_results(results)
+                    self._job_storage.set_local(job_id, indexed=True)
+                return BatchScrapeStatus(job=stored_job["job"], data=results)
+            
             # Get status from FireCrawl
-            batch_status = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.check_batch_scrape_status(job_id)
+            batch_status = await self._call_upstream(
+                "check_batch_scrape_status",
+                lambda app: app.check_batch_scrape_status(job_id),
+                job_id=job_id
             )
             
             # Update our job status
-            stored_job = self._job_storage[job_id]
             job = stored_job["job"]
             job.status = batch_status.status
             job.completed_urls = len(batch_status.data) if batch_status.data else 0
             
             if batch_status.status == "completed":
                 job.completed_at = datetime.utcnow()
-                
-                # Convert results to our format
-                results = []
-                if batch_status.data:
-                    for result in batch_status.data:
-                        metadata = ScrapeMetadata(
-                            title=result.metadata.get('title') if result.metadata else None,
-                            description=result.metadata.get('description') if result.metadata else None,
-                            credits_used=result.metadata.get('creditsUsed') if result.metadata else None,
-                            url=result.metadata.get('url') if result.metadata else None,
-                            status_code=result.metadata.get('statusCode') if result.metadata else None
-                        )
-                        
-                        scrape_result = ScrapeResult(
-                            url=result.metadata.get('url', ''),
-                            markdown=getattr(result, 'markdown', None),
-                            html=getattr(result, 'html', None),
-                            links=getattr(result, 'links', None),
-                            screenshot=getattr(result, 'screenshot', None),
-                            metadata=metadata,
-                            success=True
-                        )
-                        results.append(scrape_result)
-                
-                return BatchScrapeStatus(job=job, data=results)
+                self._record_domain_outcomes(
+                    stored_job["urls"], batch_status.data or [],
+                    (job.completed_at - job.created_at).total_seconds()
+                )
+                # Kept with the job, so later polls skip the upstream call and the
+                # boilerplate and near-duplicate passes
+                stored_job["results"] = await self._process_batch_results(stored_job, batch_status.data)
+                self._job_storage[job_id] = stored_job
+                return BatchScrapeStatus(job=job, data=stored_job["results"])
             
+            self._job_storage[job_id] = stored_job
             return BatchScrapeStatus(job=job)
             
+        except ScraperException:
+            raise
         except Exception as e:
             logger.error(f"Failed to get batch scrape status for job {job_id}: {e}")
             if "not found" in str(e).lower():
                 raise JobNotFoundException(job_id)
             raise FireCrawlException(f"Failed to get batch scrape status: {str(e)}")
     
-    async def crawl_website(self, request: CrawlRequest) -> CrawlStatus:
-        """Start a website crawling job."""
+    async def _process_batch_results(self, stored_job: Dict[str, Any], raw_data: Optional[List[Any]]) -> List[ScrapeResult]:
+        """Convert a finished batch's pages and apply the options it was started with."""
+        job = stored_job["job"]
+        results = []
+        for result in raw_data or []:
+            metadata = ScrapeMetadata(
+                title=result.metadata.get('title') if result.metadata else None,
+                description=result.metadata.get('description') if result.metadata else None,
+                credits_used=result.metadata.get('creditsUsed') if result.metadata else None,
+                url=result.metadata.get('url') if result.metadata else None,
+                status_code=result.metadata.get('statusCode') if result.metadata else None
+            )
+            
+            scrape_result = ScrapeResult(
+                url=result.metadata.get('url', ''),
+                markdown=getattr(result, 'markdown', None),
+                html=getattr(result, 'html', None),
+                links=getattr(result, 'links', None),
+                screenshot=getattr(result, 'screenshot', None),
+                metadata=metadata,
+                success=True
+            )
+            results.append(scrape_result)
+        
+        if stored_job.get("strip_boilerplate"):
+            results = await self._strip_boilerplate(results)
+        
+        # Duplicates are only marked here; dropping them before the fan-out would
+        # misalign results with the raw pages their source URLs come from
+        suppress = stored_job.get("suppress_near_duplicates", False)
+        if stored_job.get("detect_near_duplicates"):
+            results, job.duplicate_pages = await self._mark_near_duplicates(results)
+        
+        if not stored_job.get("indexed"):
+            await self._index_results([r for r in results if not (suppress and r.duplicate_of)])
+            stored_job["indexed"] = True
+        
+        results = self._fan_out_results(results, stored_job.get("url_groups"), raw_data)
+        if suppress:
+            results = [r for r in results if not r.duplicate_of]
+        return results
+    
+    def _record_domain_outcomes(self, urls: List[str], raw_data: List[Any], elapsed: float) -> None:
+        """Report each submitted URL's target-site status to the domain scheduler."""
+        status_codes: Dict[str, Optional[int]] = {}
+        for page in raw_data:
+            source_url = (page.metadata or {}).get('sourceURL')
+            if source_url:
+                status_codes[self.canonicalizer.canonicalize(source_url)] = page.metadata.get('statusCode')
+        self.domain_scheduler.record_wave({url: status_codes.get(url) for url in urls}, elapsed)
+    
+    def _start_scheduled_batch(
+        self,
+        request: BatchScrapeRequest,
+        queues: Dict[str, Any],
+        url_groups: Dict[str, List[str]],
+        total_urls: int
+    ) -> BatchScrapeStatus:
+        """Start a batch that is submitted in per-domain-capped waves by a background task."""
+        unique_urls = sum(len(queue) for queue in queues.values())
+        job = BatchScrapeJob(
+            id=str(uuid.uuid4()),
+            status="running",
+            total_urls=total_urls,
+            unique_urls=unique_urls
+        )
+        self._job_storage[job.id] = {
+            "job": job,
+            "type": "batch_scrape",
+            "scheduled": True,
+            "upstream_jobs": [],
+            "url_groups": url_groups,
+            "strip_boilerplate": request.strip_boilerplate,
+            "detect_near_duplicates": request.detect_near_duplicates or request.suppress_near_duplicates,
+            "suppress_near_duplicates": request.suppress_near_duplicates
+        }
+        self._start_background(self._run_scheduled_batch(job.id, request, queues))
+        
+        logger.info(f"Started scheduled batch scrape job {job.id}: {unique_urls} URLs over {len(queues)} domains")
+        return BatchScrapeStatus(job=job)
+    
+    async def _run_scheduled_batch(self, job_id: str, request: BatchScrapeRequest, queues: Dict[str, Any]) -> None:
+        """
+        Submit a scheduled batch in the background.
+        
+        Domains within their cap go upstream together in one batch right away.
+        Each domain over its cap gets its own lane of waves, planned one at a
+        time so caps lowered by blocked or slow responses apply to the rest of
+        the domain's URLs. Lanes run side by side, at most
+        ``batch_domain_parallel_jobs`` upstream jobs at once, so no domain
+        waits for another one's waves.
+        """
+        formats = [f.value for f in request.formats]
+        raw_data: List[Any] = []
+        slots = asyncio.Semaphore(max(1, settings.batch_domain_parallel_jobs))
+        
+        async def submit(wave: List[str]) -> None:
+            async with slots:
+                started = time.monotonic()
+                batch_job = await self._call_upstream(
+                    "async_batch_scrape_urls",
+                    lambda app: app.async_batch_scrape_urls(
+                        urls=wave,
+                        formats=formats,
+                        only_main_content=request.only_main_content,
+                        timeout=request.timeout
+                    ),
+                    idempotent=False,
+                    starts_job=True
+                )
+                try:
+                    batch_status = await wait_for(
+                        self._upstream_job(batch_scrape_job, batch_job.id),
+                        timeout=settings.job_timeout
+                    )
+                except JobWaitTimeoutError:
+                    raise JobTimeoutException(batch_job.id, settings.job_timeout)
+                elapsed = time.monotonic() - started
+            
+            data = batch_status.data or []
+            self._record_domain_outcomes(wave, data, elapsed)
+            raw_data.extend(data)
+            
+            stored_job = self._job_storage[job_id]
+            stored_job["upstream_jobs"].append(batch_job.id)
+            stored_job["job"].completed_urls = len(raw_data)
+            self._job_storage[job_id] = stored_job
+            logger.info(f"Batch {job_id}: wave of {len(wave)} URLs done, {len(raw_data)} pages so far")
+        
+        async def lane(domain: str) -> None:
+            lane_queues = OrderedDict([(domain, queues[domain])])
+            while lane_queues:
+                await submit(self.domain_scheduler.next_wave(lane_queues))
+        
+        crowded = [domain for domain, queue in queues.items() if len(queue) > self.domain_scheduler.cap(domain)]
+        within_cap = OrderedDict((domain, queue) for domain, queue in queues.items() if domain not in crowded)
+        runs = [lane(domain) for domain in crowded]
+        if within_cap:
+            runs.append(submit(self.domain_scheduler.next_wave(within_cap)))
+        
+        tasks = [asyncio.ensure_future(run) for run in runs]
+        try:
+            await asyncio.gather(*tasks)
+            
+            stored_job = self._job_storage[job_id]
+            job = stored_job["job"]
+            stored_job["results"] = await self._process_batch_results(stored_job, raw_data)
+            job.status = "completed"
+            job.completed_at = datetime.utcnow()
+            self._job_storage[job_id] = stored_job
+            logger.info(f"Completed scheduled batch scrape job: {job_id}")
+        except asyncio.CancelledError:
+            logger.warning(f"Scheduled batch scrape job {job_id} cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled batch scrape job {job_id} failed: {e}")
+            stored_job = self._job_storage.get(job_id)
+            if stored_job is not None:
+                job = stored_job["job"]
+                job.status = "failed"
+                job.failed_urls = job.unique_urls - len(raw_data)
+                self._job_storage[job_id] = stored_job
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _strip_boilerplate(self, results: List[ScrapeResult]) -> List[ScrapeResult]:
+        """
+        Remove markdown repeated across a set of pages from the same job.
+        
+        Args:
+            results: Pages from one crawl or batch
+            
+        Returns:
+            Copies of the pages with stripped markdown and per-page size stats
+        """
+        def strip_pages() -> List[ScrapeResult]:
+            detector = BoilerplateDetector(
+                min_fraction=settings.boilerplate_min_fraction,
+                min_pages=settings.boilerplate_min_pages
+            )
+            detector.learn_all([r.markdown for r in results if r.markdown])
+            
+            stripped = []
+            for result in results:
+                if not result.markdown:
+                    stripped.append(result)
+                    continue
+                markdown, stats = detector.strip(result.markdown)
+                stripped.append(result.model_copy(update={
+                    "markdown": markdown,
+                    "boilerplate": BoilerplateStats(
+                        bytes_before=stats.bytes_before,
+                        bytes_after=stats.bytes_after,
+                        bytes_removed=stats.bytes_removed,
+                        tokens_before=stats.tokens_before,
+                        tokens_after=stats.tokens_after,
+                        tokens_removed=stats.tokens_removed
+                    )
+                }))
+            return stripped
+        
+        stripped = await asyncio.get_event_loop().run_in_executor(None, strip_pages)
+        saved = sum(r.boilerplate.bytes_removed for r in stripped if r.boilerplate)
+        logger.info(f"Stripped {saved} bytes of boilerplate from {len(stripped)} pages")
+        return stripped
+    
+    async def _mark_near_duplicates(
+        self,
+        results: List[ScrapeResult],
+        suppress: bool = False
+    ) -> Tuple[List[ScrapeResult], int]:
+        """
+        Cluster near-identical pages and mark every page that is not its cluster's representative.
+        
+        The representative is the page with the longest markdown. A cluster
+        whose representative matches a page from an earlier job is marked as
+        a duplicate of that page as a whole.
+        
+        Args:
+            results: Pages from one crawl or batch
+            suppress: Drop duplicates instead of only marking them
+            
+        Returns:
+            The (possibly filtered) results and the number of duplicate pages
+        """
+        def detect() -> List[ScrapeResult]:
+            positions = [i for i, r in enumerate(results) if r.markdown]
+            markdowns = [results[i].markdown for i in positions]
+            signatures = SimHasher().signatures(markdowns)
+            representatives = cluster_signatures(
+                signatures,
+                max_distance=self.near_duplicates.max_distance,
+                sizes=[len(markdown) for markdown in markdowns]
+            )
+            keys = [self.canonicalizer.cache_key(results[i].url) for i in positions]
+            job_keys = set(keys)
+            
+            # Clusters that duplicate a page seen by an earlier job
+            earlier: Dict[int, str] = {}
+            for representative in set(representatives):
+                for key, _ in self.near_duplicates.matches(signatures[representative]):
+                    if key not in job_keys:
+                        earlier[representative] = key
+                        break
+                else:
+                    self.near_duplicates.add(keys[representative], signatures[representative])
+            
+            cluster_sizes = Counter(representatives)
+            marked = list(results)
+            for position, index in enumerate(positions):
+                representative = representatives[position]
+                if representative in earlier:
+                    duplicate_of = earlier[representative]
+                elif representative != position:
+                    duplicate_of = results[positions[representative]].url
+                else:
+                    duplicate_of = None
+                marked[index] = results[index].model_copy(update={
+                    "duplicate_of": duplicate_of,
+                    "cluster_size": cluster_sizes[representative]
+                })
+            return marked
+        
+        marked = await asyncio.get_event_loop().run_in_executor(None, detect)
+        duplicates = sum(1 for r in marked if r.duplicate_of)
+        if duplicates:
+            logger.info(f"Found {duplicates} near-duplicate pages among {len(marked)}")
+        if suppress:
+            marked = [r for r in marked if not r.duplicate_of]
+        return marked, duplicates
+    
+    async def _index_results(self, results: List[ScrapeResult]) -> None:
+        """Add scraped pages to the local full-text index, replacing older versions."""
+        # Copies fanned out to equivalent URLs share a key and are indexed once
+        pages = {
+            self.canonicalizer.cache_key(r.url): r
+            for r in results if r.success and r.markdown and r.url
+        }
+        if not pages:
+            return
+        
+        def index_pages() -> None:
+            for key, page in pages.items():
+                self.search_index.add(
+                    key,
+                    page.markdown,
+                    title=page.metadata.title or "",
+                    description=page.metadata.description
+                )
+        
+        await asyncio.get_event_loop().run_in_executor(None, index_pages)
+        logger.debug(f"Indexed {len(pages)} pages for local search")
+    
+    async def local_search(self, request: LocalSearchRequest) -> SearchResponse:
+        """Search previously scraped pages without calling FireCrawl."""
+        hits = self.search_index.search(request.query, limit=request.limit)
+        results = [
+            SearchResult(
+                title=hit.title,
+                url=hit.url,
+                description=hit.description,
+                markdown=hit.markdown if request.include_markdown else None,
+                snippet=hit.snippet,
+                score=hit.score
+            )
+            for hit in hits
+        ]
+        return SearchResponse(
+            query=request.query,
+            results=results,
+            total_results=len(results)
+        )
+    
+    def _fan_out_results(
+        self,
+        results: List[ScrapeResult],
+        url_groups: Optional[Dict[str, List[str]]],
+        raw_data: Optional[List[Any]]
+    ) -> List[ScrapeResult]:
+        """
+        Copy each deduplicated result back to every original URL that mapped to it.
+        
+        ``results`` must still line up with ``raw_data`` one to one, which
+        holds each page's source URL.
+        """
+        if not url_groups:
+            return results
+        
+        fanned_out = []
+        for result, raw in zip(results, raw_data or []):
+            source_url = (raw.metadata or {}).get('sourceURL') or result.url
+            originals = url_groups.get(self.canonicalizer.canonicalize(source_url))
+            if not originals:
+                fanned_out.append(result)
+                continue
+            for original in originals:
+                fanned_out.append(result.model_copy(update={"url": original}))
+        
+        return fanned_out
+    
+    async def crawl_website(self, request: CrawlRequest, idempotency_key: Optional[str] = None) -> CrawlStatus:
+        """
+        Crawl a website and wait for the results.
+        
+        A repeated ``idempotency_key`` waits on the crawl the first request
+        started instead of starting another.
+        """
+        # Tracked so a worker shutting down can let the crawl finish
+        task = asyncio.current_task()
+        self._in_flight.add(task)
+        try:
+            return await self._crawl_website(request, idempotency_key)
+        finally:
+            self._in_flight.discard(task)
+    
+    async def _crawl_website(self, request: CrawlRequest, idempotency_key: Optional[str]) -> CrawlStatus:
         try:
             logger.info(f"Starting crawl for URL: {request.url}")
             
@@ -206,32 +972,51 @@ class FireCrawlService:
                 only_main_content=request.only_main_content
             )
             
+            seed_url = self.canonicalizer.canonicalize(str(request.url))
+            
+            async def start_crawl() -> str:
+                crawl_response = await self._call_upstream(
+                    "async_crawl_url",
+                    lambda app: app.async_crawl_url(
+                        url=seed_url,
+                        limit=request.limit,
+                        scrape_options=scrape_options,
+                        max_depth=request.max_depth,
+                        exclude_paths=request.exclude_paths,
+                        include_paths=request.include_paths
+                    ),
+                    idempotent=False,
+                    starts_job=True
+                )
+                if not crawl_response.success or not crawl_response.id:
+                    raise FireCrawlException(f"Crawl was not accepted: {getattr(crawl_response, 'error', None)}")
+                return crawl_response.id
+            
             # Start crawling
-            crawl_job = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.crawl_url(
-                    url=str(request.url),
-                    limit=request.limit,
-                    scrape_options=scrape_options,
-                    max_depth=request.max_depth,
-                    exclude_paths=request.exclude_paths,
-                    include_paths=request.include_paths
+            crawl_id = await self._submit_once("crawl", request, idempotency_key, start_crawl)
+            
+            # Wait on the event loop rather than blocking an executor thread
+            try:
+                crawl_result = await wait_for(
+                    self._upstream_job(crawl_job, crawl_id),
+                    timeout=settings.job_timeout
                 )
-            )
+            except JobWaitTimeoutError:
+                raise JobTimeoutException(crawl_id, settings.job_timeout)
             
             # Create our job representation
             job = CrawlJob(
-                id=str(uuid.uuid4()),  # Generate our own ID
-                status="completed",  # FireCrawl crawl is synchronous
-                total_pages=len(crawl_job.data) if crawl_job.data else 0,
-                completed_pages=len(crawl_job.data) if crawl_job.data else 0,
+                id=crawl_id,
+                status="completed",
+                total_pages=len(crawl_result.data) if crawl_result.data else 0,
+                completed_pages=len(crawl_result.data) if crawl_result.data else 0,
                 completed_at=datetime.utcnow()
             )
             
             # Convert results to our format
             results = []
-            if crawl_job.data:
-                for result in crawl_job.data:
+            if crawl_result.data:
+                for result in crawl_result.data:
                     metadata = ScrapeMetadata(
                         title=result.metadata.get('title') if result.metadata else None,
                         description=result.metadata.get('description') if result.metadata else None,
@@ -251,9 +1036,21 @@ class FireCrawlService:
                     )
                     results.append(scrape_result)
             
+            if request.strip_boilerplate:
+                results = await self._strip_boilerplate(results)
+            
+            if request.detect_near_duplicates or request.suppress_near_duplicates:
+                results, job.duplicate_pages = await self._mark_near_duplicates(
+                    results, suppress=request.suppress_near_duplicates
+                )
+            
+            await self._index_results(results)
+            
             logger.info(f"Completed crawl for URL: {request.url}, pages: {len(results)}")
             return CrawlStatus(job=job, data=results)
             
+        except ScraperException:
+            raise
         except Exception as e:
             logger.error(f"Failed to crawl website {request.url}: {e}")
             raise FireCrawlException(f"Failed to crawl website: {str(e)}")
@@ -268,9 +1065,9 @@ class FireCrawlService:
             scrape_options = ScrapeOptions(formats=formats)
             
             # Perform search
-            search_result = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.app.search(
+            search_result = await self._call_upstream(
+                "search",
+                lambda app: app.search(
                     query=request.query,
                     limit=request.limit,
                     tbs=request.tbs,
@@ -300,17 +1097,392 @@ class FireCrawlService:
             logger.info(f"Search completed for: {request.query}, results: {len(results)}")
             return response
             
+        except ScraperException:
+            raise
         except Exception as e:
             logger.error(f"Failed to search for '{request.query}': {e}")
             raise FireCrawlException(f"Failed to search: {str(e)}")
 
 
+    def _extract_cache_key(self, request: ExtractRequest, schema_hash: Optional[str]) -> tuple:
+        """Cache key for extraction results: (urls, prompt, schema hash)."""
+        urls = tuple(sorted({self.canonicalizer.cache_key(url) for url in request.urls}))
+        return (urls, request.prompt or "", schema_hash, request.enable_web_search)
+    
+    async def start_extract(self, request: ExtractRequest, idempotency_key: Optional[str] = None) -> ExtractStatus:
+        """Start an extraction job, once per ``idempotency_key``."""
+        def replay(job_id: str) -> ExtractStatus:
+            stored_job = self._replayed_job(job_id)
+            return stored_job.get("result") or ExtractStatus(job=stored_job["job"])
+        
+        return await self._submit_once(
+            "extract",
+            request,
+            idempotency_key,
+            lambda: self._start_extract(request),
+            job_id_of=lambda extract_status: extract_status.job.id,
+            replay=replay
+        )
+    
+    async def _start_extract(self, request: ExtractRequest) -> ExtractStatus:
+        """Start an extraction job, answering from cache when possible."""
+        try:
+            logger.info(f"Starting extract for {len(request.urls)} URLs")
+            
+            compiled = self.schema_cache.compile(request.json_schema) if request.json_schema else None
+            schema_hash = compiled.hash if compiled else None
+            cache_key = self._extract_cache_key(request, schema_hash)
+            
+            cached = self._extract_cache.get(cache_key)
+            if cached is not None:
+                job = ExtractJob(
+                    id=str(uuid.uuid4()),
+                    status="completed",
+                    total_urls=len(request.urls),
+                    schema_hash=schema_hash,
+                    cached=True,
+                    completed_at=datetime.utcnow()
+                )
+                result = ExtractStatus(job=job, data=cached)
+                self._job_storage[job.id] = {
+                    "job": job,
+                    "type": "extract",
+                    "result": result
+                }
+                logger.info(f"Extract answered from cache: {job.id}")
+                return result
+            
+            extract_job = await self._call_upstream(
+                "async_extract",
+                lambda app: app.async_extract(
+                    urls=request.urls,
+                    prompt=request.prompt,
+                    schema=request.json_schema,
+                    enable_web_search=request.enable_web_search
+                ),
+                idempotent=False,
+                starts_job=True
+            )
+            if not extract_job.success or not extract_job.id:
+                raise FireCrawlException(f"Extract job was not accepted: {extract_job.error}")
+            
+            job = ExtractJob(
+                id=extract_job.id,
+                status="pending",
+                total_urls=len(request.urls),
+                schema_hash=schema_hash
+            )
+            
+            self._job_storage[job.id] = {
+                "job": job,
+                "type": "extract",
+                "cache_key": cache_key,
+                "schema_hash": schema_hash
+            }
+            
+            logger.info(f"Started extract job: {job.id}")
+            return ExtractStatus(job=job)
+            
+        except ScraperException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to start extract: {e}")
+            raise FireCrawlException(f"Failed to start extract: {str(e)}")
+    
+    async def get_extract_status(self, job_id: str) -> ExtractStatus:
+        """Get the status of an extraction job."""
+        stored_job = self._job_storage.get(job_id)
+        if not stored_job or stored_job["type"] != "extract":
+            raise JobNotFoundException(job_id)
+        
+        # Finished jobs (including cache hits) are answered locally
+        if "result" in stored_job:
+            return stored_job["result"]
+        
+        try:
+            extract_status = await self._call_upstream(
+                "get_extract_status",
+                lambda app: app.get_extract_status(job_id),
+                job_id=job_id
+            )
+        except ScraperException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to get extract status for job {job_id}: {e}")
+            raise FireCrawlException(f"Failed to get extract status: {str(e)}")
+        
+        job = stored_job["job"]
+        job.status = extract_status.status or job.status
+        
+        if job.status == "failed":
+            job.completed_at = datetime.utcnow()
+            result = ExtractStatus(job=job, error=extract_status.error)
+            stored_job["result"] = result
+            self._job_storage[job_id] = stored_job
+            return result
+        
+        if job.status != "completed":
+            self._job_storage[job_id] = stored_job
+            return ExtractStatus(job=job)
+        
+        job.completed_at = datetime.utcnow()
+        data, validation_errors = extract_status.data, []
+        compiled = self.schema_cache.get(stored_job["schema_hash"]) if stored_job["schema_hash"] else None
+        if compiled is not None:
+            data, validation_errors = compiled.validate(data)
+        
+        # Only results that satisfied the schema are worth serving again
+        if not validation_errors:
+            self._extract_cache.set(stored_job["cache_key"], data)
+        
+        result = ExtractStatus(
+            job=job,
+            data=data,
+            validation_errors=validation_errors or None
+        )
+        stored_job["result"] = result
+        self._job_storage[job_id] = stored_job
+        logger.info(f"Extract job completed: {job_id}")
+        return result
+
+    
+    def _get_llms_text_job(self, job_id: str) -> Dict[str, Any]:
+        stored_job = self._job_storage.get(job_id)
+        if not stored_job or stored_job["type"] != "llms_text":
+            raise JobNotFoundException(job_id)
+        if "changed" not in stored_job:
+            # Started by another worker; this process needs its own condition
+            stored_job["changed"] = asyncio.Condition()
+            self._job_storage.set_local(job_id, changed=stored_job["changed"])
+        self._adopt_llms_text_job(job_id, stored_job)
+        return stored_job
+    
+    def _adopt_llms_text_job(self, job_id: str, stored_job: Dict[str, Any]) -> None:
+        """Resume tracking a running job whose tracker stopped, e.g. in a restarted worker."""
+        if stored_job["job"].status in ("completed", "failed") or "task" in stored_job:
+            return
+        if time.time() - stored_job.get("heartbeat", 0) < 2 * settings.llms_text_poll_max + 5:
+            return
+        logger.info(f"Taking over tracking of llms.txt job {job_id}")
+        stored_job["task"] = self._start_background(self._track_llms_text(job_id))
+        self._job_storage.set_local(job_id, task=stored_job["task"])
+    
+    def _start_background(self, coro: Any) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    @staticmethod
+    def _llms_text_status(stored_job: Dict[str, Any]) -> LlmsTextStatus:
+        return LlmsTextStatus(
+            job=stored_job["job"],
+            llmstxt=stored_job["llmstxt"],
+            llmsfulltxt=stored_job["llmsfulltxt"],
+            error=stored_job["error"]
+        )
+    
+    async def start_llms_text(self, request: LlmsTextRequest) -> LlmsTextStatus:
+        """Start llms.txt generation as a background job, answering from cache when possible."""
+        site_url = self.canonicalizer.cache_key(str(request.url))
+        cache_key = (site_url, request.max_urls, request.show_full_text)
+        
+        cached = self._llms_text_cache.get(cache_key)
+        if cached is not None:
+            job = LlmsTextJob(
+                id=str(uuid.uuid4()),
+                status="completed",
+                url=site_url,
+                cached=True,
+                completed_at=datetime.utcnow()
+            )
+            stored_job = {
+                "job": job,
+                "type": "llms_text",
+                "error": None,
+                "changed": asyncio.Condition(),
+                **cached
+            }
+            self._job_storage[job.id] = stored_job
+            logger.info(f"llms.txt for {site_url} answered from cache: {job.id}")
+            return self._llms_text_status(stored_job)
+        
+        try:
+            logger.info(f"Starting llms.txt generation for: {site_url}")
+            
+            response = await self._call_upstream(
+                "async_generate_llms_text",
+                lambda app: app.async_generate_llms_text(
+                    site_url,
+                    max_urls=request.max_urls,
+                    show_full_text=request.show_full_text
+                ),
+                idempotent=False,
+                starts_job=True
+            )
+        except ScraperException:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to start llms.txt generation for {site_url}: {e}")
+            raise FireCrawlException(f"Failed to start llms.txt generation: {str(e)}")
+        
+        if not response.success or not response.id:
+            raise FireCrawlException(f"llms.txt generation was not accepted: {response.error}")
+        
+        job = LlmsTextJob(id=response.id, status="pending", url=site_url)
+        stored_job = {
+            "job": job,
+            "type": "llms_text",
+            "cache_key": cache_key,
+            "llmstxt": None,
+            "llmsfulltxt": None,
+            "error": None,
+            "heartbeat": time.time(),
+            "changed": asyncio.Condition()
+        }
+        self._job_storage[job.id] = stored_job
+        stored_job["task"] = self._start_background(self._track_llms_text(job.id))
+        self._job_storage.set_local(job.id, task=stored_job["task"])
+        
+        logger.info(f"Started llms.txt job: {job.id}")
+        return self._llms_text_status(stored_job)
+    
+    async def _track_llms_text(self, job_id: str) -> None:
+        """
+        Follow llms.txt progress until the job finishes.
+        
+        Polling backs off while nothing changes and resets whenever new text
+        arrives. Waiting readers are notified on every change instead of
+        polling themselves.
+        """
+        stored_job = self._job_storage[job_id]
+        job = stored_job["job"]
+        changed = stored_job["changed"]
+        
+        def on_status(status: Any) -> bool:
+            stored_job["heartbeat"] = time.time()
+            updated = False
+            if status.data:
+                for field in ("llmstxt", "llmsfulltxt"):
+                    text = getattr(status.data, field, None)
+                    if text and text != stored_job[field]:
+                        stored_job[field] = text
+                        updated = True
+            if status.status not in ("completed", "failed") and job.status != "processing":
+                job.status = "processing"
+                updated = True
+            self._job_storage[job_id] = stored_job
+            if updated:
+                asyncio.get_event_loop().create_task(self._notify(changed))
+            return updated
+        
+        try:
+            await wait_for(
+                self._upstream_job(llms_text_job, job_id),
+                timeout=settings.job_timeout,
+                initial_delay=settings.llms_text_poll_initial,
+                max_delay=settings.llms_text_poll_max,
+                max_consecutive_errors=5,
+                on_status=on_status
+            )
+            job.status = "completed"
+        except asyncio.CancelledError:
+            # Shutting down: let another worker take over right away
+            stored_job["heartbeat"] = 0
+            self._job_storage[job_id] = stored_job
+            raise
+        except JobFailedError as e:
+            job.status = "failed"
+            stored_job["error"] = e.status.error or str(e)
+        except Exception as e:
+            logger.error(f"llms.txt job {job_id} failed: {e}")
+            job.status = "failed"
+            stored_job["error"] = str(e)
+        
+        job.completed_at = datetime.utcnow()
+        self._job_storage[job_id] = stored_job
+        if job.status == "completed":
+            self._llms_text_cache.set(stored_job["cache_key"], {
+                "llmstxt": stored_job["llmstxt"],
+                "llmsfulltxt": stored_job["llmsfulltxt"]
+            })
+        await self._notify(changed)
+        logger.info(f"llms.txt job {job_id} finished with status: {job.status}")
+    
+    @staticmethod
+    async def _notify(changed: asyncio.Condition) -> None:
+        async with changed:
+            changed.notify_all()
+    
+    async def get_llms_text_status(self, job_id: str) -> LlmsTextStatus:
+        """Get the status of an llms.txt job from the locally tracked state."""
+        return self._llms_text_status(self._get_llms_text_job(job_id))
+    
+    async def stream_llms_text(self, job_id: str, full_text: bool = False) -> AsyncIterator[str]:
+        """
+        Stream generated llms.txt content as it becomes available.
+        
+        Yields only the newly generated text each time the background tracker
+        reports a change, and returns once the job has finished.
+        """
+        field = "llmsfulltxt" if full_text else "llmstxt"
+        changed = self._get_llms_text_job(job_id)["changed"]
+        sent = 0
+        
+        while True:
+            async with changed:
+                stored_job = self._get_llms_text_job(job_id)
+                text = stored_job[field] or ""
+                finished = stored_job["job"].status in ("completed", "failed")
+                if len(text) <= sent and not finished:
+                    # A tracker in another worker cannot notify us, so re-read now and then
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout=settings.llms_text_poll_max)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+            
+            if len(text) > sent:
+                yield text[sent:]
+                sent = len(text)
+            if finished:
+                break
+    
+    async def drain(self, timeout: float) -> None:
+        """
+        Give in-flight crawls and background job trackers time to finish.
+        
+        Called on shutdown. Trackers still running after ``timeout`` seconds
+        are cancelled and left for another worker to take over.
+        
+        Args:
+            timeout: Seconds to wait
+        """
+        pending = {task for task in self._in_flight | self._background_tasks if not task.done()}
+        if not pending:
+            return
+        
+        logger.info(f"Draining {len(pending)} in-flight jobs (up to {timeout}s)")
+        _, pending = await asyncio.wait(pending, timeout=timeout)
+        if pending:
+            logger.warning(f"Cancelling {len(pending)} jobs still running after drain timeout")
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
 # Service factory function
-def create_firecrawl_service() -> FireCrawlService:
+def create_firecrawl_service(state: Optional[StateBackend] = None) -> FireCrawlService:
     """Create and return a FireCrawl service instance."""
     if not settings.firecrawl_api_key:
         raise ConfigurationException("FireCrawl API key is required")
     
+    endpoints = [(settings.firecrawl_base_url, settings.firecrawl_api_key)]
+    endpoints += [(endpoint.base_url, endpoint.api_key) for endpoint in settings.firecrawl_endpoints]
+    
     return FireCrawlService(
-        api_key=settings.firecrawl_api_key
+        api_key=settings.firecrawl_api_key,
+        canonicalizer=create_url_canonicalizer(),
+        state=state,
+        endpoints=endpoints
     ) 
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Idempotency keys for job submissions.
+
+A client that times out while starting a batch, crawl or extract job cannot
+tell whether the job started, and retrying the POST may start (and pay for)
+a second one. With an ``Idempotency-Key`` header the first request claims
+the key, and the job it starts is recorded under it. A retry with the same
+key gets the original job back instead of starting a new one.
+
+Keys are kept in the state backend, so a retry routed to another worker is
+recognised as well.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+from fastapi import status
+
+from ..exceptions import IdempotencyKeyException
+from .cache import TTLCache
+
+
+def fingerprint(request: BaseModel) -> str:
+    """Hash of a request body, to detect a key reused for a different request."""
+    return hashlib.sha256(request.model_dump_json().encode("utf-8")).hexdigest()
+
+
+class IdempotencyKeys:
+    """
+    Claims on idempotency keys and the jobs recorded under them.
+
+    Args:
+        cache: Cache holding the claims; a shared one for several workers
+        ttl: Seconds a completed key is remembered
+        pending_ttl: Seconds a claim may stay without a job before it lapses,
+            so a worker that died mid-submission does not block the key
+    """
+
+    def __init__(self, cache: TTLCache, ttl: float = 86400, pending_ttl: float = 300):
+        self.cache = cache
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+
+    def claim(self, operation: str, key: str, request_hash: str) -> Optional[str]:
+        """
+        Claim a key for a new submission.
+
+        Args:
+            operation: Kind of job, keeping keys of different endpoints apart
+            key: Client-supplied idempotency key
+            request_hash: ``fingerprint`` of the request body
+
+        Returns:
+            None if the key was claimed and the job should be started, or
+            the ID of the job already started with this key
+
+        Raises:
+            IdempotencyKeyException: The key belongs to a different request,
+                or the request that claimed it is still running
+        """
+        entry = {"request_hash": request_hash, "job_id": None}
+        if self.cache.add((operation, key), entry, ttl=self.pending_ttl):
+            return None
+
+        existing: Optional[Dict[str, Any]] = self.cache.get((operation, key))
+        if existing is None:
+            # Lapsed between the two calls
+            return self.claim(operation, key, request_hash)
+        if existing["request_hash"] != request_hash:
+            raise IdempotencyKeyException(
+                "Idempotency-Key was already used for a different request",
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if existing["job_id"] is None:
+            raise IdempotencyKeyException(
+                "A request with this Idempotency-Key is still in progress",
+                status_code=status.HTTP_409_CONFLICT
+            )
+        return existing["job_id"]
+
+    def complete(self, operation: str, key: str, request_hash: str, job_id: str) -> None:
+        """Record the job started under a claimed key."""
+        self.cache.set((operation, key), {"request_hash": request_hash, "job_id": job_id}, ttl=self.ttl)
+
+    def release(self, operation: str, key: str) -> None:
+        """Give up a claim after the submission failed, so the client can retry."""
+        self.cache.pop((operation, key))
@@ -0,0 +1,359 @@
+"""
+Compressed, indexed crawl archives with memory-mapped random access.
+
+Where ``crawl_archive`` is built for streaming a crawl front to back, this
+format is built for fetching any single page without touching the rest:
+
+``<name>.fca`` (data file)
+    Magic, crawl metadata as JSON, then per page three independently
+    compressed blocks: page metadata, markdown and html.
+
+``<name>.fca.idx`` (index file)
+    A fixed-width record per page (URL hash plus offset/length of each
+    block), followed by an open-addressing hash table from URL hash to
+    ordinal.
+
+Both files are memory-mapped, so lookup by ordinal or URL is O(1) and
+reads of the compressed blocks are zero-copy slices of the mapping.
+Blocks are compressed with zstd (``zstandard`` is in requirements.txt).
+Without it new archives fall back to zlib, which is several times slower
+to decompress, and a warning is logged. The codec is stored in the index
+header, so readers always use the one an archive was written with.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import struct
+import zlib
+from array import array
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .crawl_archive import iter_crawl_json_pages, iter_json_document, iter_pages, read_header
+from .url_canonicalizer import UrlCanonicalizer
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+_DATA_MAGIC = b"FCAD"
+_INDEX_MAGIC = b"FCAI"
+_VERSION = 1
+
+# magic, version, codec, page count, hash table slots
+_INDEX_HEADER = struct.Struct("<4sHB9xQQ")
+# url hash, flags, then (offset, length) for the meta, markdown and html blocks
+_RECORD = struct.Struct("<QIQIQIQI")
+# url hash, ordinal + 1 (0 marks an empty slot)
+_SLOT = struct.Struct("<QI")
+_META_LENGTH = struct.Struct("<I")
+
+_HAS_MARKDOWN = 1
+_HAS_HTML = 2
+
+_canonicalizer = UrlCanonicalizer()
+
+
+def page_url(page: Dict[str, Any]) -> Optional[str]:
+    """The URL a page is filed under."""
+    metadata = page.get("metadata") or {}
+    return page.get("url") or metadata.get("sourceURL") or metadata.get("url")
+
+
+def url_hash(url: str) -> int:
+    """64-bit hash of the canonical form of a URL."""
+    canonical = _canonicalizer.canonicalize(url)
+    return int.from_bytes(hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class _Codec:
+    def __init__(self, codec: int, level: int = 3):
+        self.codec = codec
+        if codec == CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("This archive is zstd-compressed; install the 'zstandard' package to read it")
+            self._compressor = zstandard.ZstdCompressor(level=level)
+            self._decompressor = zstandard.ZstdDecompressor()
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            return self._compressor.compress(data)
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: Any) -> bytes:
+        if self.codec == CODEC_ZSTD:
+            return self._decompressor.decompress(data)
+        return zlib.decompress(data)
+
+
+def _default_codec() -> int:
+    if zstandard is not None:
+        return CODEC_ZSTD
+    logger.warning("zstandard is not installed; compressing the archive with zlib, which is slower to read")
+    return CODEC_ZLIB
+
+
+class IndexedArchiveWriter:
+    """
+    Write an indexed archive page by page.
+
+    Only the 12-byte (hash, ordinal) pairs are held in memory until close,
+    when the hash table is built.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        codec: Optional[int] = None,
+        level: int = 3,
+    ):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self._codec = _Codec(codec or _default_codec(), level)
+        self._data = open(path, "wb")
+        self._index = open(self.index_path, "wb")
+        self._hashes = array("Q")
+        self._closed = False
+
+        meta_bytes = json.dumps(metadata or {}, ensure_ascii=False).encode("utf-8")
+        self._data.write(_DATA_MAGIC + _META_LENGTH.pack(len(meta_bytes)) + meta_bytes)
+        self._offset = self._data.tell()
+
+        # Header is rewritten with the final counts on close
+        self._index.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _VERSION, self._codec.codec, 0, 0))
+
+    @property
+    def pages_written(self) -> int:
+        return len(self._hashes)
+
+    def _write_block(self, data: bytes) -> Tuple[int, int]:
+        if not data:
+            return self._offset, 0
+        block = self._codec.compress(data)
+        offset = self._offset
+        self._data.write(block)
+        self._offset += len(block)
+        return offset, len(block)
+
+    def add_page(self, page: Any) -> int:
+        """Append a page (dict or pydantic model) and return its ordinal."""
+        if hasattr(page, "model_dump"):
+            page = page.model_dump(mode="json")
+
+        markdown = page.get("markdown")
+        html = page.get("html")
+        meta = {k: v for k, v in page.items() if k not in ("markdown", "html")}
+        flags = (_HAS_MARKDOWN if markdown is not None else 0) | (_HAS_HTML if html is not None else 0)
+
+        url = page_url(page)
+        digest = url_hash(url) if url else 0
+
+        meta_block = self._write_block(json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+        markdown_block = self._write_block((markdown or "").encode("utf-8"))
+        html_block = self._write_block((html or "").encode("utf-8"))
+
+        self._index.write(_RECORD.pack(digest, flags, *meta_block, *markdown_block, *html_block))
+        self._hashes.append(digest)
+        return len(self._hashes) - 1
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._data.close()
+
+        count = len(self._hashes)
+        table_size = 1
+        while table_size < max(count * 2, 8):
+            table_size <<= 1
+
+        table = bytearray(table_size * _SLOT.size)
+        mask = table_size - 1
+        for ordinal, digest in enumerate(self._hashes):
+            if not digest:
+                continue
+            slot = digest & mask
+            while _SLOT.unpack_from(table, slot * _SLOT.size)[1]:
+                slot = (slot + 1) & mask
+            _SLOT.pack_into(table, slot * _SLOT.size, digest, ordinal + 1)
+
+        self._index.write(table)
+        self._index.seek(0)
+        self._index.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _VERSION, self._codec.codec, count, table_size))
+        self._index.close()
+
+    def __enter__(self) -> "IndexedArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class IndexedArchive:
+    """
+    Read-only, memory-mapped view of an indexed archive.
+
+    Usage:
+        with IndexedArchive("crawl.fca") as archive:
+            page = archive[7341]
+            page = archive.get_by_url("https://docs.crewai.com/en/introduction")
+            markdown = archive.markdown(7341)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data_file = open(path, "rb")
+        self._index_file = open(f"{path}.idx", "rb")
+        self._data = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._data[:4] != _DATA_MAGIC:
+            raise ValueError(f"{path} is not an indexed crawl archive")
+        magic, version, codec, self._count, self._table_size = _INDEX_HEADER.unpack_from(self._index, 0)
+        if magic != _INDEX_MAGIC or version != _VERSION:
+            raise ValueError(f"{path}.idx is not a compatible archive index")
+        self._codec = _Codec(codec)
+        self._table_offset = _INDEX_HEADER.size + self._count * _RECORD.size
+
+        (meta_length,) = _META_LENGTH.unpack_from(self._data, 4)
+        self.metadata: Dict[str, Any] = json.loads(self._data[8:8 + meta_length])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, ordinal: int) -> Tuple[int, ...]:
+        if not 0 <= ordinal < self._count:
+            raise IndexError(f"Page {ordinal} out of range (archive has {self._count} pages)")
+        return _RECORD.unpack_from(self._index, _INDEX_HEADER.size + ordinal * _RECORD.size)
+
+    def raw_block(self, ordinal: int, field: str = "markdown") -> memoryview:
+        """Zero-copy view of a page's compressed block ('meta', 'markdown' or 'html')."""
+        record = self._record(ordinal)
+        position = {"meta": 2, "markdown": 4, "html": 6}[field]
+        offset, length = record[position], record[position + 1]
+        return memoryview(self._data)[offset:offset + length]
+
+    def _text(self, ordinal: int, field: str, flag: int) -> Optional[str]:
+        if not self._record(ordinal)[1] & flag:
+            return None
+        block = self.raw_block(ordinal, field)
+        try:
+            return self._codec.decompress(block).decode("utf-8") if len(block) else ""
+        finally:
+            block.release()
+
+    def markdown(self, ordinal: int) -> Optional[str]:
+        """Decompress only the markdown of a page."""
+        return self._text(ordinal, "markdown", _HAS_MARKDOWN)
+
+    def html(self, ordinal: int) -> Optional[str]:
+        """Decompress only the html of a page."""
+        return self._text(ordinal, "html", _HAS_HTML)
+
+    def meta(self, ordinal: int) -> Dict[str, Any]:
+        """Decompress a page without its markdown and html."""
+        block = self.raw_block(ordinal, "meta")
+        try:
+            return json.loads(self._codec.decompress(block))
+        finally:
+            block.release()
+
+    def __getitem__(self, ordinal: int) -> Dict[str, Any]:
+        if ordinal < 0:
+            ordinal += self._count
+        page = self.meta(ordinal)
+        page["markdown"] = self.markdown(ordinal)
+        page["html"] = self.html(ordinal)
+        return page
+
+    def find(self, url: str) -> Optional[int]:
+        """Return the ordinal of the page stored under a URL, if any."""
+        digest = url_hash(url)
+        mask = self._table_size - 1
+        slot = digest & mask
+        canonical = _canonicalizer.canonicalize(url)
+
+        for _ in range(self._table_size):
+            slot_hash, ordinal_plus_one = _SLOT.unpack_from(self._index, self._table_offset + slot * _SLOT.size)
+            if not ordinal_plus_one:
+                return None
+            if slot_hash == digest:
+                ordinal = ordinal_plus_one - 1
+                stored_url = page_url(self.meta(ordinal))
+                # Guard against 64-bit hash collisions
+                if stored_url and _canonicalizer.canonicalize(stored_url) == canonical:
+                    return ordinal
+            slot = (slot + 1) & mask
+        return None
+
+    def get_by_url(self, url: str) -> Optional[Dict[str, Any]]:
+        ordinal = self.find(url)
+        return self[ordinal] if ordinal is not None else None
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for ordinal in range(self._count):
+            yield self[ordinal]
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+        self._data_file.close()
+        self._index_file.close()
+
+    def __enter__(self) -> "IndexedArchive":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def import_crawl_json(json_path: str, archive_path: str, codec: Optional[int] = None) -> int:
+    """Build an indexed archive from a ``crawl_result.json``-style document."""
+    metadata: Dict[str, Any] = {}
+    for kind, value in iter_json_document(json_path):
+        if kind == "item":
+            break
+        key, field_value = value
+        metadata[key] = field_value
+
+    with IndexedArchiveWriter(archive_path, metadata, codec=codec) as writer:
+        for page in iter_crawl_json_pages(json_path):
+            writer.add_page(page)
+        return writer.pages_written
+
+
+def import_crawl_archive(jsonl_path: str, archive_path: str, codec: Optional[int] = None) -> int:
+    """Build an indexed archive from a streaming ``crawl_archive`` file."""
+    metadata = {k: v for k, v in read_header(jsonl_path).items() if k not in ("_archive", "version")}
+    with IndexedArchiveWriter(archive_path, metadata, codec=codec) as writer:
+        for page in iter_pages(jsonl_path):
+            writer.add_page(page)
+        return writer.pages_written
+
+
+def export_crawl_json(archive_path: str, json_path: str) -> int:
+    """
+    Write an indexed archive back out in the ``crawl_result.json`` layout.
+
+    Pages are streamed one at a time. Returns the number of pages written.
+    """
+    with IndexedArchive(archive_path) as archive, open(json_path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for key, value in archive.metadata.items():
+            f.write(f"{json.dumps(key)}:{json.dumps(value, ensure_ascii=False)},")
+        f.write('"data":[')
+        for ordinal in range(len(archive)):
+            if ordinal:
+                f.write(",")
+            f.write(json.dumps(archive[ordinal], ensure_ascii=False))
+        f.write("]}")
+        return len(archive)
@@ -0,0 +1,216 @@
+"""
+Awaitable waiting for long-running FireCrawl jobs.
+
+Batch scrapes, crawls, extractions and llms.txt generation all follow the
+same pattern: start a job, then poll its status until it finishes. This
+module implements that loop once:
+
+- exactly one status call per tick
+- exponential backoff with jitter between ticks
+- an overall timeout per job
+- many jobs waited on concurrently on one event loop
+
+It only depends on the standard library so the example scripts can use it
+as well as the service.
+"""
+
+import asyncio
+import inspect
+import logging
+import random
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+StatusCheck = Callable[[str], Union[Any, Awaitable[Any]]]
+StatusCallback = Callable[[Any], Optional[bool]]
+
+
+class JobFailedError(Exception):
+    """Raised when a job finishes in a failed state."""
+
+    def __init__(self, job: "Job", status: Any):
+        self.job = job
+        self.status = status
+        error = _field(status, "error")
+        super().__init__(f"{job.name} job {job.id} failed" + (f": {error}" if error else ""))
+
+
+class JobWaitTimeoutError(TimeoutError):
+    """Raised when a job does not finish within the allowed time."""
+
+    def __init__(self, job: "Job", timeout: float, last_status: Any = None):
+        self.job = job
+        self.timeout = timeout
+        self.last_status = last_status
+        super().__init__(f"{job.name} job {job.id} did not finish within {timeout} seconds")
+
+
+class Job:
+    """
+    A pollable upstream job.
+
+    Args:
+        job_id: Upstream job ID
+        check_status: Callable taking the job ID and returning its status,
+            either directly or as an awaitable. Blocking callables run in the
+            default executor.
+        name: Human readable job type, used in logs and errors
+        done_statuses: Status values meaning the job finished successfully
+        failed_statuses: Status values meaning the job finished unsuccessfully
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        check_status: StatusCheck,
+        name: str = "FireCrawl",
+        done_statuses: Sequence[str] = ("completed",),
+        failed_statuses: Sequence[str] = ("failed", "cancelled"),
+    ):
+        self.id = job_id
+        self.check_status = check_status
+        self.name = name
+        self.done_statuses = tuple(done_statuses)
+        self.failed_statuses = tuple(failed_statuses)
+
+    async def poll(self) -> Any:
+        """Fetch the current status with a single upstream call."""
+        if inspect.iscoroutinefunction(self.check_status):
+            return await self.check_status(self.id)
+        result = await asyncio.get_running_loop().run_in_executor(None, self.check_status, self.id)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def state_of(self, status: Any) -> Optional[str]:
+        return _field(status, "status")
+
+    def is_done(self, status: Any) -> bool:
+        return self.state_of(status) in self.done_statuses
+
+    def is_failed(self, status: Any) -> bool:
+        return self.state_of(status) in self.failed_statuses
+
+    def __repr__(self) -> str:
+        return f"Job(name={self.name!r}, id={self.id!r})"
+
+
+def _field(status: Any, name: str) -> Any:
+    if isinstance(status, dict):
+        return status.get(name)
+    return getattr(status, name, None)
+
+
+async def wait_for(
+    job: Job,
+    timeout: Optional[float] = 300,
+    initial_delay: float = 1.0,
+    max_delay: float = 30.0,
+    backoff: float = 2.0,
+    jitter: float = 0.2,
+    max_consecutive_errors: int = 3,
+    raise_on_failure: bool = True,
+    on_status: Optional[StatusCallback] = None,
+) -> Any:
+    """
+    Wait for a job to finish and return its final status.
+
+    Args:
+        job: The job to wait for
+        timeout: Overall time limit in seconds, or None to wait indefinitely
+        initial_delay: Delay before the second status check
+        max_delay: Upper bound for the delay between checks
+        backoff: Multiplier applied to the delay after each unchanged check
+        jitter: Fractional random spread applied to every delay
+        max_consecutive_errors: Status check errors tolerated in a row
+        raise_on_failure: Raise JobFailedError for failed jobs instead of
+            returning their status
+        on_status: Called with every status. Returning True signals progress
+            and resets the delay to ``initial_delay``.
+
+    Raises:
+        JobWaitTimeoutError: The job did not finish within ``timeout``
+        JobFailedError: The job failed and ``raise_on_failure`` is set
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    delay = initial_delay
+    errors = 0
+    status = None
+
+    while True:
+        try:
+            status = await job.poll()
+            errors = 0
+        except Exception as e:
+            errors += 1
+            logger.warning(f"Status check for {job.name} job {job.id} failed ({errors}/{max_consecutive_errors}): {e}")
+            if errors >= max_consecutive_errors:
+                raise
+        else:
+            progressed = on_status(status) if on_status else False
+            if job.is_done(status):
+                return status
+            if job.is_failed(status):
+                if raise_on_failure:
+                    raise JobFailedError(job, status)
+                return status
+            if progressed:
+                delay = initial_delay
+
+        sleep_for = delay * random.uniform(1 - jitter, 1 + jitter)
+        if deadline is not None:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise JobWaitTimeoutError(job, timeout, status)
+            sleep_for = min(sleep_for, remaining)
+
+        await asyncio.sleep(sleep_for)
+        delay = min(delay * backoff, max_delay)
+
+
+async def wait_all(
+    jobs: Iterable[Job],
+    max_concurrency: Optional[int] = None,
+    return_exceptions: bool = False,
+    **kwargs: Any,
+) -> List[Any]:
+    """
+    Wait for many jobs concurrently and return their final statuses in order.
+
+    Args:
+        jobs: Jobs to wait for
+        max_concurrency: Maximum number of jobs polled at the same time
+        return_exceptions: Return errors in place of statuses instead of
+            raising the first one
+        **kwargs: Passed through to :func:`wait_for`
+    """
+    jobs = list(jobs)
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def _wait(job: Job) -> Any:
+        if semaphore is None:
+            return await wait_for(job, **kwargs)
+        async with semaphore:
+            return await wait_for(job, **kwargs)
+
+    return await asyncio.gather(*(_wait(job) for job in jobs), return_exceptions=return_exceptions)
+
+
+# Constructors for the FireCrawl job types
+
+def batch_scrape_job(app: Any, job_id: str) -> Job:
+    return Job(job_id, app.check_batch_scrape_status, name="batch scrape")
+
+
+def crawl_job(app: Any, job_id: str) -> Job:
+    return Job(job_id, app.check_crawl_status, name="crawl")
+
+
+def extract_job(app: Any, job_id: str) -> Job:
+    return Job(job_id, app.get_extract_status, name="extract")
+
+
+def llms_text_job(app: Any, job_id: str) -> Job:
+    return Job(job_id, app.check_generate_llms_text_status, name="llms.txt")
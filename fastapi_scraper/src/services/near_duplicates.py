@@ -0,0 +1,202 @@
+"""
+Near-duplicate page detection with 64-bit SimHash.
+
+Documentation crawls return versioned copies, language variants and print
+views of the same page. Each page gets a SimHash over 3-gram shingles of its
+whitespace-separated words; pages whose signatures differ in at most
+``max_distance`` bits are near-duplicates. Candidate pairs are found with LSH banding: the signature
+is split into ``max_distance + 1`` bands, and by the pigeonhole principle two
+signatures within the distance share at least one band exactly.
+
+Signature computation is bit-sliced: all shingle hashes of a page are packed
+into one byte buffer, each byte column is loaded into a big integer, and
+every bit position is tallied with a mask and a popcount, instead of
+looping over 64 bits per shingle in Python.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:  # Python < 3.10
+    def _popcount(value: int) -> int:
+        return bin(value).count("1")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return _popcount(a ^ b)
+
+
+class SimHasher:
+    """
+    Compute SimHash signatures for batches of documents.
+
+    Token hashes are stable across processes (blake2b), and are memoised per
+    hasher so a crawl's shared vocabulary is hashed once.
+    """
+
+    def __init__(self, shingle_size: int = 3, max_vocabulary: int = 500000):
+        self.shingle_size = shingle_size
+        self.max_vocabulary = max_vocabulary
+        self._token_hashes: Dict[str, int] = {}
+
+    def _token_hashes_for(self, tokens: List[str]) -> List[int]:
+        cache = self._token_hashes
+        hashes = list(map(cache.get, tokens))
+        if None in hashes:
+            if len(cache) + len(tokens) > self.max_vocabulary:
+                cache.clear()
+            for token in set(tokens).difference(cache):
+                digest = blake2b(token.encode("utf-8"), digest_size=8).digest()
+                cache[token] = int.from_bytes(digest, "little")
+            hashes = list(map(cache.__getitem__, tokens))
+        return hashes
+
+    def _shingle_hashes(self, text: str) -> List[int]:
+        hashes = self._token_hashes_for(text.lower().split())
+        # Tuple hashing of ints is not salted, so shingle hashes are stable too
+        size = min(self.shingle_size, len(hashes))
+        columns = [hashes[offset:] for offset in range(size)]
+        return list(set(map(hash, zip(*columns))))
+
+    def signature(self, text: str) -> int:
+        """SimHash of one document (0 for documents without words)."""
+        shingles = self._shingle_hashes(text)
+        if not shingles:
+            return 0
+
+        count = len(shingles)
+        half = count / 2
+        packed = array("q", shingles).tobytes()
+        # masks[bit] selects that bit from every byte of a column
+        masks = [int.from_bytes(bytes((1 << bit,)) * count, "little") for bit in range(8)]
+        signature = 0
+        # With little-endian packing, column i of the buffer holds bits
+        # 8i..8i+7 of every shingle; one AND + popcount tallies a bit position
+        for column in range(8):
+            column_bits = int.from_bytes(packed[column::8], "little")
+            for bit, mask in enumerate(masks):
+                if _popcount(column_bits & mask) > half:
+                    signature |= 1 << (column * 8 + bit)
+        return signature
+
+    def signatures(self, texts: Iterable[str]) -> List[int]:
+        return [self.signature(text) for text in texts]
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over SimHash signatures.
+
+    Args:
+        max_distance: Maximum Hamming distance for two pages to count as
+            near-duplicates
+        max_entries: Oldest entries are evicted beyond this size
+    """
+
+    def __init__(self, max_distance: int = 3, max_entries: int = 100000):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.bands = max_distance + 1
+        self._band_bits = 64 // self.bands
+        self._band_mask = (1 << self._band_bits) - 1
+        self._signatures: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._buckets: List[Dict[int, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_values(self, signature: int) -> List[int]:
+        bits, mask = self._band_bits, self._band_mask
+        return [(signature >> (band * bits)) & mask for band in range(self.bands)]
+
+    def add(self, key: Hashable, signature: int) -> None:
+        with self._lock:
+            if key in self._signatures:
+                self.remove(key)
+            self._signatures[key] = signature
+            for buckets, value in zip(self._buckets, self._band_values(signature)):
+                buckets.setdefault(value, []).append(key)
+            while len(self._signatures) > self.max_entries:
+                self.remove(next(iter(self._signatures)))
+
+    def remove(self, key: Hashable) -> bool:
+        with self._lock:
+            signature = self._signatures.pop(key, None)
+            if signature is None:
+                return False
+            for buckets, value in zip(self._buckets, self._band_values(signature)):
+                bucket = buckets.get(value)
+                if bucket is not None:
+                    bucket.remove(key)
+                    if not bucket:
+                        del buckets[value]
+            return True
+
+    def matches(self, signature: int) -> List[Tuple[Hashable, int]]:
+        """Keys within ``max_distance`` of a signature, closest first."""
+        with self._lock:
+            seen = set()
+            found = []
+            for buckets, value in zip(self._buckets, self._band_values(signature)):
+                for key in buckets.get(value, ()):
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    distance = hamming_distance(signature, self._signatures[key])
+                    if distance <= self.max_distance:
+                        found.append((key, distance))
+            found.sort(key=lambda item: item[1])
+            return found
+
+
+def cluster_signatures(
+    signatures: Sequence[int],
+    max_distance: int = 3,
+    sizes: Optional[Sequence[int]] = None,
+) -> List[int]:
+    """
+    Group signatures into near-duplicate clusters.
+
+    Returns, for every input position, the position of its cluster's
+    representative: the largest member by ``sizes`` (earliest on ties), or
+    the earliest member when no sizes are given. Clusters are transitive, so
+    a chain of close pages ends up in one cluster.
+    """
+    parent = list(range(len(signatures)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    index = NearDuplicateIndex(max_distance=max_distance, max_entries=len(signatures) + 1)
+    first_by_signature: Dict[int, int] = {}
+    for position, signature in enumerate(signatures):
+        # Exact repeats join directly and stay out of the LSH buckets
+        exact = first_by_signature.get(signature)
+        if exact is not None:
+            parent[find(position)] = find(exact)
+            continue
+        first_by_signature[signature] = position
+
+        root = find(position)
+        for other, _ in index.matches(signature):
+            other_root = find(other)
+            if other_root != root:
+                parent[other_root] = root
+        index.add(position, signature)
+
+    best: Dict[int, int] = {}
+    for position in range(len(signatures)):
+        root = find(position)
+        current = best.get(root)
+        if current is None or (sizes is not None and sizes[position] > sizes[current]):
+            best[root] = position
+    return [best[find(position)] for position in range(len(signatures))]
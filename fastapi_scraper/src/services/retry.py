@@ -0,0 +1,165 @@
+"""
+Retries for upstream calls: error classification, backoff with jitter and deadlines.
+
+A transient upstream error (a dropped connection, a 502 from a gateway, a
+429) used to fail the whole request, and clients retried it from scratch.
+Retrying here, with exponential backoff and full jitter so that retries from
+many requests do not arrive together, hides most of these errors. The
+deadline bounds the total time a call may take, including its retries.
+
+Calls that start a paid job are not idempotent. They are only retried when
+the upstream certainly did not act on the request, so a retry cannot start
+a second job.
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import requests
+from fastapi import HTTPException
+
+from .adaptive_concurrency import retry_after_of
+from .circuit_breaker import status_code_of
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statuses worth retrying for calls that are safe to repeat
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Statuses meaning the upstream refused the request without acting on it
+REFUSED_STATUSES = frozenset({429, 503})
+
+
+def is_retryable(exc: BaseException, idempotent: bool = True) -> bool:
+    """
+    Whether an upstream call that raised ``exc`` may be tried again.
+
+    Args:
+        exc: The error the call raised
+        idempotent: Repeating the call cannot duplicate its effect
+
+    Returns:
+        True for transient errors. A non-idempotent call is only retried if
+        the request never reached the upstream or was refused outright.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    code = status_code_of(exc)
+    if code is not None:
+        return code in (RETRYABLE_STATUSES if idempotent else REFUSED_STATUSES)
+    return idempotent and isinstance(
+        exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    )
+
+
+def may_have_acted(exc: BaseException) -> bool:
+    """
+    Whether a failed call may still have taken effect upstream.
+
+    True when the outcome is unknown: the call timed out or was cancelled
+    while its request may already have been sent (the SDK call keeps running
+    in its thread), the connection broke after connecting, or the upstream
+    answered with a 5xx other than a refusal. Wrapped errors, such as the
+    service's own exceptions, are followed through their cause and context.
+
+    Args:
+        exc: The error the call raised
+
+    Returns:
+        False only when the upstream certainly did not act on the request
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, (asyncio.TimeoutError, asyncio.CancelledError)):
+            return True
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return False
+        # This service's own errors carry the status sent to the client, not
+        # an upstream one; what they wrap decides
+        code = None if isinstance(exc, HTTPException) else status_code_of(exc)
+        if code is not None:
+            return code >= 500 and code not in REFUSED_STATUSES
+        if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+class RetryPolicy:
+    """
+    How often and how long to retry a call.
+
+    Args:
+        max_attempts: Attempts in total, including the first
+        base_delay: Backoff before the first retry, doubled for each further one
+        max_delay: Upper bound for a single backoff
+        deadline: Seconds the call may take in total, or None for no limit
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        deadline: Optional[float] = None
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, retry: int) -> float:
+        """Delay before retry number ``retry`` (from 1), with full jitter."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+
+async def retry_call(
+    attempt: Callable[[Optional[float]], Awaitable[T]],
+    policy: RetryPolicy,
+    idempotent: bool = True,
+    operation: str = "call",
+    on_retry: Optional[Callable[[BaseException], None]] = None
+) -> T:
+    """
+    Run ``attempt`` until it succeeds, fails for good or runs out of time.
+
+    An upstream ``Retry-After`` longer than the backoff is waited out, unless
+    it would pass the deadline.
+
+    Args:
+        attempt: Makes one attempt; called with the seconds left before the
+            deadline, or None
+        policy: Attempts, backoff and deadline
+        idempotent: The call is safe to repeat
+        operation: Name of the call, for logging
+        on_retry: Called with the error before each retry
+
+    Returns:
+        The first successful attempt's result
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + policy.deadline if policy.deadline else None
+
+    for number in itertools.count(1):
+        remaining = deadline - loop.time() if deadline is not None else None
+        try:
+            return await attempt(remaining)
+        except Exception as e:
+            if number >= policy.max_attempts or not is_retryable(e, idempotent):
+                raise
+            delay = max(policy.backoff(number), retry_after_of(e) or 0.0)
+            if deadline is not None and loop.time() + delay >= deadline:
+                raise
+            logger.info(
+                f"Retrying {operation} in {delay:.2f}s "
+                f"(attempt {number + 1}/{policy.max_attempts}): {e}"
+            )
+            if on_retry:
+                on_retry(e)
+            await asyncio.sleep(delay)
@@ -0,0 +1,194 @@
+"""
+Compiled-schema cache for client-supplied JSON schemas.
+
+Extraction requests carry a JSON schema describing the expected output. The
+schema is hashed, converted to a pydantic model once and wrapped in a
+``TypeAdapter`` so every later request using the same schema reuses the
+compiled validator.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Annotated, Any, Dict, List, Literal, Optional, Tuple, Union
+
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, create_model
+
+from ..exceptions import ValidationException
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_PRIMITIVE_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    """Stable hash of a JSON schema, independent of key order."""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _one_of(values: List[Any]) -> Any:
+    """Type accepting exactly ``values``, which may include objects and arrays."""
+    if values and all(isinstance(value, (str, int, float, bool, type(None))) for value in values):
+        return Literal[tuple(values)]
+
+    # Literal types must be hashable; objects and arrays are compared by equality instead
+    def check(value: Any) -> Any:
+        if value not in values:
+            raise ValueError(f"Input should be one of {json.dumps(values)}")
+        return value
+
+    return Annotated[Any, AfterValidator(check)]
+
+
+class _SchemaConverter:
+    """Translate a JSON schema into pydantic types."""
+
+    def __init__(self, root: Dict[str, Any]):
+        self.definitions = {**root.get("definitions", {}), **root.get("$defs", {})}
+        self._resolved: Dict[str, Any] = {}
+        self._resolving: set = set()
+
+    def convert(self, schema: Dict[str, Any], name: str) -> Any:
+        if not isinstance(schema, dict) or not schema:
+            return Any
+
+        if "$ref" in schema:
+            return self._resolve_ref(schema["$ref"])
+
+        if "enum" in schema:
+            return _one_of(schema["enum"])
+
+        if "const" in schema:
+            return _one_of([schema["const"]])
+
+        for combinator in ("anyOf", "oneOf"):
+            if combinator in schema:
+                options = tuple(
+                    self.convert(option, f"{name}Option{i}")
+                    for i, option in enumerate(schema[combinator])
+                )
+                return Union[options] if len(options) > 1 else options[0]
+
+        if "allOf" in schema and len(schema["allOf"]) == 1:
+            return self.convert(schema["allOf"][0], name)
+
+        schema_type = schema.get("type")
+        if isinstance(schema_type, list):
+            options = tuple(self.convert({**schema, "type": t}, name) for t in schema_type)
+            return Union[options] if len(options) > 1 else options[0]
+
+        if schema_type == "object" or "properties" in schema:
+            return self._convert_object(schema, name)
+
+        if schema_type == "array":
+            return List[self.convert(schema.get("items", {}), f"{name}Item")]
+
+        return _PRIMITIVE_TYPES.get(schema_type, Any)
+
+    def _resolve_ref(self, ref: str) -> Any:
+        ref_name = ref.rsplit("/", 1)[-1]
+        if ref_name in self._resolved:
+            return self._resolved[ref_name]
+        if ref_name in self._resolving or ref_name not in self.definitions:
+            # Recursive or dangling references are accepted without validation
+            return Any
+
+        self._resolving.add(ref_name)
+        resolved = self.convert(self.definitions[ref_name], ref_name)
+        self._resolving.discard(ref_name)
+        self._resolved[ref_name] = resolved
+        return resolved
+
+    def _convert_object(self, schema: Dict[str, Any], name: str) -> Any:
+        properties = schema.get("properties")
+        if not properties:
+            additional = schema.get("additionalProperties")
+            value_type = self.convert(additional, f"{name}Value") if isinstance(additional, dict) else Any
+            return Dict[str, value_type]
+
+        required = set(schema.get("required", []))
+        fields: Dict[str, Tuple[Any, Any]] = {}
+        for index, (key, prop) in enumerate(properties.items()):
+            field_type = self.convert(prop, f"{name}_{key}")
+            # Property names need not be valid identifiers, so always alias
+            field_name = f"field_{index}"
+            if key in required:
+                fields[field_name] = (field_type, Field(..., alias=key))
+            else:
+                fields[field_name] = (Optional[field_type], Field(default=None, alias=key))
+
+        model_name = "".join(ch for ch in schema.get("title", name) if ch.isalnum()) or "ExtractModel"
+        return create_model(
+            model_name,
+            __config__=ConfigDict(populate_by_name=True, extra="allow"),
+            **fields
+        )
+
+
+class CompiledSchema:
+    """A JSON schema together with its compiled validator."""
+
+    def __init__(self, schema: Dict[str, Any], digest: str):
+        self.schema = schema
+        self.hash = digest
+        self.adapter: TypeAdapter = TypeAdapter(_SchemaConverter(schema).convert(schema, "ExtractModel"))
+
+    def validate(self, data: Any) -> Tuple[Any, List[str]]:
+        """
+        Validate extracted data against the schema.
+
+        Returns:
+            A tuple of (validated data as plain JSON types, list of error
+            messages). Invalid data is returned unchanged alongside the errors.
+        """
+        try:
+            validated = self.adapter.validate_python(data)
+        except ValidationError as e:
+            errors = [
+                f"{' -> '.join(str(x) for x in error['loc']) or 'root'}: {error['msg']}"
+                for error in e.errors()
+            ]
+            return data, errors
+
+        if isinstance(validated, BaseModel) or isinstance(validated, (list, dict)):
+            return self.adapter.dump_python(validated, mode="json", by_alias=True), []
+        return validated, []
+
+
+class SchemaCache:
+    """Cache of compiled schemas keyed by schema hash."""
+
+    def __init__(self, max_entries: int = 256):
+        self._compiled: TTLCache[CompiledSchema] = TTLCache(max_entries=max_entries, ttl=None)
+
+    def compile(self, schema: Dict[str, Any]) -> CompiledSchema:
+        """
+        Return the compiled form of a schema, compiling it on first use.
+
+        Raises:
+            ValidationException: The schema cannot be turned into a validator
+        """
+        digest = schema_hash(schema)
+        compiled = self._compiled.get(digest)
+        if compiled is None:
+            logger.debug(f"Compiling extract schema {digest[:12]}")
+            try:
+                compiled = CompiledSchema(schema, digest)
+            except (TypeError, ValueError) as e:
+                raise ValidationException(f"Unsupported JSON schema: {e}", field="schema")
+            self._compiled.set(digest, compiled)
+        return compiled
+
+    def get(self, digest: str) -> Optional[CompiledSchema]:
+        return self._compiled.get(digest)
+
+    def stats(self) -> dict:
+        return self._compiled.stats()
@@ -0,0 +1,279 @@
+"""
+In-process BM25 full-text index over scraped markdown.
+
+Lets clients search inside sites that have already been crawled or scraped
+without paying for a web search. Documents are keyed by URL; adding a URL
+again replaces the previous version, so re-crawls update the index in place.
+"""
+
+import heapq
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the "
+    "this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens, without stop words."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOP_WORDS]
+
+
+class _Document(NamedTuple):
+    url: str
+    title: str
+    description: Optional[str]
+    markdown: str
+
+
+class SearchHit(NamedTuple):
+    url: str
+    title: str
+    description: Optional[str]
+    markdown: str
+    score: float
+    snippet: str
+
+
+class SearchIndex:
+    """
+    BM25 inverted index with incremental add and remove.
+
+    Postings are stored per term as two parallel ``array('I')`` columns
+    (document ids and term frequencies). Removed documents are tombstoned
+    and the postings are compacted once tombstones pass a threshold.
+
+    Very common terms are scored from an impact-ordered prefix of their
+    postings (the ``impact_limit`` documents where the term contributes most),
+    cached until the index changes. This keeps query latency flat on large
+    indexes at the cost of approximate ranking for queries made only of
+    common terms.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        compact_ratio: float = 0.25,
+        impact_limit: int = 5000,
+    ):
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self.impact_limit = impact_limit
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._documents: List[Optional[_Document]] = []
+        self._lengths = array("I")
+        self._ids: Dict[str, int] = {}
+        self._deleted: Set[int] = set()
+        self._total_length = 0
+        self._generation = 0
+        self._impacts: Dict[str, Tuple[int, List[Tuple[int, float]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._ids
+
+    def add(self, url: str, markdown: str, title: str = "", description: Optional[str] = None) -> None:
+        """Index a document, replacing any earlier version stored under the same URL."""
+        terms = Counter(tokenize(f"{title}\n{markdown}"))
+        with self._lock:
+            if url in self._ids:
+                self._remove(url)
+                self._maybe_compact()
+
+            doc_id = len(self._documents)
+            self._documents.append(_Document(url, title, description, markdown))
+            length = sum(terms.values())
+            self._lengths.append(length)
+            self._total_length += length
+            self._ids[url] = doc_id
+            self._generation += 1
+
+            for term, tf in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("I"))
+                postings[0].append(doc_id)
+                postings[1].append(tf)
+
+    def remove(self, url: str) -> bool:
+        """Remove a document. Returns False if the URL was not indexed."""
+        with self._lock:
+            if url not in self._ids:
+                return False
+            self._remove(url)
+            self._maybe_compact()
+            return True
+
+    def _remove(self, url: str) -> None:
+        doc_id = self._ids.pop(url)
+        self._generation += 1
+        self._deleted.add(doc_id)
+        self._documents[doc_id] = None
+        self._total_length -= self._lengths[doc_id]
+
+    def _maybe_compact(self) -> None:
+        if len(self._deleted) > self.compact_ratio * max(len(self._documents), 1):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Renumber live documents and drop tombstoned postings."""
+        remap = array("I", [0]) * len(self._documents)
+        documents: List[Optional[_Document]] = []
+        lengths = array("I")
+        for old_id, document in enumerate(self._documents):
+            if document is None:
+                continue
+            remap[old_id] = len(documents)
+            documents.append(document)
+            lengths.append(self._lengths[old_id])
+
+        deleted = self._deleted
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (doc_ids, tfs) in self._postings.items():
+            new_ids, new_tfs = array("I"), array("I")
+            for doc_id, tf in zip(doc_ids, tfs):
+                if doc_id not in deleted:
+                    new_ids.append(remap[doc_id])
+                    new_tfs.append(tf)
+            if new_ids:
+                postings[term] = (new_ids, new_tfs)
+
+        self._postings = postings
+        self._documents = documents
+        self._lengths = lengths
+        self._ids = {document.url: doc_id for doc_id, document in enumerate(documents)}
+        self._deleted = set()
+        self._impacts = {}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def search(self, query: str, limit: int = 10, snippet_chars: int = 200) -> List[SearchHit]:
+        """Return the best ``limit`` documents for a query, best first."""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            live_docs = len(self._ids)
+            if not query_terms or not live_docs:
+                return []
+
+            average_length = self._total_length / live_docs or 1.0
+
+            scores: Dict[int, float] = {}
+            get_score = scores.get
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                if len(postings[0]) > self.impact_limit:
+                    contributions = self._impact_prefix(term, postings, live_docs, average_length)
+                else:
+                    contributions = self._contributions(postings, live_docs, average_length)
+                for doc_id, contribution in contributions:
+                    scores[doc_id] = get_score(doc_id, 0.0) + contribution
+
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            documents = [(self._documents[doc_id], score) for doc_id, score in best]
+
+        highlighter = re.compile(
+            r"\b(" + "|".join(re.escape(term) for term in query_terms) + r")\b",
+            re.IGNORECASE
+        )
+        return [
+            SearchHit(
+                url=document.url,
+                title=document.title,
+                description=document.description,
+                markdown=document.markdown,
+                score=round(score, 4),
+                snippet=make_snippet(document.markdown, highlighter, snippet_chars)
+            )
+            for document, score in documents
+        ]
+
+    def _contributions(
+        self,
+        postings: Tuple[array, array],
+        live_docs: int,
+        average_length: float
+    ) -> List[Tuple[int, float]]:
+        """BM25 contribution of one term to every live document containing it."""
+        doc_ids, tfs = postings
+        deleted = self._deleted
+        if deleted:
+            # Tombstoned postings must not count towards df, or idf can go negative
+            live = [(doc_id, tf) for doc_id, tf in zip(doc_ids, tfs) if doc_id not in deleted]
+            df = len(live)
+        else:
+            live = zip(doc_ids, tfs)
+            df = len(doc_ids)
+        idf = math.log(1 + (live_docs - df + 0.5) / (df + 0.5))
+        k1, b, lengths = self.k1, self.b, self._lengths
+        idf_k1 = idf * (k1 + 1)
+        base_norm = k1 * (1 - b)
+        length_norm = k1 * b / average_length
+        return [
+            (doc_id, idf_k1 * tf / (tf + base_norm + length_norm * lengths[doc_id]))
+            for doc_id, tf in live
+        ]
+
+    def _impact_prefix(
+        self,
+        term: str,
+        postings: Tuple[array, array],
+        live_docs: int,
+        average_length: float
+    ) -> List[Tuple[int, float]]:
+        """The highest-impact postings of a common term, cached per index generation."""
+        cached = self._impacts.get(term)
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
+
+        contributions = self._contributions(postings, live_docs, average_length)
+        prefix = heapq.nlargest(self.impact_limit, contributions, key=lambda item: item[1])
+        if len(self._impacts) > 10000:
+            self._impacts.clear()
+        self._impacts[term] = (self._generation, prefix)
+        return prefix
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "documents": len(self._ids),
+                "terms": len(self._postings),
+                "tombstones": len(self._deleted),
+                "postings": sum(len(ids) for ids, _ in self._postings.values()),
+            }
+
+
+def make_snippet(text: str, highlighter: "re.Pattern", max_chars: int = 200) -> str:
+    """Cut a window around the first query match and wrap matches in ``**``."""
+    match = highlighter.search(text)
+    if match is None:
+        window = text[:max_chars]
+        prefix, suffix = "", "..." if len(text) > max_chars else ""
+    else:
+        start = max(0, match.start() - max_chars // 3)
+        end = min(len(text), start + max_chars)
+        window = text[start:end]
+        prefix = "..." if start > 0 else ""
+        suffix = "..." if end < len(text) else ""
+
+    window = " ".join(window.split())
+    return prefix + highlighter.sub(r"**\1**", window) + suffix
@@ -0,0 +1,417 @@
+"""
+Shared state for the service layer: job records, result caches and rate limits.
+
+A single worker keeps everything in process memory. Under gunicorn with
+several workers each process would only see its own jobs, so a status poll
+routed to another worker would 404. The SQLite backend keeps this state in
+one file shared by every worker on the host, in WAL mode so readers never
+block the writer.
+
+Job records are pickled. Values that only make sense in the process that
+created them, such as asyncio primitives and tasks (``LOCAL_KEYS``), stay in
+that process and are merged back into the records it reads.
+"""
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterator, Optional
+
+from ..exceptions import ConfigurationException
+from .cache import TTLCache, _MISSING
+
+# Job record keys that are never shared between processes
+LOCAL_KEYS = ("changed", "task", "indexed")
+
+
+class JobStore:
+    """
+    In-process job records, the single-worker default.
+
+    Records untouched for ``retention`` seconds are purged.
+    """
+
+    def __init__(self, retention: float = 86400):
+        self.retention = retention
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._updated: Dict[str, float] = {}
+        self._writes = 0
+
+    def get(self, job_id: str, default: Any = None) -> Any:
+        return self._jobs.get(job_id, default)
+
+    def __getitem__(self, job_id: str) -> Dict[str, Any]:
+        record = self.get(job_id)
+        if record is None:
+            raise KeyError(job_id)
+        return record
+
+    def __setitem__(self, job_id: str, record: Dict[str, Any]) -> None:
+        self._jobs[job_id] = record
+        self._updated[job_id] = time.time()
+        self._writes += 1
+        if self._writes % 500 == 0:
+            self.purge()
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def set_local(self, job_id: str, **values: Any) -> None:
+        """Attach process-local values (see ``LOCAL_KEYS``) to a stored record."""
+        record = self._jobs.get(job_id)
+        if record is not None:
+            record.update(values)
+
+    def pop(self, job_id: str, default: Any = None) -> Any:
+        self._updated.pop(job_id, None)
+        return self._jobs.pop(job_id, default)
+
+    def purge(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, updated in self._updated.items() if updated < cutoff]:
+            self.pop(job_id)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._jobs))
+
+
+class RateLimiter:
+    """Fixed-window request counter per key, kept in process memory."""
+
+    def __init__(self):
+        self._windows: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: int) -> int:
+        """
+        Count one request against ``key``.
+
+        Args:
+            key: Client or bucket identifier
+            limit: Requests allowed per window
+            window: Window length in seconds
+
+        Returns:
+            0 if the request is allowed, otherwise the seconds until the
+            window resets
+        """
+        now = time.time()
+        start = now - now % window
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or entry[0] != start:
+                # Drop stale windows now and then so idle clients do not accumulate
+                if len(self._windows) > 10000:
+                    self._windows = {k: v for k, v in self._windows.items() if v[0] == start}
+                entry = self._windows[key] = [start, 0]
+            entry[1] += 1
+            count = entry[1]
+        return 0 if count <= limit else max(1, int(start + window - now + 0.999))
+
+
+class StateBackend:
+    """
+    Process-local state backend.
+
+    Args:
+        job_retention: Seconds an untouched job record is kept
+
+    Attributes:
+        jobs: Job records keyed by job ID
+        rate_limiter: Request counters for the API rate limit
+    """
+
+    name = "memory"
+
+    def __init__(self, job_retention: float = 86400):
+        self.jobs = JobStore(retention=job_retention)
+        self.rate_limiter = RateLimiter()
+
+    def cache(self, namespace: str, max_entries: int = 1024, ttl: Optional[float] = 3600) -> TTLCache:
+        """A result cache; ``namespace`` keeps caches apart in shared backends."""
+        return TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def close(self) -> None:
+        pass
+
+
+class _Database:
+    """
+    One SQLite connection per process, reopened after a fork.
+
+    gunicorn with ``preload_app`` imports the app in the master before forking
+    workers, and an SQLite connection must never cross a fork.
+
+    Claims and counters use ``INSERT ... ON CONFLICT DO UPDATE`` (SQLite
+    3.24+), checked when the backend is created.
+    """
+
+    MIN_SQLITE_VERSION = (3, 24, 0)
+
+    def __init__(self, path: str):
+        if sqlite3.sqlite_version_info < self.MIN_SQLITE_VERSION:
+            raise ConfigurationException(
+                f"the sqlite state backend needs SQLite "
+                f"{'.'.join(map(str, self.MIN_SQLITE_VERSION))} or newer, found {sqlite3.sqlite_version}"
+            )
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self.lock = threading.RLock()
+
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, type TEXT, record BLOB NOT NULL, updated_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS jobs_updated ON jobs (updated_at);"
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key));"
+                "CREATE INDEX IF NOT EXISTS cache_accessed ON cache (namespace, accessed_at);"
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                " key TEXT PRIMARY KEY, window_start REAL NOT NULL, count INTEGER NOT NULL);"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def execute(self, sql: str, params: tuple = ()) -> list:
+        """Run a statement and return all result rows."""
+        with self.lock:
+            return self.connection().execute(sql, params).fetchall()
+
+    def changes(self, sql: str, params: tuple = ()) -> int:
+        """Run a statement and return the number of rows it inserted, updated or deleted."""
+        with self.lock:
+            return self.connection().execute(sql, params).rowcount
+
+    def fetchone(self, sql: str, params: tuple = ()) -> Optional[tuple]:
+        rows = self.execute(sql, params)
+        return rows[0] if rows else None
+
+    def close(self) -> None:
+        with self.lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job records shared by every worker through SQLite.
+
+    Records are copies: callers must store a record again after changing it.
+    Records untouched for ``retention`` seconds are purged.
+    """
+
+    def __init__(self, db: _Database, retention: float = 86400):
+        super().__init__(retention=retention)
+        self.db = db
+        self._local: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, job_id: str, default: Any = None) -> Any:
+        row = self.db.fetchone("SELECT record FROM jobs WHERE id = ?", (job_id,))
+        if row is None:
+            return default
+        record = pickle.loads(row[0])
+        record.update(self._local.get(job_id, {}))
+        return record
+
+    def __setitem__(self, job_id: str, record: Dict[str, Any]) -> None:
+        shared = {k: v for k, v in record.items() if k not in LOCAL_KEYS}
+        local = {k: v for k, v in record.items() if k in LOCAL_KEYS}
+        if local:
+            self._local[job_id] = local
+        self.db.execute(
+            "INSERT OR REPLACE INTO jobs (id, type, record, updated_at) VALUES (?, ?, ?, ?)",
+            (job_id, record.get("type"), pickle.dumps(shared, pickle.HIGHEST_PROTOCOL), time.time())
+        )
+        self._writes += 1
+        if self._writes % 500 == 0:
+            self.purge()
+
+    def set_local(self, job_id: str, **values: Any) -> None:
+        self._local.setdefault(job_id, {}).update(values)
+
+    def pop(self, job_id: str, default: Any = None) -> Any:
+        record = self.get(job_id, default)
+        self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self._local.pop(job_id, None)
+        return record
+
+    def purge(self) -> None:
+        cutoff = time.time() - self.retention
+        with self.db.lock:
+            expired = [row[0] for row in self.db.execute("SELECT id FROM jobs WHERE updated_at < ?", (cutoff,))]
+            self.db.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+        for job_id in expired:
+            self._local.pop(job_id, None)
+
+    def __len__(self) -> int:
+        return self.db.fetchone("SELECT COUNT(*) FROM jobs")[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self.db.execute("SELECT id FROM jobs")])
+
+
+class SQLiteTTLCache(TTLCache):
+    """``TTLCache`` stored in SQLite, so every worker shares its entries."""
+
+    def __init__(self, db: _Database, namespace: str, max_entries: int = 1024, ttl: Optional[float] = 3600):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.db = db
+        self.namespace = namespace
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self.db.lock:
+            row = self.db.fetchone(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, self._key(key))
+            )
+            if row is None or (row[1] and row[1] < now):
+                self.misses += 1
+                return default
+            self.db.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, self._key(key))
+            )
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self.db.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, self._key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                 now + ttl if ttl else 0.0, now)
+            )
+            self._evict()
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> bool:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        with self.db.lock:
+            # A single statement, so two workers cannot both claim the key
+            added = self.db.changes(
+                "INSERT INTO cache (namespace, key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (namespace, key) DO UPDATE SET"
+                "  value = excluded.value, expires_at = excluded.expires_at, accessed_at = excluded.accessed_at"
+                " WHERE cache.expires_at != 0 AND cache.expires_at < excluded.accessed_at",
+                (self.namespace, self._key(key), pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                 now + ttl if ttl else 0.0, now)
+            ) > 0
+            if added:
+                self._evict()
+        return added
+
+    def _evict(self) -> None:
+        """Keep the most recently used ``max_entries`` entries."""
+        self.db.execute(
+            "DELETE FROM cache WHERE namespace = ? AND key IN ("
+            " SELECT key FROM cache WHERE namespace = ?"
+            " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_entries)
+        )
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self.db.lock:
+            value = self.get(key, _MISSING)
+            self.db.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, self._key(key))
+            )
+        return default if value is _MISSING else value
+
+    def __len__(self) -> int:
+        return self.db.fetchone(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+        )[0]
+
+    def clear(self) -> None:
+        self.db.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> dict:
+        return {**super().stats(), "entries": len(self)}
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """Fixed-window counters shared by every worker."""
+
+    def __init__(self, db: _Database):
+        super().__init__()
+        self.db = db
+
+    def hit(self, key: str, limit: int, window: int) -> int:
+        now = time.time()
+        start = now - now % window
+        with self.db.lock:
+            # Count and read back in one write transaction, so no other
+            # worker's hit lands in between
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute(
+                    "INSERT INTO rate_limits (key, window_start, count) VALUES (?, ?, 1)"
+                    " ON CONFLICT (key) DO UPDATE SET"
+                    "  count = CASE WHEN window_start = excluded.window_start THEN count + 1 ELSE 1 END,"
+                    "  window_start = excluded.window_start",
+                    (key, start)
+                )
+                count = self.db.fetchone("SELECT count FROM rate_limits WHERE key = ?", (key,))[0]
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+        return 0 if count <= limit else max(1, int(start + window - now + 0.999))
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    State shared by all worker processes on one host.
+
+    Args:
+        path: SQLite file
+        job_retention: Seconds an untouched job record is kept
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, job_retention: float = 86400):
+        self.db = _Database(path)
+        self.jobs = SQLiteJobStore(self.db, retention=job_retention)
+        self.rate_limiter = SQLiteRateLimiter(self.db)
+
+    def cache(self, namespace: str, max_entries: int = 1024, ttl: Optional[float] = 3600) -> TTLCache:
+        return SQLiteTTLCache(self.db, namespace, max_entries=max_entries, ttl=ttl)
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def create_state_backend() -> StateBackend:
+    """Create the backend selected by ``SCRAPER_STATE_BACKEND``."""
+    from ..config import settings
+
+    if settings.state_backend == "sqlite":
+        return SQLiteStateBackend(settings.state_path, job_retention=settings.job_retention)
+    return StateBackend(job_retention=settings.job_retention)
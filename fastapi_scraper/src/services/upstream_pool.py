@@ -0,0 +1,138 @@
+"""
+Pool of FireCrawl endpoints: several API keys and/or self-hosted instances.
+
+One API key caps throughput at that key's rate limit, and one instance is a
+single point of failure. The pool spreads calls over every configured
+(base URL, API key) pair. Each endpoint has its own circuit breaker and its
+own adaptive concurrency limit, so aggregate throughput grows with the number
+of endpoints and a failing endpoint is ejected without affecting the others.
+
+Calls go to the endpoint with the lowest ``(in flight + 1) * latency`` score,
+where latency is an EWMA of each call's time relative to the median for its
+operation. That way endpoints that only served quick status polls do not
+look faster than ones that served slow scrapes. An ejected endpoint (open
+circuit) is skipped until its recovery timeout passes. It is then
+reinstated through a half-open probe call.
+
+Jobs exist only on the endpoint that started them. The pool remembers each
+job's endpoint, in the state backend so every worker can find it, and pins
+the job's status polls to it.
+"""
+
+import random
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from .adaptive_concurrency import AdaptiveLimiter
+from .cache import TTLCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, is_upstream_failure, status_code_of
+
+# Responses that mean this endpoint cannot serve anything: bad key, no credits
+ENDPOINT_FAILURE_STATUSES = frozenset({401, 402})
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """Whether an error counts against the endpoint's circuit breaker."""
+    return is_upstream_failure(exc) or status_code_of(exc) in ENDPOINT_FAILURE_STATUSES
+
+
+class Endpoint:
+    """
+    One FireCrawl endpoint with its health and load state.
+
+    Args:
+        name: Stable name, the same in every worker
+        app: FireCrawl client for this endpoint
+        breaker: Circuit breaker ejecting the endpoint while it fails
+        concurrency: Adaptive limit on this endpoint's calls in flight
+    """
+
+    def __init__(self, name: str, app: Any, breaker: CircuitBreaker, concurrency: AdaptiveLimiter):
+        self.name = name
+        self.app = app
+        self.breaker = breaker
+        self.concurrency = concurrency
+        self.latency = 1.0
+        self.calls = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def score(self) -> float:
+        return (self.concurrency.in_flight + 1) * self.latency
+
+    def observe(self, relative_latency: float, failed: bool) -> None:
+        """Fold one finished call into the endpoint's latency EWMA and counters."""
+        with self._lock:
+            self.latency = 0.8 * self.latency + 0.2 * relative_latency
+            self.calls += 1
+            if failed:
+                self.failures += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "circuit_breaker": self.breaker.snapshot(),
+            "concurrency": self.concurrency.snapshot(),
+            "relative_latency": round(self.latency, 2),
+            "calls": self.calls,
+            "failures": self.failures,
+        }
+
+
+def endpoint_name(base_url: Optional[str], index: int) -> str:
+    """Name for the endpoint at ``index`` in the configuration, without its API key."""
+    host = urlsplit(base_url).netloc if base_url else "api.firecrawl.dev"
+    return f"{index}:{host}"
+
+
+class UpstreamPool:
+    """
+    Routes upstream calls over several endpoints.
+
+    Args:
+        endpoints: Endpoints in configuration order; the first is the default
+            for jobs whose endpoint is unknown
+        job_endpoints: Cache mapping job IDs to the name of the endpoint that
+            started them
+    """
+
+    def __init__(self, endpoints: List[Endpoint], job_endpoints: TTLCache):
+        if not endpoints:
+            raise ValueError("At least one FireCrawl endpoint is required")
+        self.endpoints = endpoints
+        self._by_name = {endpoint.name: endpoint for endpoint in endpoints}
+        self.job_endpoints = job_endpoints
+
+    def choose(self, avoid: Iterable[Endpoint] = ()) -> Endpoint:
+        """
+        Pick the endpoint for a new call.
+
+        Endpoints in ``avoid`` (ones already tried for this call) are only
+        used when no other endpoint is available.
+
+        Raises:
+            CircuitOpenError: Every endpoint is ejected
+        """
+        avoid = list(avoid)
+        available = [endpoint for endpoint in self.endpoints if endpoint.breaker.retry_after() == 0]
+        if not available:
+            raise CircuitOpenError(min(endpoint.breaker.retry_after() for endpoint in self.endpoints))
+        preferred = [endpoint for endpoint in available if endpoint not in avoid] or available
+        # Endpoints with a free slot first, then the lowest load-weighted latency; ties
+        # are broken at random so idle endpoints share traffic and stay measured
+        return min(
+            preferred,
+            key=lambda endpoint: (not endpoint.concurrency.has_capacity(), endpoint.score(), random.random())
+        )
+
+    def for_job(self, job_id: str) -> Endpoint:
+        """The endpoint that started ``job_id``; status polls must go there."""
+        return self._by_name.get(self.job_endpoints.get(job_id), self.endpoints[0])
+
+    def bind(self, job_id: str, endpoint: Endpoint) -> None:
+        """Remember that ``endpoint`` started ``job_id``."""
+        if len(self.endpoints) > 1:
+            self.job_endpoints.set(job_id, endpoint.name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {endpoint.name: endpoint.snapshot() for endpoint in self.endpoints}
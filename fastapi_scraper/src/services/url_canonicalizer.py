@@ -0,0 +1,171 @@
+"""
+URL canonicalization and deduplication.
+
+Used before anything is sent upstream (batch scrapes, crawl seeds) and when
+building cache keys, so that URLs differing only by trailing slash, fragment,
+default port, host case or tracking parameters are treated as one URL.
+"""
+
+import logging
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only carry attribution data and never change content
+DEFAULT_TRACKING_PARAMS: FrozenSet[str] = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid",
+    "mc_cid", "mc_eid", "igshid", "_ga", "_gl", "_hsenc", "_hsmi",
+    "mkt_tok", "ref_src", "spm", "vero_id",
+})
+DEFAULT_TRACKING_PREFIXES: Tuple[str, ...] = ("utm_", "pk_", "hsa_")
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+class UrlCanonicalizer:
+    """
+    Canonicalize URLs according to a configurable set of rules.
+
+    Results are memoized per input string, so repeated URLs in large inputs
+    cost a single dict lookup.
+    """
+
+    def __init__(
+        self,
+        lowercase_host: bool = True,
+        strip_fragment: bool = True,
+        strip_default_port: bool = True,
+        strip_trailing_slash: bool = True,
+        strip_tracking_params: bool = True,
+        sort_query_params: bool = True,
+        tracking_params: Optional[Iterable[str]] = None,
+        tracking_prefixes: Optional[Iterable[str]] = None,
+        max_cache_size: int = 200_000,
+    ):
+        self.lowercase_host = lowercase_host
+        self.strip_fragment = strip_fragment
+        self.strip_default_port = strip_default_port
+        self.strip_trailing_slash = strip_trailing_slash
+        self.strip_tracking_params = strip_tracking_params
+        self.sort_query_params = sort_query_params
+        self.tracking_params = frozenset(
+            p.lower() for p in (tracking_params if tracking_params is not None else DEFAULT_TRACKING_PARAMS)
+        )
+        self.tracking_prefixes = tuple(
+            p.lower() for p in (tracking_prefixes if tracking_prefixes is not None else DEFAULT_TRACKING_PREFIXES)
+        )
+        self.max_cache_size = max_cache_size
+        self._cache: Dict[str, str] = {}
+
+    def canonicalize(self, url: str) -> str:
+        """Return the canonical form of a single URL."""
+        cached = self._cache.get(url)
+        if cached is not None:
+            return cached
+
+        canonical = self._canonicalize(url)
+        if len(self._cache) >= self.max_cache_size:
+            self._cache.clear()
+        self._cache[url] = canonical
+        return canonical
+
+    def _canonicalize(self, url: str) -> str:
+        # Hand-rolled split: urlsplit/urlunsplit dominate the cost on large inputs
+        scheme, sep, rest = url.strip().partition("://")
+        if not sep:
+            # Leave relative or malformed input untouched; upstream validation reports it
+            return url
+
+        rest, _, fragment = rest.partition("#")
+        rest, _, query = rest.partition("?")
+        slash = rest.find("/")
+        if slash < 0:
+            netloc, path = rest, ""
+        else:
+            netloc, path = rest[:slash], rest[slash:]
+
+        scheme = scheme.lower()
+
+        if self.lowercase_host or self.strip_default_port:
+            userinfo, at, hostport = netloc.rpartition("@")
+            host, colon, port = hostport.rpartition(":")
+            if not colon or "]" in port:
+                # No port present (or the last colon belongs to an IPv6 literal)
+                host, port = hostport, ""
+            if self.lowercase_host:
+                host = host.lower()
+            if self.strip_default_port and port and _DEFAULT_PORTS.get(scheme) == port:
+                port = ""
+            netloc = f"{userinfo}{at}{host}:{port}" if port else f"{userinfo}{at}{host}"
+
+        if self.strip_trailing_slash:
+            if len(path) > 1 and path[-1] == "/":
+                path = path.rstrip("/") or "/"
+            elif not path:
+                path = "/"
+
+        if query:
+            query = self._canonicalize_query(query)
+
+        canonical = f"{scheme}://{netloc}{path}"
+        if query:
+            canonical = f"{canonical}?{query}"
+        if fragment and not self.strip_fragment:
+            canonical = f"{canonical}#{fragment}"
+        return canonical
+
+    def _canonicalize_query(self, query: str) -> str:
+        params = [p for p in query.split("&") if p]
+        if self.strip_tracking_params:
+            params = [p for p in params if not self._is_tracking_param(p)]
+        if self.sort_query_params:
+            # Stable sort on the key only, so repeated keys keep their order
+            params.sort(key=lambda p: p.partition("=")[0])
+        return "&".join(params)
+
+    def _is_tracking_param(self, param: str) -> bool:
+        key = param.partition("=")[0].lower()
+        return key in self.tracking_params or key.startswith(self.tracking_prefixes)
+
+    def cache_key(self, url: str) -> str:
+        """Key used for any URL-addressed cache."""
+        return self.canonicalize(url)
+
+    def dedupe(self, urls: Iterable[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Canonicalize and deduplicate URLs, preserving first-seen order.
+
+        Args:
+            urls: Original URLs as supplied by the client
+
+        Returns:
+            A tuple of (unique canonical URLs, mapping of canonical URL to
+            every original URL that collapsed onto it)
+        """
+        canonicalize = self.canonicalize
+        groups: Dict[str, List[str]] = {}
+        for url in urls:
+            canonical = canonicalize(url)
+            originals = groups.get(canonical)
+            if originals is None:
+                groups[canonical] = [url]
+            else:
+                originals.append(url)
+
+        unique = list(groups)
+        logger.debug(f"Canonicalized URLs: {sum(len(v) for v in groups.values())} in, {len(unique)} unique")
+        return unique, groups
+
+
+def create_url_canonicalizer() -> UrlCanonicalizer:
+    """Create a canonicalizer configured from application settings."""
+    from ..config import settings
+
+    return UrlCanonicalizer(
+        strip_trailing_slash=settings.url_strip_trailing_slash,
+        strip_tracking_params=settings.url_strip_tracking_params,
+        sort_query_params=settings.url_sort_query_params,
+        tracking_params=(
+            DEFAULT_TRACKING_PARAMS | frozenset(settings.url_extra_tracking_params)
+        ),
+    )
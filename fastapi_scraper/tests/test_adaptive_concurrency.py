@@ -0,0 +1,141 @@
+"""
+AdaptiveLimiter against a local server that throttles like FireCrawl: more
+than ``capacity`` concurrent requests get a 429 with a ``Retry-After``.
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.services.adaptive_concurrency import AdaptiveLimiter, is_congestion, retry_after_of
+
+
+class ThrottlingServer(ThreadingHTTPServer):
+    """Answers 200 after ``delay`` seconds, or 429 when over ``capacity`` requests are in flight."""
+
+    daemon_threads = True
+
+    def __init__(self, capacity: int, delay: float = 0.02, retry_after: str = "0"):
+        super().__init__(("127.0.0.1", 0), ThrottlingHandler)
+        self.capacity = capacity
+        self.delay = delay
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.served = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/"
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            over = server.in_flight > server.capacity
+        try:
+            if over:
+                with server.lock:
+                    server.throttled += 1
+                self.send_response(429)
+                self.send_header("Retry-After", server.retry_after)
+            else:
+                time.sleep(server.delay)
+                with server.lock:
+                    server.served += 1
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def throttling_server(request):
+    server = ThrottlingServer(**getattr(request, "param", {"capacity": 4}))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+async def limited_get(limiter: AdaptiveLimiter, session: requests.Session, url: str) -> int:
+    """One request under the limiter, fed back the way the service feeds upstream calls."""
+    started = await limiter.acquire()
+    error = None
+    try:
+        response = await asyncio.get_running_loop().run_in_executor(None, session.get, url)
+        response.raise_for_status()
+        return response.status_code
+    except requests.HTTPError as e:
+        error = e
+        return e.response.status_code
+    finally:
+        limiter.release(
+            started,
+            congested=error is not None and is_congestion(error),
+            retry_after=retry_after_of(error) if error is not None else None
+        )
+
+
+@pytest.mark.asyncio
+async def test_limit_converges_to_upstream_capacity(throttling_server):
+    limiter = AdaptiveLimiter(initial_limit=20, min_limit=1, max_limit=50)
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=32))
+
+    async def worker(calls: int):
+        return [await limited_get(limiter, session, throttling_server.url) for _ in range(calls)]
+
+    first = await asyncio.gather(*(worker(5) for _ in range(16)))
+    second = await asyncio.gather(*(worker(10) for _ in range(16)))
+
+    # The limit came down from 20 and keeps oscillating just around the capacity of 4
+    assert limiter.decreases >= 1
+    assert 2 <= limiter.limit <= throttling_server.capacity + 2
+    # Once converged, most calls get through instead of bouncing off the upstream
+    first_throttled = sum(code == 429 for codes in first for code in codes)
+    second_throttled = sum(code == 429 for codes in second for code in codes)
+    assert second_throttled / (16 * 10) < 0.15
+    assert second_throttled / (16 * 10) < first_throttled / (16 * 5)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("throttling_server", [{"capacity": 0, "retry_after": "1"}], indirect=True)
+async def test_retry_after_pauses_new_calls(throttling_server):
+    limiter = AdaptiveLimiter(initial_limit=4)
+    session = requests.Session()
+
+    assert await limited_get(limiter, session, throttling_server.url) == 429
+    assert limiter.throttled == 1
+
+    started = time.monotonic()
+    await limiter.acquire()
+    assert time.monotonic() - started >= 0.9
+    limiter.release(time.monotonic())
+
+
+@pytest.mark.parametrize("throttling_server", [{"capacity": 0}], indirect=True)
+def test_retry_after_of_reads_seconds_and_http_dates(throttling_server):
+    throttling_server.retry_after = "7"
+    response = requests.get(throttling_server.url)
+    assert retry_after_of(requests.HTTPError(response=response)) == 7.0
+
+    throttling_server.retry_after = formatdate(time.time() + 30, usegmt=True)
+    response = requests.get(throttling_server.url)
+    assert 25 <= retry_after_of(requests.HTTPError(response=response)) <= 30
+
+    assert retry_after_of(requests.ConnectionError()) is None
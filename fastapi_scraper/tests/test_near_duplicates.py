@@ -0,0 +1,69 @@
+"""
+SimHash near-duplicate detection: versioned copies of a page collide,
+unrelated pages do not.
+"""
+
+import random
+
+import pytest
+
+from src.services.near_duplicates import NearDuplicateIndex, SimHasher, cluster_signatures, hamming_distance
+
+VOCABULARY = [f"word{i}" for i in range(2000)]
+
+
+def page(seed: int, words: int = 2000) -> str:
+    """A documentation-sized page of pseudo-random words."""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def with_word_replaced(text: str, position: int, word: str) -> str:
+    words = text.split()
+    words[position] = word
+    return " ".join(words)
+
+
+@pytest.fixture
+def hasher():
+    return SimHasher()
+
+
+def test_near_identical_pages_are_within_the_distance(hasher):
+    original = page(1)
+    variants = [
+        original + " Edit this page on GitHub",
+        with_word_replaced(original, 1000, "v2"),
+        original.upper(),
+    ]
+
+    signature = hasher.signature(original)
+    for variant in variants:
+        assert hamming_distance(signature, hasher.signature(variant)) <= 3
+
+    index = NearDuplicateIndex(max_distance=3)
+    index.add("original", signature)
+    for variant in variants:
+        assert [key for key, _ in index.matches(hasher.signature(variant))] == ["original"]
+
+
+def test_distinct_pages_do_not_collide(hasher):
+    signatures = [hasher.signature(page(seed)) for seed in range(20)]
+
+    index = NearDuplicateIndex(max_distance=3)
+    for seed, signature in enumerate(signatures):
+        assert index.matches(signature) == []
+        index.add(seed, signature)
+
+    assert cluster_signatures(signatures) == list(range(20))
+    assert hasher.signature("") == 0
+
+
+def test_clusters_pick_the_largest_member_as_representative(hasher):
+    original = page(2)
+    texts = [original, page(3), original + " Edit this page on GitHub", page(4)]
+    signatures = hasher.signatures(texts)
+
+    representatives = cluster_signatures(signatures, sizes=[len(text) for text in texts])
+
+    assert representatives == [2, 1, 2, 3]
@@ -0,0 +1,72 @@
+"""
+BM25 search index: replacing and removing documents, with or without
+compaction, ranks exactly like an index built from the live documents only.
+"""
+
+import random
+
+from src.services.search_index import SearchIndex
+
+VOCABULARY = [f"term{i}" for i in range(200)]
+
+
+def documents(seed: int, count: int = 40) -> dict:
+    """URL -> markdown; every page mentions "common", a few mention "rare"."""
+    rng = random.Random(seed)
+    pages = {}
+    for i in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(20, 120))]
+        words.append("common")
+        if i % 10 == 0:
+            words.append("rare")
+        pages[f"https://docs.example.com/{i}"] = " ".join(words)
+    return pages
+
+
+def build(pages: dict, **kwargs) -> SearchIndex:
+    index = SearchIndex(**kwargs)
+    for url, markdown in pages.items():
+        index.add(url, markdown)
+    return index
+
+
+def ranking(index: SearchIndex, query: str) -> list:
+    return [(hit.url, hit.score) for hit in index.search(query, limit=100)]
+
+
+QUERIES = ["common", "rare common", "term1 term2 term3", "term42 rare"]
+
+
+def test_replacing_documents_keeps_the_ranking_through_compaction():
+    original, updated = documents(1), documents(2)
+    index = build(original, compact_ratio=0.25)
+
+    # Re-crawl every page; tombstones pass the ratio and trigger compactions
+    compacted = False
+    for url, markdown in updated.items():
+        index.add(url, markdown)
+        compacted = compacted or index.stats()["tombstones"] == 0
+    assert compacted
+
+    fresh = build(updated)
+    assert len(index) == len(fresh) == len(updated)
+    for query in QUERIES:
+        assert ranking(index, query) == ranking(fresh, query)
+
+
+def test_document_frequency_ignores_tombstones():
+    pages = documents(3)
+    removed = [url for i, url in enumerate(pages) if i % 4]
+    # A ratio this high never compacts, so every removed posting stays tombstoned
+    index = build(pages, compact_ratio=10)
+    for url in removed:
+        assert index.remove(url)
+    assert not index.remove(removed[0])
+    assert index.stats()["tombstones"] == len(removed)
+
+    live = {url: markdown for url, markdown in pages.items() if url not in removed}
+    fresh = build(live)
+    for query in QUERIES:
+        hits = ranking(index, query)
+        assert hits == ranking(fresh, query)
+        assert all(url in live and score > 0 for url, score in hits)
@@ -1,9 +1,17 @@
+import json
+import os
+
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List
 from pydantic import BaseModel
 
+from ...tools.custom_tool import FirecrawlMapTool, FirecrawlScrapeTool, FirecrawlSearchTool
+
+# Lets the agent open a result in full or look around its site
+SUMMARY_TOOLS = (FirecrawlScrapeTool, FirecrawlSearchTool, FirecrawlMapTool)
+
 class Summary(BaseModel):
     key_action_items: list[str]
     dramatic_news_points: list[str]
@@ -24,6 +32,7 @@ class SummaryCrew:
     def summary_agent(self) -> Agent:
         return Agent(
             config=self.agents_config["summary_agent"],  # type: ignore[index]
+            tools=[tool() for tool in SUMMARY_TOOLS],
         )
 
     @task
@@ -33,6 +42,27 @@ class SummaryCrew:
             output_pydantic=Summary,
         )
 
+    def model_name(self) -> str:
+        """
+        Model the agent will run on, read from the configuration without
+        building the agent: its ``llm`` setting, else the ``MODEL`` CrewAI
+        falls back to.
+        """
+        llm = self.agents_config["summary_agent"].get("llm")  # type: ignore[index]
+        return str(getattr(llm, "model", llm) or os.getenv("MODEL", ""))
+
+    def prompt_template(self) -> str:
+        """Agent, tool and task configuration as one string, used to key cached summaries."""
+        return json.dumps(
+            {
+                "agent": self.agents_config["summary_agent"],  # type: ignore[index]
+                "tools": [tool.__name__ for tool in SUMMARY_TOOLS],
+                "task": self.tasks_config["summary_task"],  # type: ignore[index]
+            },
+            sort_keys=True,
+            default=str,
+        )
+
     @crew
     def crew(self) -> Crew:
         """Creates the Summary Crew"""
@@ -1,5 +1,8 @@
 #!/usr/bin/env python
+import asyncio
 import os
+import sys
+from typing import Dict, List, Optional, Union
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,27 +10,138 @@ load_dotenv()
 from crewai.flow import Flow, listen, start
 from firecrawl import FirecrawlApp, ScrapeOptions
 from .crews.summary_crew.summary_crew import SummaryCrew
-from .models import SearchResult, FireCrawlState
-from .utils.file_operations import save_search_results_to_markdown
+from .models import SearchResult, FireCrawlState, Summary
+from .utils.file_operations import (
+    save_search_results_to_markdown, save_shared_summaries, save_query_report, MarkdownReportWriter
+)
+from .utils.llm_cache import LLMCache
+from .utils.checkpoint import RunJournal
+from .utils.chunking import chunk_markdown, estimate_tokens, render_partial_summaries
+from .utils.urls import canonical_url
+from .utils.instrumentation import event, run_trace, traced_step, traced_kickoff_async, upstream_span
 
 app = FirecrawlApp(api_key=os.getenv("FIRECRAWL_API_KEY"))
+llm_cache = LLMCache()
+
+
+async def summarize_text(
+    text: str,
+    label: str,
+    semaphore: asyncio.Semaphore,
+    timeout: float
+) -> Optional[Summary]:
+    """Run SummaryCrew on one piece of text, going through the LLM cache."""
+    summary_crew = SummaryCrew()
+    model = summary_crew.model_name()
+    cache_key = llm_cache.make_key(
+        model=model,
+        template=summary_crew.prompt_template(),
+        inputs={"results": text}
+    )
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        print(f"{label} loaded from cache")
+        event("cache", "llm_cache.hit")
+        return Summary.model_validate_json(cached)
+    
+    async with semaphore:
+        try:
+            output = await asyncio.wait_for(
+                traced_kickoff_async(summary_crew.crew(), inputs={"results": text}, name="summary_crew"),
+                timeout=timeout
+            )
+        except Exception as e:
+            # A failed or slow summary leaves a gap instead of sinking the run
+            print(f"{label} failed: {type(e).__name__}: {e}")
+            return None
+    
+    print(f"{label} created", output.pydantic)
+    if output.pydantic is not None:
+        llm_cache.set(cache_key, output.pydantic.model_dump_json(), model=model)
+    return output.pydantic
+
+
+async def summarize_markdown(
+    markdown: str,
+    label: str,
+    semaphore: asyncio.Semaphore,
+    timeout: float,
+    token_budget: int
+) -> Optional[Summary]:
+    """
+    Summarize a page, map-reducing over heading-aligned chunks when it is over budget.
+    
+    Chunks are summarized concurrently, then their summaries are reduced into
+    one Summary by another SummaryCrew run.
+    """
+    chunks = chunk_markdown(markdown, token_budget)
+    if len(chunks) == 1:
+        return await summarize_text(markdown, label, semaphore, timeout)
+    
+    print(f"{label}: {estimate_tokens(markdown)} tokens split into {len(chunks)} chunks")
+    partials = await asyncio.gather(*(
+        summarize_text(chunk, f"{label} chunk {i}/{len(chunks)}", semaphore, timeout)
+        for i, chunk in enumerate(chunks, 1)
+    ))
+    partials = [partial for partial in partials if partial is not None]
+    if not partials:
+        return None
+    return await summarize_text(render_partial_summaries(partials), f"{label} (reduce)", semaphore, timeout)
+
 
 class FireCrawlFlow(Flow[FireCrawlState]):
 
     @start()
+    @traced_step
     def get_query(self):
+        if not self.state.run_id:
+            self.state.run_id = RunJournal.new_run_id()
+        self._journal = RunJournal(self.state.run_id, self.state.checkpoint_dir)
+        
+        if self._journal.exists():
+            self._restore(self._journal.load())
+        elif not self.state.query.strip():
+            # A resume of an unknown run would otherwise pay for a search for ""
+            raise ValueError(
+                f"No query given and no checkpoint journal for run {self.state.run_id} "
+                f"in {self.state.checkpoint_dir}"
+            )
+        else:
+            self._journal.record("start", inputs={"query": self.state.query, "limit": self.state.limit})
+        
+        print("Run ID: ", self.state.run_id)
         print("Query: ", self.state.query)
         print("Limit: ", self.state.limit)
+    
+    def _restore(self, progress: dict):
+        """Load completed work from this run's checkpoint journal."""
+        self.state.query = progress["inputs"].get("query", self.state.query)
+        self.state.limit = progress["inputs"].get("limit", self.state.limit)
+        if progress["search_result"] is not None:
+            self.state.search_result = progress["search_result"]
+            completed = progress["summaries"]
+            self.state.summaries = [completed.get(i) for i in range(len(self.state.search_result))]
+        print(
+            f"Resuming run {self.state.run_id}: search "
+            f"{'done' if progress['search_result'] is not None else 'pending'}, "
+            f"{len(progress['summaries'])} summaries done"
+        )
 
     @listen(get_query)
+    @traced_step
     def perform_search(self):
+        if self.state.search_result:
+            print("Search already completed in this run, skipping")
+            return
+        
         print("Performing search on", self.state.query)
-        search_result = app.search(
-            query=self.state.query,
-            limit=self.state.limit,
-            scrape_options=ScrapeOptions(formats=["markdown", "links"]),
-            tbs="qdr:w"
-        )
+        with upstream_span("firecrawl.search"):
+            search_result = app.search(
+                query=self.state.query,
+                limit=self.state.limit,
+                scrape_options=ScrapeOptions(formats=["markdown", "links"]),
+                tbs="qdr:w"
+            )
         
         search_results = []
         
@@ -41,38 +155,243 @@ class FireCrawlFlow(Flow[FireCrawlState]):
             ))
         
         self.state.search_result = search_results
+        self._journal.record_search(search_results)
         print("Search results: ", len(self.state.search_result), "results found")
         print(self.state.search_result)
         
     @listen(perform_search)
-    def create_summary(self):
+    @traced_step
+    async def create_summary(self):
         print("Creating summary of search results")
+        semaphore = asyncio.Semaphore(self.state.summary_concurrency)
         
-        for result in self.state.search_result:
-            result = (
-                SummaryCrew()
-                .crew()
-                .kickoff(inputs={"results": result.markdown})
-            )
-            print("Summary created", result.pydantic)
-            self.state.summaries.append(result.pydantic)
+        if self.state.pipelined:
+            await self._summarize_and_stream(semaphore)
+            return
+        
+        results = self.state.search_result
+        summaries = self._completed_summaries()
+        pending = [i for i, summary in enumerate(summaries) if summary is None]
+        
+        # gather keeps result order, so summaries line up with search results
+        for i, summary in zip(pending, await asyncio.gather(*(
+            self._summarize_result(i + 1, results[i], semaphore) for i in pending
+        ))):
+            summaries[i] = summary
+        self.state.summaries = summaries
         
         print("Summaries created", self.state.summaries)
+    
+    def _completed_summaries(self) -> list:
+        """Summaries restored from a checkpoint, None where work remains."""
+        count = len(self.state.search_result)
+        summaries = list(self.state.summaries[:count])
+        return summaries + [None] * (count - len(summaries))
+    
+    async def _summarize_result(self, index: int, result: SearchResult, semaphore: asyncio.Semaphore):
+        summary = await summarize_markdown(
+            result.markdown,
+            label=f"Summary {index} ({result.url})",
+            semaphore=semaphore,
+            timeout=self.state.summary_timeout,
+            token_budget=self.state.chunk_token_budget
+        )
+        if summary is not None:
+            self._journal.record_summary(index - 1, summary)
+        return summary
+    
+    async def _summarize_and_stream(self, semaphore: asyncio.Semaphore):
+        """Append each result to the report as soon as its summary is ready."""
+        results = self.state.search_result
+        summaries = self._completed_summaries()
+        
+        async def summarize(index: int, result: SearchResult):
+            return index, await self._summarize_result(index, result, semaphore)
+        
+        with MarkdownReportWriter(self.state.report_filename) as report:
+            report.write_header(self.state.query, len(results), self.state.limit)
+            for i, summary in enumerate(summaries):
+                if summary is not None:
+                    report.write_section(i + 1, results[i], summary)
+            
+            # Sections land in completion order; their headings keep the search rank
+            for next_done in asyncio.as_completed([
+                summarize(i + 1, results[i]) for i, summary in enumerate(summaries) if summary is None
+            ]):
+                index, summary = await next_done
+                summaries[index - 1] = summary
+                report.write_section(index, results[index - 1], summary)
+            report.close(write_footer=True)
+        
+        self.state.summaries = summaries
+        self.state.report_written = True
+        print(f"✅ Streamed {len(results)} results to '{self.state.report_filename}'")
         
     @listen(create_summary)
+    @traced_step
     def save_search_result(self):
-        save_search_results_to_markdown(
-            query=self.state.query,
-            search_results=self.state.search_result,
-            summaries=self.state.summaries,
-            limit=self.state.limit
+        if not self.state.report_written:
+            save_search_results_to_markdown(
+                query=self.state.query,
+                search_results=self.state.search_result,
+                summaries=self.state.summaries,
+                limit=self.state.limit,
+                filename=self.state.report_filename
+            )
+        self._journal.record("report", filename=self.state.report_filename)
+        self._journal.close()
+        
+        missing = sum(1 for summary in self.state.summaries if summary is None)
+        if missing:
+            print(f"{missing} summaries failed - rerun with resume('{self.state.run_id}') to retry them")
+
+async def run_batch(
+    queries: List[str],
+    limit: int = 3,
+    search_concurrency: int = 8,
+    summary_concurrency: int = 5,
+    summary_timeout: float = 300,
+    chunk_token_budget: int = 6000,
+    output_dir: str = "batch_reports"
+):
+    """
+    Run many queries, summarizing every unique page once.
+    
+    Searches run concurrently under ``search_concurrency``; all summaries
+    share one ``summary_concurrency`` cap. Pages returned by several queries
+    are deduplicated by canonical URL and summarized once. Each query gets its
+    own report, linking to the page summaries in ``shared_summaries.md``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    shared_filename = os.path.join(output_dir, "shared_summaries.md")
+    search_semaphore = asyncio.Semaphore(search_concurrency)
+    summary_semaphore = asyncio.Semaphore(summary_concurrency)
+    pages: Dict[str, SearchResult] = {}
+    summary_tasks: Dict[str, asyncio.Task] = {}
+    
+    def summary_of(key: str) -> Optional[Summary]:
+        task = summary_tasks[key]
+        return None if task.cancelled() or task.exception() else task.result()
+    
+    async def run_query(number: int, query: str):
+        try:
+            async with search_semaphore:
+                with upstream_span("firecrawl.search"):
+                    response = await asyncio.to_thread(
+                        app.search,
+                        query=query,
+                        limit=limit,
+                        scrape_options=ScrapeOptions(formats=["markdown", "links"]),
+                        tbs="qdr:w"
+                    )
+        except Exception as e:
+            print(f"Search failed for {query!r}: {type(e).__name__}: {e}")
+            return 0
+        
+        results = [
+            SearchResult(
+                title=result['title'],
+                url=result['url'],
+                description=result['description'],
+                markdown=result['markdown'],
+                links=result['links']
+            )
+            for result in response.data
+        ]
+        keys = [canonical_url(result.url) for result in results]
+        for key, result in zip(keys, results):
+            if key not in summary_tasks:
+                pages[key] = result
+                summary_tasks[key] = asyncio.create_task(summarize_markdown(
+                    result.markdown,
+                    label=f"Page {len(pages)} ({result.url})",
+                    semaphore=summary_semaphore,
+                    timeout=summary_timeout,
+                    token_budget=chunk_token_budget
+                ))
+        
+        await asyncio.gather(*(summary_tasks[key] for key in keys), return_exceptions=True)
+        save_query_report(
+            query=query,
+            search_results=results,
+            keys=keys,
+            summaries={key: summary_of(key) for key in keys},
+            limit=limit,
+            shared_filename=shared_filename,
+            filename=os.path.join(output_dir, f"{number:03d}-{_slug(query)}.md")
         )
+        return len(results)
+    
+    result_counts = await asyncio.gather(*(
+        run_query(number, query) for number, query in enumerate(queries, 1)
+    ))
+    
+    summaries = {key: summary_of(key) for key in summary_tasks}
+    save_shared_summaries(pages, summaries, shared_filename)
+    print(
+        f"✅ Batch complete: {len(queries)} queries, {sum(result_counts)} results, "
+        f"{len(pages)} unique pages, {sum(1 for s in summaries.values() if s)} summaries"
+    )
+
+
+def _slug(text: str, max_length: int = 60) -> str:
+    slug = "".join(c if c.isalnum() else "-" for c in text.lower())
+    return "-".join(part for part in slug.split("-") if part)[:max_length] or "query"
 
-def kickoff(query: str, limit: int):
+
+def kickoff(
+    query: str,
+    limit: int,
+    summary_concurrency: int = 5,
+    pipelined: bool = False,
+    run_id: str = ""
+):
+    run_id = run_id or RunJournal.new_run_id()
+    firecrawl_flow = FireCrawlFlow()
+    with run_trace("firecrawl_flow", run_id=run_id):
+        firecrawl_flow.kickoff(inputs={
+            "query": query,
+            "limit": limit,
+            "summary_concurrency": summary_concurrency,
+            "pipelined": pipelined,
+            "run_id": run_id
+        })
+
+def resume(run_id: str, summary_concurrency: int = 5, pipelined: bool = False):
+    """Continue a checkpointed run, skipping the search and summaries it already completed."""
+    if not RunJournal(run_id, FireCrawlState().checkpoint_dir).exists():
+        raise ValueError(f"Cannot resume run {run_id}: it has no checkpoint journal")
     firecrawl_flow = FireCrawlFlow()
-    firecrawl_flow.kickoff(inputs={"query": query, "limit": limit})
+    with run_trace("firecrawl_flow", run_id=run_id):
+        firecrawl_flow.kickoff(inputs={
+            "run_id": run_id,
+            "summary_concurrency": summary_concurrency,
+            "pipelined": pipelined
+        })
+
+def kickoff_batch(queries: Union[str, List[str]], limit: int = 3, **kwargs):
+    """
+    Run a batch of queries.
+    
+    Args:
+        queries: List of queries, or a path to a file with one query per line
+        limit: Search results per query
+        **kwargs: Passed to run_batch (search_concurrency, output_dir, ...)
+    """
+    if isinstance(queries, str):
+        with open(queries, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    with run_trace("firecrawl_batch"):
+        asyncio.run(run_batch(queries, limit=limit, **kwargs))
 
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--resume":
+        resume(sys.argv[2])
+        sys.exit(0)
+    if len(sys.argv) >= 3 and sys.argv[1] == "--batch":
+        kickoff_batch(sys.argv[2], limit=int(sys.argv[3]) if len(sys.argv) > 3 else 3)
+        sys.exit(0)
+    
     user_input_query = input("Enter a query: ")
     user_input_limit = input("Enter a limit on search results (default is 3): ")
     if user_input_limit == "":
@@ -3,7 +3,7 @@ Pydantic models for FireCrawl Flow
 """
 
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class Summary(BaseModel):
@@ -25,4 +25,12 @@ class FireCrawlState(BaseModel):
     query: str = ""
     limit: int = 3
     search_result: list[SearchResult] = []
-    summaries: list[Summary] = [] 
\ No newline at end of file
+    summaries: list[Optional[Summary]] = []
+    summary_concurrency: int = 5
+    summary_timeout: float = 300
+    chunk_token_budget: int = 6000
+    pipelined: bool = False
+    report_filename: str = "search_results.md"
+    report_written: bool = False
+    run_id: str = ""
+    checkpoint_dir: str = ".checkpoints" 
\ No newline at end of file
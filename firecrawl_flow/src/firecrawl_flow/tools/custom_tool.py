@@ -1,22 +1,194 @@
-from typing import Type
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Optional, Type
 
 from crewai.tools import BaseTool
+from firecrawl import FirecrawlApp
 from pydantic import BaseModel, Field
 
+from ..utils.instrumentation import current_trace, upstream_span
+from ..utils.urls import canonical_url
 
-class MyCustomToolInput(BaseModel):
-    """Input schema for MyCustomTool."""
+_client: Optional[FirecrawlApp] = None
+_client_lock = threading.Lock()
 
-    argument: str = Field(..., description="Description of the argument.")
 
+def get_firecrawl_client() -> FirecrawlApp:
+    """Process-wide Firecrawl client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = FirecrawlApp(
+                api_key=os.getenv("FIRECRAWL_API_KEY"),
+                api_url=os.getenv("FIRECRAWL_API_URL") or None,
+            )
+        return _client
 
-class MyCustomTool(BaseTool):
-    name: str = "Name of my tool"
+
+class ToolResultCache:
+    """
+    Thread-safe LRU + TTL cache that also collapses concurrent calls.
+
+    When several agents ask for the same key at once, only the first call
+    reaches Firecrawl; the others wait for its result. Keys are scoped to
+    the traced run that is active when the tool is called (see
+    ``run_trace``), so results are shared by the agents of one run but a
+    later run fetches fresh pages; calls outside a run share one scope.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 900):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight: dict = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        trace = current_trace()
+        key = (trace.run_id if trace is not None else "", key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            with self._lock:
+                self._in_flight.pop(key, None)
+            raise
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._in_flight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+tool_cache = ToolResultCache()
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about ``max_tokens`` tokens (~4 characters each) on a line boundary."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    return (
+        f"{text[:cut]}\n\n[Truncated: showing about {max_tokens} of "
+        f"{(len(text) + 3) // 4} estimated tokens]"
+    )
+
+
+class FirecrawlScrapeToolInput(BaseModel):
+    """Input schema for FirecrawlScrapeTool."""
+
+    url: str = Field(..., description="Full URL of the page to scrape.")
+
+
+class FirecrawlScrapeTool(BaseTool):
+    name: str = "firecrawl_scrape"
+    description: str = (
+        "Fetch a web page and return its main content as markdown. "
+        "Use it to read a specific URL."
+    )
+    args_schema: Type[BaseModel] = FirecrawlScrapeToolInput
+    max_tokens: int = 4000
+
+    def _run(self, url: str) -> str:
+        def scrape() -> str:
+            with upstream_span("firecrawl.scrape"):
+                result = get_firecrawl_client().scrape_url(url, formats=["markdown"], only_main_content=True)
+            return getattr(result, "markdown", None) or ""
+
+        markdown = tool_cache.get_or_compute(("scrape", canonical_url(url)), scrape)
+        return truncate_to_tokens(markdown, self.max_tokens) if markdown else f"No content found at {url}"
+
+    async def _arun(self, url: str) -> str:
+        return await asyncio.to_thread(self._run, url)
+
+
+class FirecrawlSearchToolInput(BaseModel):
+    """Input schema for FirecrawlSearchTool."""
+
+    query: str = Field(..., description="Web search query.")
+    limit: int = Field(default=5, description="Number of results (1-10).", ge=1, le=10)
+
+
+class FirecrawlSearchTool(BaseTool):
+    name: str = "firecrawl_search"
+    description: str = (
+        "Search the web and return the title, URL and description of each result. "
+        "Use firecrawl_scrape afterwards to read a result in full."
+    )
+    args_schema: Type[BaseModel] = FirecrawlSearchToolInput
+    max_tokens: int = 2000
+
+    def _run(self, query: str, limit: int = 5) -> str:
+        def search() -> str:
+            with upstream_span("firecrawl.search"):
+                response = get_firecrawl_client().search(query=query, limit=limit)
+            lines = []
+            for i, result in enumerate(response.data or [], 1):
+                lines.append(f"{i}. {result.get('title', '')}")
+                lines.append(f"   URL: {result.get('url', '')}")
+                if result.get("description"):
+                    lines.append(f"   {result['description']}")
+            return "\n".join(lines)
+
+        text = tool_cache.get_or_compute(("search", query.strip().lower(), limit), search)
+        return truncate_to_tokens(text, self.max_tokens) if text else f"No results for {query!r}"
+
+    async def _arun(self, query: str, limit: int = 5) -> str:
+        return await asyncio.to_thread(self._run, query, limit)
+
+
+class FirecrawlMapToolInput(BaseModel):
+    """Input schema for FirecrawlMapTool."""
+
+    url: str = Field(..., description="Website to list pages for.")
+    search: Optional[str] = Field(default=None, description="Only return pages related to this term.")
+
+
+class FirecrawlMapTool(BaseTool):
+    name: str = "firecrawl_map"
     description: str = (
-        "Clear description for what this tool is useful for, your agent will need this information to use it."
+        "List the page URLs of a website, optionally filtered by a search term. "
+        "Use it to find the right page before scraping."
     )
-    args_schema: Type[BaseModel] = MyCustomToolInput
+    args_schema: Type[BaseModel] = FirecrawlMapToolInput
+    max_tokens: int = 2000
+
+    def _run(self, url: str, search: Optional[str] = None) -> str:
+        def map_site() -> str:
+            with upstream_span("firecrawl.map"):
+                response = get_firecrawl_client().map_url(url, search=search)
+            return "\n".join(response.links or [])
+
+        text = tool_cache.get_or_compute(("map", canonical_url(url), search), map_site)
+        return truncate_to_tokens(text, self.max_tokens) if text else f"No pages found for {url}"
 
-    def _run(self, argument: str) -> str:
-        # Implementation goes here
-        return "this is an example of a tool output, ignore it and move along."
+    async def _arun(self, url: str, search: Optional[str] = None) -> str:
+        return await asyncio.to_thread(self._run, url, search)
@@ -0,0 +1,115 @@
+"""
+Run checkpointing for FireCrawl Flow
+"""
+
+import json
+import os
+import uuid
+from typing import Any, Dict, List
+
+from ..models import SearchResult, Summary
+
+
+class RunJournal:
+    """
+    Append-only checkpoint journal for one flow run.
+
+    Every completed step is appended to ``<directory>/<run_id>.jsonl`` as one
+    compact JSON line and flushed, so checkpointing costs a single small write
+    per step and a crash can lose at most the line being written. Replaying
+    the journal rebuilds the run's progress.
+
+    Records look like:
+
+        {"step": "start", "inputs": {"query": ..., "limit": ...}}
+        {"step": "search", "results": [...]}
+        {"step": "summary", "index": 3, "summary": {...}}
+        {"step": "report", "filename": "search_results.md"}
+    """
+
+    def __init__(self, run_id: str, directory: str = ".checkpoints"):
+        """
+        Args:
+            run_id: Identifier of the run
+            directory: Directory holding the journals
+        """
+        self.run_id = run_id
+        self.path = os.path.join(directory, f"{run_id}.jsonl")
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+
+    @staticmethod
+    def new_run_id() -> str:
+        return uuid.uuid4().hex[:12]
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) > 0
+
+    def record(self, step: str, **data: Any) -> None:
+        """
+        Append a checkpoint record.
+
+        Args:
+            step: Step name
+            **data: JSON-serializable step data
+        """
+        if self._file is None:
+            unterminated = False
+            if self.exists():
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    unterminated = f.read(1) != b"\n"
+            self._file = open(self.path, "a", encoding="utf-8")
+            if unterminated:
+                # Close off a line left unfinished by a crash before appending
+                self._file.write("\n")
+        self._file.write(json.dumps({"step": step, **data}, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+        self._file.flush()
+
+    def record_search(self, results: List[SearchResult]) -> None:
+        self.record("search", results=[result.model_dump() for result in results])
+
+    def record_summary(self, index: int, summary: Summary) -> None:
+        self.record("summary", index=index, summary=summary.model_dump())
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Replay the journal.
+
+        Returns:
+            Dict with "inputs", "search_result" (None if the search has not
+            completed), "summaries" (index -> Summary) and "report_written"
+        """
+        progress: Dict[str, Any] = {
+            "inputs": {},
+            "search_result": None,
+            "summaries": {},
+            "report_written": False,
+        }
+        if not os.path.exists(self.path):
+            return progress
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                step = record.get("step")
+                if step == "start":
+                    progress["inputs"] = record.get("inputs", {})
+                elif step == "search":
+                    progress["search_result"] = [SearchResult(**result) for result in record["results"]]
+                    progress["summaries"] = {}
+                elif step == "summary":
+                    progress["summaries"][record["index"]] = Summary(**record["summary"])
+                elif step == "report":
+                    progress["report_written"] = True
+        return progress
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,141 @@
+"""
+Token-budgeted markdown chunking for FireCrawl Flow
+"""
+
+import re
+from typing import List
+
+from ..models import Summary
+
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate (about 4 characters per token for English).
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return (len(text) + 3) // 4
+
+
+def split_sections(markdown: str) -> List[str]:
+    """
+    Split markdown before every heading, ignoring "#" lines inside code fences.
+
+    Args:
+        markdown: Markdown to split
+
+    Returns:
+        Sections in document order; text before the first heading is its own section
+    """
+    sections: List[List[str]] = [[]]
+    in_fence = False
+    for line in markdown.splitlines():
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and _HEADING_RE.match(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+    return ["\n".join(lines) for lines in sections if any(line.strip() for line in lines)]
+
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    """Split a section that is over budget on paragraphs, then on lines, then hard."""
+    heading = section.splitlines()[0] if _HEADING_RE.match(section) else ""
+    pieces: List[str] = []
+    current = ""
+
+    for paragraph in section.split("\n\n"):
+        parts = [paragraph]
+        if len(paragraph) > max_chars:
+            parts = paragraph.splitlines()
+        for part in parts:
+            while len(part) > max_chars:
+                pieces.append(part[:max_chars])
+                part = part[max_chars:]
+            candidate = f"{current}\n\n{part}" if current else part
+            if len(candidate) > max_chars:
+                pieces.append(current)
+                current = part
+            else:
+                current = candidate
+    pieces.append(current)
+    pieces = [piece for piece in pieces if piece.strip()]
+
+    # Continuation pieces keep the section heading for context
+    if heading:
+        pieces = pieces[:1] + [
+            f"{heading} (continued)\n\n{piece}" if len(piece) + len(heading) + 16 <= max_chars else piece
+            for piece in pieces[1:]
+        ]
+    return pieces
+
+
+def chunk_markdown(markdown: str, token_budget: int) -> List[str]:
+    """
+    Split markdown into chunks of at most ``token_budget`` estimated tokens.
+
+    Whole sections are packed greedily so chunks break on heading boundaries;
+    only sections larger than the budget are split internally.
+
+    Args:
+        markdown: Page markdown
+        token_budget: Maximum estimated tokens per chunk
+
+    Returns:
+        Chunks in document order (a single chunk when the page fits)
+    """
+    if estimate_tokens(markdown) <= token_budget:
+        return [markdown]
+
+    max_chars = token_budget * 4
+    chunks: List[str] = []
+    current = ""
+    for section in split_sections(markdown):
+        if len(section) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.extend(_split_oversized(section, max_chars))
+            continue
+        candidate = f"{current}\n\n{section}" if current else section
+        if len(candidate) > max_chars:
+            chunks.append(current)
+            current = section
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def render_partial_summaries(summaries: List[Summary]) -> str:
+    """
+    Render chunk summaries as markdown input for the reduce step.
+
+    Args:
+        summaries: Summaries of consecutive chunks of one page
+
+    Returns:
+        Markdown with one section per chunk
+    """
+    parts = []
+    for i, summary in enumerate(summaries, 1):
+        lines = [f"## Part {i}", "", summary.summary, ""]
+        for title, items in (
+            ("Key action items", summary.key_action_items),
+            ("Dramatic news points", summary.dramatic_news_points),
+            ("Key takeaways", summary.key_takeaways),
+        ):
+            if items:
+                lines.append(f"{title}:")
+                lines.extend(f"- {item}" for item in items)
+                lines.append("")
+        parts.append("\n".join(lines))
+    return "\n".join(parts)
@@ -2,14 +2,170 @@
 File operations utilities for FireCrawl Flow
 """
 
-from typing import List
+import hashlib
+import os
+from typing import Dict, List, Optional
 from ..models import SearchResult, Summary
 
 
+def summary_anchor(url: str) -> str:
+    """Stable HTML anchor id for a page's section in the shared summaries file."""
+    return "page-" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+class MarkdownReportWriter:
+    """
+    Incremental writer for the search results report.
+    
+    Each section is rendered in memory and written with a single call, then
+    flushed, so sections can be appended as soon as their summaries are ready
+    and a crash midway still leaves every finished section on disk.
+    
+    Usage:
+        with MarkdownReportWriter("search_results.md") as report:
+            report.write_header(query, result_count=5, limit=5)
+            report.write_section(1, result, summary)
+    """
+    
+    def __init__(self, filename: str = "search_results.md", buffer_size: int = 64 * 1024):
+        """
+        Args:
+            filename: Output filename
+            buffer_size: Write buffer size in bytes
+        """
+        self.filename = filename
+        self.sections_written = 0
+        self.summaries_written = 0
+        self._file = open(filename, "w", buffering=buffer_size)
+    
+    def _write(self, parts: List[str]) -> None:
+        self._file.write("".join(parts))
+        self._file.flush()
+    
+    def write_header(
+        self,
+        query: str,
+        result_count: int,
+        limit: int,
+        summary_count: Optional[int] = None
+    ) -> None:
+        """
+        Write the report header.
+        
+        Args:
+            query: The search query used
+            result_count: Number of search results
+            limit: The search limit used
+            summary_count: Number of AI summaries, if already known; otherwise
+                it is written in the footer by close()
+        """
+        parts = [
+            f"# 📊 Search Results & Analysis for: {query}\n\n",
+            f"**🔍 Query:** {query}  \n",
+            f"**📈 Results Found:** {result_count}  \n",
+            f"**⚙️ Search Limit:** {limit}  \n",
+        ]
+        if summary_count is not None:
+            parts.append(f"**🤖 AI Summaries:** {summary_count}  \n")
+        parts.append("\n---\n\n")
+        self._write(parts)
+    
+    def write_text(self, text: str) -> None:
+        """Append raw markdown."""
+        self._write([text])
+    
+    def write_section(
+        self,
+        index: int,
+        result: SearchResult,
+        summary: Optional[Summary],
+        anchor: Optional[str] = None
+    ) -> None:
+        """
+        Append one search result with its summary.
+        
+        Args:
+            index: 1-based result number shown in the heading
+            result: The search result
+            summary: Its AI-generated summary, or None if summarization failed
+            anchor: Optional HTML anchor id placed before the heading
+        """
+        parts = [f'<a id="{anchor}"></a>\n\n'] if anchor else []
+        parts += [
+            f"## {index}. {result.title}\n\n",
+            f"**🔗 URL:** [{result.url}]({result.url})  \n",
+            f"**📝 Description:** {result.description}  \n\n",
+        ]
+        
+        # Add AI-generated summary
+        if summary:
+            parts.append(f"### 🤖 AI Summary\n\n")
+            parts.append(f"{summary.summary}\n\n")
+            
+            # Key Action Items
+            if summary.key_action_items:
+                parts.append(f"### 🎯 Key Action Items\n\n")
+                parts.extend(f"- {item}\n" for item in summary.key_action_items)
+                parts.append("\n")
+            
+            # Dramatic News Points
+            if summary.dramatic_news_points:
+                parts.append(f"### 🚨 Dramatic News Points\n\n")
+                parts.extend(f"- {point}\n" for point in summary.dramatic_news_points)
+                parts.append("\n")
+            
+            # Key Takeaways
+            if summary.key_takeaways:
+                parts.append(f"### 💡 Key Takeaways\n\n")
+                parts.extend(f"- {takeaway}\n" for takeaway in summary.key_takeaways)
+                parts.append("\n")
+            self.summaries_written += 1
+        
+        # Add found links if any
+        if result.links:
+            parts.append(f"### 🔗 Related Links ({len(result.links)})\n\n")
+            parts.extend(f"- {link}\n" for link in result.links[:10])  # Show max 10 links
+            if len(result.links) > 10:
+                parts.append(f"- ... and {len(result.links) - 10} more links\n")
+            parts.append("\n")
+        
+        # Add content preview at the end for reference
+        if result.markdown:
+            parts.append(f"<details>\n<summary>📄 Full Content Preview</summary>\n\n")
+            parts.append(f"```\n{result.markdown[:1000]}")
+            if len(result.markdown) > 1000:
+                parts.append("...")
+            parts.append(f"\n```\n\n</details>\n\n")
+        
+        parts.append("---\n\n")
+        self._write(parts)
+        self.sections_written += 1
+    
+    def close(self, write_footer: bool = False) -> None:
+        """
+        Close the report.
+        
+        Args:
+            write_footer: Append the AI summary count (for reports whose
+                header was written before the count was known)
+        """
+        if self._file.closed:
+            return
+        if write_footer:
+            self._write([f"**🤖 AI Summaries:** {self.summaries_written}  \n"])
+        self._file.close()
+    
+    def __enter__(self) -> "MarkdownReportWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
 def save_search_results_to_markdown(
     query: str,
     search_results: List[SearchResult],
-    summaries: List[Summary],
+    summaries: List[Optional[Summary]],
     limit: int,
     filename: str = "search_results.md"
 ) -> None:
@@ -19,69 +175,87 @@ def save_search_results_to_markdown(
     Args:
         query: The search query used
         search_results: List of search results
-        summaries: List of AI-generated summaries
+        summaries: List of AI-generated summaries, in result order (None where summarization failed)
         limit: The search limit used
         filename: Output filename (default: "search_results.md")
     """
     print(f"Saving search results with summaries to formatted markdown file: {filename}")
+    summary_count = sum(1 for summary in summaries if summary)
     
     # Create a nicely formatted markdown report
-    with open(filename, "w") as f:
-        f.write(f"# 📊 Search Results & Analysis for: {query}\n\n")
-        f.write(f"**🔍 Query:** {query}  \n")
-        f.write(f"**📈 Results Found:** {len(search_results)}  \n")
-        f.write(f"**⚙️ Search Limit:** {limit}  \n")
-        f.write(f"**🤖 AI Summaries:** {len(summaries)}  \n\n")
-        f.write("---\n\n")
-        
+    with MarkdownReportWriter(filename) as report:
+        report.write_header(query, len(search_results), limit, summary_count=summary_count)
         for i, (result, summary) in enumerate(zip(search_results, summaries), 1):
-            f.write(f"## {i}. {result.title}\n\n")
-            f.write(f"**🔗 URL:** [{result.url}]({result.url})  \n")
-            f.write(f"**📝 Description:** {result.description}  \n\n")
-            
-            # Add AI-generated summary
-            if summary:
-                f.write(f"### 🤖 AI Summary\n\n")
-                f.write(f"{summary.summary}\n\n")
-                
-                # Key Action Items
-                if summary.key_action_items:
-                    f.write(f"### 🎯 Key Action Items\n\n")
-                    for item in summary.key_action_items:
-                        f.write(f"- {item}\n")
-                    f.write("\n")
-                
-                # Dramatic News Points
-                if summary.dramatic_news_points:
-                    f.write(f"### 🚨 Dramatic News Points\n\n")
-                    for point in summary.dramatic_news_points:
-                        f.write(f"- {point}\n")
-                    f.write("\n")
-                
-                # Key Takeaways
-                if summary.key_takeaways:
-                    f.write(f"### 💡 Key Takeaways\n\n")
-                    for takeaway in summary.key_takeaways:
-                        f.write(f"- {takeaway}\n")
-                    f.write("\n")
-            
-            # Add found links if any
-            if result.links:
-                f.write(f"### 🔗 Related Links ({len(result.links)})\n\n")
-                for link in result.links[:10]:  # Show max 10 links
-                    f.write(f"- {link}\n")
-                if len(result.links) > 10:
-                    f.write(f"- ... and {len(result.links) - 10} more links\n")
-                f.write("\n")
-            
-            # Add content preview at the end for reference
-            if result.markdown:
-                f.write(f"<details>\n<summary>📄 Full Content Preview</summary>\n\n")
-                f.write(f"```\n{result.markdown[:1000]}")
-                if len(result.markdown) > 1000:
-                    f.write("...")
-                f.write(f"\n```\n\n</details>\n\n")
-            
-            f.write("---\n\n")
+            report.write_section(i, result, summary)
+    
+    print(f"✅ Search results with AI summaries saved to '{filename}' ({len(search_results)} results, {summary_count} summaries)")
+
+
+def save_shared_summaries(
+    pages: Dict[str, SearchResult],
+    summaries: Dict[str, Optional[Summary]],
+    filename: str
+) -> None:
+    """
+    Save every unique page of a batch run with its summary, once.
     
-    print(f"✅ Search results with AI summaries saved to '{filename}' ({len(search_results)} results, {len(summaries)} summaries)") 
\ No newline at end of file
+    Args:
+        pages: Unique pages keyed by canonical URL
+        summaries: Summaries keyed by canonical URL (None where summarization failed)
+        filename: Output filename
+    """
+    with MarkdownReportWriter(filename) as report:
+        report.write_text(
+            f"# 📚 Shared Page Summaries\n\n"
+            f"**📄 Unique Pages:** {len(pages)}  \n"
+            f"**🤖 AI Summaries:** {sum(1 for summary in summaries.values() if summary)}  \n\n"
+            f"---\n\n"
+        )
+        for i, (key, result) in enumerate(pages.items(), 1):
+            report.write_section(i, result, summaries.get(key), anchor=summary_anchor(key))
+    
+    print(f"✅ Shared summaries saved to '{filename}' ({len(pages)} unique pages)")
+
+
+def save_query_report(
+    query: str,
+    search_results: List[SearchResult],
+    keys: List[str],
+    summaries: Dict[str, Optional[Summary]],
+    limit: int,
+    shared_filename: str,
+    filename: str
+) -> None:
+    """
+    Save one query's results, linking to their summaries in the shared file.
+    
+    Args:
+        query: The search query used
+        search_results: The query's search results
+        keys: Canonical URL of each search result
+        summaries: Summaries keyed by canonical URL
+        limit: The search limit used
+        shared_filename: Shared summaries file the report links to
+        filename: Output filename
+    """
+    shared_link = os.path.relpath(shared_filename, os.path.dirname(filename) or ".")
+    parts = [
+        f"# 📊 Search Results & Analysis for: {query}\n\n",
+        f"**🔍 Query:** {query}  \n",
+        f"**📈 Results Found:** {len(search_results)}  \n",
+        f"**⚙️ Search Limit:** {limit}  \n",
+        f"**🤖 AI Summaries:** {sum(1 for key in keys if summaries.get(key))}  \n\n",
+        "---\n\n",
+    ]
+    for i, (result, key) in enumerate(zip(search_results, keys), 1):
+        parts.append(f"## {i}. {result.title}\n\n")
+        parts.append(f"**🔗 URL:** [{result.url}]({result.url})  \n")
+        parts.append(f"**📝 Description:** {result.description}  \n\n")
+        summary = summaries.get(key)
+        if summary:
+            parts.append(f"### 🤖 AI Summary\n\n{summary.summary}\n\n")
+            parts.append(f"➡️ [Action items, news points and takeaways]({shared_link}#{summary_anchor(key)})\n\n")
+        parts.append("---\n\n")
+    
+    with open(filename, "w") as f:
+        f.write("".join(parts))
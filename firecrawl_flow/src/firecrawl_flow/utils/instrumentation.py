@@ -0,0 +1,252 @@
+"""
+Lightweight run instrumentation for CrewAI flows.
+
+A run is wrapped in ``run_trace(...)``; while it is active, flow steps
+decorated with ``traced_step``, crew kickoffs made through
+``traced_kickoff``/``traced_kickoff_async`` and upstream calls wrapped in
+``upstream_span`` are timed, and ``event`` marks instants such as cache
+hits. Every span is appended to ``<directory>/<flow>-<run_id>.jsonl`` as it
+finishes, and a summary table of where the wall time and tokens went is
+printed when the run ends.
+
+Without an active trace all helpers are pass-throughs, so instrumented code
+costs nothing outside a traced run.
+
+The active trace and the enclosing span are context variables: concurrent
+runs each see their own trace, and a span started inside another one (an
+upstream call inside a crew kickoff) names it as its parent even when
+several crews run concurrently. Asyncio tasks and ``asyncio.to_thread``
+inherit both; code run in a plain thread pool does not, unless it is
+submitted through ``contextvars.copy_context().run``.
+
+Records look like:
+
+    {"kind": "step", "name": "perform_search", "start": 0.002, "duration": 1.84}
+    {"kind": "crew", "name": "summary", "start": 1.85, "duration": 9.3,
+     "prompt_tokens": 2410, "completion_tokens": 388, "total_tokens": 2798, "requests": 1}
+    {"kind": "upstream", "name": "firecrawl.search", "start": 0.01, "duration": 1.8,
+     "parent": "perform_search"}
+    {"kind": "cache", "name": "llm_cache.hit", "start": 2.4, "duration": 0.0,
+     "parent": "create_summary"}
+    {"kind": "run", "name": "firecrawl_flow", "duration": 14.2, "spans": 12}
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+class RunTrace:
+    """
+    Collects the spans of one flow run.
+
+    Args:
+        flow: Flow name, used in the trace file name and the summary
+        run_id: Run identifier (a random one is generated if empty)
+        directory: Directory holding the trace files
+    """
+
+    def __init__(self, flow: str, run_id: str = "", directory: str = "traces"):
+        self.flow = flow
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.path = os.path.join(directory, f"{flow}-{self.run_id}.jsonl")
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        # (kind, name) -> [calls, errors, total, max, prompt, completion, total tokens]
+        self._totals: Dict[Tuple[str, str], List[float]] = {}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def record(self, kind: str, name: str, start: float, duration: float, error: str = "", **fields: Any) -> None:
+        """
+        Append a finished span.
+
+        Args:
+            kind: Span kind ("step", "crew", "upstream", "cache", ...)
+            name: Span name within its kind
+            start: Seconds since the run started
+            duration: Wall time in seconds
+            error: Exception type name if the span failed
+            **fields: Extra JSON-serializable data (token counts, sizes, ...)
+        """
+        record = {"kind": kind, "name": name, "start": round(start, 4), "duration": round(duration, 4)}
+        if error:
+            record["error"] = error
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+        with self._lock:
+            totals = self._totals.setdefault((kind, name), [0, 0, 0.0, 0.0, 0, 0, 0])
+            totals[0] += 1
+            totals[1] += 1 if error else 0
+            totals[2] += duration
+            totals[3] = max(totals[3], duration)
+            for i, field in enumerate(TOKEN_FIELDS, 4):
+                totals[i] += fields.get(field) or 0
+            self._file.write(line)
+            self._file.write("\n")
+            self._file.flush()
+
+    @contextmanager
+    def span(self, kind: str, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block. The yielded dict can be filled with extra fields
+        (e.g. token usage) that are recorded with the span.
+        """
+        parent = _current_span.get()
+        if parent:
+            fields.setdefault("parent", parent)
+        token = _current_span.set(name)
+        start = self.elapsed()
+        error = ""
+        try:
+            yield fields
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            self.record(kind, name, start, self.elapsed() - start, error=error, **fields)
+
+    def summary(self) -> str:
+        """Table of calls, wall time and tokens per span, busiest first."""
+        wall = self.elapsed()
+        with self._lock:
+            rows = sorted(self._totals.items(), key=lambda item: item[1][2], reverse=True)
+
+        header = (
+            f"{'kind':<10}{'name':<32}{'calls':>7}{'errors':>8}{'total s':>10}"
+            f"{'mean s':>9}{'max s':>9}{'% wall':>8}{'prompt tok':>12}{'compl tok':>11}"
+        )
+        lines = [f"Trace {self.flow} run {self.run_id}: {wall:.2f}s wall -> {self.path}", header, "-" * len(header)]
+        for (kind, name), (calls, errors, total, longest, prompt, completion, _) in rows:
+            lines.append(
+                f"{kind:<10}{name[:31]:<32}{calls:>7}{errors:>8}{total:>10.2f}"
+                f"{total / calls:>9.2f}{longest:>9.2f}{100 * total / wall if wall else 0:>7.1f}%"
+                f"{prompt:>12}{completion:>11}"
+            )
+        tokens = sum(totals[6] for _, totals in rows)
+        lines.append(f"Total tokens: {tokens}  (concurrent spans overlap, so % wall can add up to more than 100)")
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            spans = sum(int(totals[0]) for totals in self._totals.values())
+        self.record("run", self.flow, 0.0, self.elapsed(), spans=spans)
+        with self._lock:
+            self._file.close()
+
+
+_active: ContextVar[Optional[RunTrace]] = ContextVar("run_trace", default=None)
+_current_span: ContextVar[str] = ContextVar("run_trace_span", default="")
+
+
+def current_trace() -> Optional[RunTrace]:
+    return _active.get()
+
+
+@contextmanager
+def run_trace(flow: str, run_id: str = "", directory: str = "traces", print_summary: bool = True) -> Iterator[RunTrace]:
+    """
+    Trace everything instrumented while the block runs.
+
+    Usage:
+        with run_trace("poem_flow"):
+            PoemFlow().kickoff()
+    """
+    trace = RunTrace(flow, run_id=run_id, directory=directory)
+    token = _active.set(trace)
+    try:
+        yield trace
+    finally:
+        _active.reset(token)
+        trace.close()
+        if print_summary:
+            print(trace.summary())
+
+
+@contextmanager
+def span(kind: str, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """``RunTrace.span`` on the active trace; a no-op when nothing is traced."""
+    trace = _active.get()
+    if trace is None:
+        yield fields
+        return
+    with trace.span(kind, name, **fields) as extra:
+        yield extra
+
+
+def event(kind: str, name: str, **fields: Any) -> None:
+    """Record a point event (a cache hit, ...) as a zero-length span on the active trace."""
+    trace = _active.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    if parent:
+        fields.setdefault("parent", parent)
+    trace.record(kind, name, trace.elapsed(), 0.0, **fields)
+
+
+def upstream_span(name: str, **fields: Any):
+    """Time one upstream (e.g. Firecrawl) call."""
+    return span("upstream", name, **fields)
+
+
+def traced_step(func: Callable) -> Callable:
+    """
+    Time a flow step. Apply it below ``@start``/``@listen``:
+
+        @listen(get_query)
+        @traced_step
+        def perform_search(self): ...
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with span("step", func.__name__):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span("step", func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def usage_fields(output: Any) -> Dict[str, int]:
+    """Token counts from a CrewOutput's ``token_usage``."""
+    usage = getattr(output, "token_usage", None)
+    if usage is None:
+        return {}
+    fields = {field: int(getattr(usage, field, 0) or 0) for field in TOKEN_FIELDS}
+    fields["requests"] = int(getattr(usage, "successful_requests", 0) or 0)
+    return fields
+
+
+def traced_kickoff(crew: Any, inputs: Dict[str, Any], name: str = "crew") -> Any:
+    """``crew.kickoff(inputs=...)`` recorded with its wall time and token usage."""
+    with span("crew", name) as fields:
+        output = crew.kickoff(inputs=inputs)
+        fields.update(usage_fields(output))
+    return output
+
+
+async def traced_kickoff_async(crew: Any, inputs: Dict[str, Any], name: str = "crew") -> Any:
+    """``crew.kickoff_async(inputs=...)`` recorded with its wall time and token usage."""
+    with span("crew", name) as fields:
+        output = await crew.kickoff_async(inputs=inputs)
+        fields.update(usage_fields(output))
+    return output
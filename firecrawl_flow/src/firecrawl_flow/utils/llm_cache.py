@@ -0,0 +1,161 @@
+"""
+Persistent LLM response cache for FireCrawl Flow and the example scripts.
+
+Responses are keyed on (model, prompt template, inputs), so re-running a flow
+or script over unchanged content never triggers another LLM call, while a
+change to the model, the prompt or the content is a guaranteed miss.
+
+The cache is a single SQLite file (shared by every process that points at
+the same path) with least-recently-used eviction once it grows past
+``max_bytes``. Only the standard library is used.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "firecrawl", "llm_cache.sqlite3")
+
+
+def default_cache_path() -> str:
+    """Cache location, overridable with the LLM_CACHE_PATH environment variable."""
+    return os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+
+
+class LLMCache:
+    """
+    SQLite-backed, size-bounded cache of LLM responses.
+
+    Usage:
+        cache = LLMCache()
+        text = cache.get_or_call(
+            model="gpt-4.1",
+            template=PROMPT,
+            inputs={"results": results},
+            call=lambda: ask_llm(PROMPT.format(results=results))
+        )
+
+    Args:
+        path: SQLite file (defaults to ``default_cache_path()``)
+        max_bytes: Evict least recently used responses beyond this total size
+        evict_to: Fraction of ``max_bytes`` to shrink to when evicting, so
+            eviction runs rarely rather than on every write
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 256 * 1024 * 1024, evict_to: float = 0.9):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.evict_to = evict_to
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        # Running size estimate, so writes only scan the table when near the bound
+        self._approx_bytes = self._total_bytes()
+
+    def _total_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, template: str, inputs: Dict[str, Any]) -> str:
+        """Stable hash of the model, the prompt template and the template inputs."""
+        payload = json.dumps(
+            {"model": model, "template": template, "inputs": inputs},
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str, model: str = "") -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, size, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, value, size, now, now)
+            )
+            self._approx_bytes += size
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        self._approx_bytes = total
+        if total <= self.max_bytes:
+            return
+        target = total - int(self.max_bytes * self.evict_to)
+        # Delete the least recently used rows until enough bytes are freed
+        self._db.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM ("
+            "  SELECT key, SUM(size) OVER (ORDER BY accessed_at ROWS UNBOUNDED PRECEDING) AS freed"
+            "  FROM responses ORDER BY accessed_at"
+            " ) WHERE freed - size < ?"
+            ")",
+            (target,)
+        )
+        self._approx_bytes = self._total_bytes()
+
+    def get_or_call(
+        self,
+        model: str,
+        template: str,
+        inputs: Dict[str, Any],
+        call: Callable[[], str],
+    ) -> str:
+        """Return the cached response, or run ``call`` and cache its result."""
+        key = self.make_key(model, template, inputs)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = call()
+        self.set(key, value, model=model)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._approx_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,46 @@
+"""
+URL helpers for FireCrawl Flow
+"""
+
+from urllib.parse import urlsplit, urlunsplit
+
+# Query parameters that only carry attribution data and never change content.
+# Same rules as the scraper API's UrlCanonicalizer, so both agree on which
+# URLs name the same page.
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid",
+    "mc_cid", "mc_eid", "igshid", "_ga", "_gl", "_hsenc", "_hsmi",
+    "mkt_tok", "ref_src", "spm", "vero_id",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+
+def _is_tracking_param(param: str) -> bool:
+    key = param.partition("=")[0].lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings of a page compare equal.
+    
+    Lowercases the scheme and host, drops the fragment, a default port, a
+    trailing slash and tracking parameters such as ``utm_*``, ``gclid`` and
+    ``fbclid``, and sorts the remaining query parameters by name.
+    
+    Args:
+        url: URL to normalize
+        
+    Returns:
+        Canonical URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path.rstrip("/") or "/"
+    params = [p for p in parts.query.split("&") if p and not _is_tracking_param(p)]
+    # Stable sort on the name only, so repeated names keep their order
+    params.sort(key=lambda p: p.partition("=")[0])
+    return urlunsplit((scheme, netloc, path, "&".join(params), ""))